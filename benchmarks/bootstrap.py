@@ -0,0 +1,61 @@
+# bootstrap.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import click
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model_artifact import load_model
+from src.evaluation import evaluate_predictions
+
+
+def loop_bootstrap(y_true, y_pred, labels, n_resamples, seed):
+    """Resamples the rows of the test set in a Python loop and scores each resample with scikit-learn."""
+    rng = np.random.default_rng(seed)
+    for _ in range(n_resamples):
+        rows = rng.integers(0, len(y_true), len(y_true))
+        accuracy_score(y_true[rows], y_pred[rows])
+        precision_recall_fscore_support(y_true[rows], y_pred[rows], labels=labels, zero_division=0)
+
+
+@click.command()
+@click.option('--model', type=str, help="Path to the tuned decision tree", default="results/models/dt_tuned_fit.model")
+@click.option('--test-data', type=str, help="Path to processed test data", default="data/processed/test_df.csv")
+@click.option('--n-rows', type=int, multiple=True, help="Sizes of the scaled-up test sets (can be repeated)", default=[203, 100_000, 1_000_000])
+@click.option('--n-resamples', type=int, help="Number of bootstrap resamples", default=2000)
+@click.option('--loop-resamples', type=int, help="Number of resamples timed with the loop, scaled up to --n-resamples", default=20)
+@click.option('--seed', type=int, help="Random seed", default=111)
+def main(model, test_data, n_rows, n_resamples, loop_resamples, seed):
+    """Compares the time of bootstrap confidence intervals computed with a Python loop over
+    resampled rows and with evaluate_predictions."""
+    tree = load_model(model)
+    test_df = pd.read_csv(test_data)
+    rows = []
+    for n in n_rows:
+        sample = test_df.sample(n, replace=n > len(test_df), random_state=seed)
+        y_true = sample["RiskLevel"].to_numpy()
+        start = time.perf_counter()
+        y_pred = tree.predict(sample.drop(columns=["RiskLevel"]))
+        predict_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loop_bootstrap(y_true, y_pred, tree.classes_, loop_resamples, seed)
+        loop_s = (time.perf_counter() - start) * n_resamples / loop_resamples
+
+        start = time.perf_counter()
+        evaluate_predictions(y_true, y_pred, tree.classes_, n_resamples=n_resamples, seed=seed)
+        vectorized_s = time.perf_counter() - start
+        rows.append({"n_rows": n, "predict_s": round(predict_s, 3), "loop_s (estimated)": round(loop_s, 1),
+                     "evaluate_predictions_s": round(vectorized_s, 3)})
+
+    print(f"{n_resamples} bootstrap resamples")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# chunked_validation.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import click
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data_validation import data_validation, data_validation_chunked
+
+
+def measure(func):
+    """Returns the wall-clock time and the peak traced memory (MB) of calling `func`."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+@click.command()
+@click.option('--raw-data', type=str, help="The path to raw data", default="data/raw/Maternal Health Risk Data Set.csv")
+@click.option('--n-rows', type=int, multiple=True, help="Number of rows of the scaled-up files (can be repeated)", default=[100_000, 1_000_000, 4_000_000])
+@click.option('--chunksize', type=int, help="Number of rows validated at a time", default=100_000)
+@click.option('--seed', type=int, help="Random seed", default=111)
+def main(raw_data, n_rows, chunksize, seed):
+    """Compares the peak memory of validating scaled-up copies of the raw CSV
+    all at once and in chunks, using the numpy engine for both."""
+    df = pd.read_csv(raw_data)
+    df = df[df['HeartRate'] != 7]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in n_rows:
+            path = os.path.join(tmp, f"raw_{n}.csv")
+            df.sample(n, replace=True, random_state=seed).to_csv(path, index=False)
+
+            whole_time, whole_peak = measure(lambda: data_validation(pd.read_csv(path), engine="numpy"))
+            chunked_time, chunked_peak = measure(
+                lambda: data_validation_chunked(pd.read_csv(path, chunksize=chunksize), engine="numpy")
+            )
+            rows.append({
+                "rows": n, "whole_s": round(whole_time, 2), "whole_peak_mb": round(whole_peak, 1),
+                "chunked_s": round(chunked_time, 2), "chunked_peak_mb": round(chunked_peak, 1)
+            })
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
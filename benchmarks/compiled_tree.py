@@ -0,0 +1,59 @@
+# compiled_tree.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import click
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model_artifact import load_model
+from src.compiled_tree import compile_tree, predict_compiled
+
+
+def best_time(func, repeats):
+    """Returns the best wall-clock time of `func` over `repeats` runs."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@click.command()
+@click.option('--model', type=str, help="Path to the tuned decision tree", default="results/models/dt_tuned_fit.model")
+@click.option('--test-data', type=str, help="Path to processed test data", default="data/processed/test_df.csv")
+@click.option('--batch-size', type=int, multiple=True, help="Batch sizes to time (can be repeated)",
+              default=[1, 10, 100, 1_000, 10_000, 100_000, 1_000_000])
+@click.option('--seed', type=int, help="Random seed", default=111)
+def main(model, test_data, batch_size, seed):
+    """Compares the prediction latency of the tuned decision tree's predict method
+    with the compiled tree at several batch sizes."""
+    tree = load_model(model)
+    compiled = compile_tree(tree)
+    X_test = pd.read_csv(test_data).drop(columns=["RiskLevel"])
+    if not (predict_compiled(compiled, X_test) == tree.predict(X_test)).all():
+        raise AssertionError("The compiled tree disagrees with scikit-learn on the test set")
+
+    rows = []
+    for n in batch_size:
+        batch = X_test.sample(n, replace=True, random_state=seed)
+        array = batch.to_numpy(dtype=np.float32)
+        repeats = max(3, min(200, 100_000 // n))
+        timings = {
+            "sklearn_ms": best_time(lambda: tree.predict(batch), repeats),
+            "compiled_df_ms": best_time(lambda: predict_compiled(compiled, batch), repeats),
+            "compiled_array_ms": best_time(lambda: predict_compiled(compiled, array), repeats),
+        }
+        rows.append({"batch_size": n, **{name: round(t * 1000, 3) for name, t in timings.items()},
+                     "speedup": round(timings["sklearn_ms"] / timings["compiled_array_ms"], 1)})
+
+    print(f"Tree with {len(compiled.feature)} nodes and depth {compiled.max_depth}")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# eda_charts.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import click
+import os
+import sys
+import time
+import tempfile
+import altair as alt
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.eda_utilities import boxplot_chart
+
+
+def raw_boxplots(df_eda):
+    """Returns the boxplots of eda.py drawn from the raw rows, as before the aggregation."""
+    columns = [col for col in df_eda.columns.tolist() if col != 'RiskLevel']
+    return alt.vconcat(*[
+        alt.Chart(df_eda).mark_boxplot(extent='min-max').encode(
+            x=alt.X('RiskLevel:N', title='Risk Level', axis=alt.Axis(labelAngle=0)),
+            y=alt.Y(f'{col}:Q', title=col),
+            color='RiskLevel:N'
+        ).properties(title=f'Comparing {col} Across Risk Levels', width=300, height=200)
+        for col in columns
+    ]).resolve_scale(color='independent', y='independent')
+
+
+@click.command()
+@click.option('--training-data', type=str, help="Path to processed training data", default="data/processed/train_df.csv")
+@click.option('--n-rows', type=int, multiple=True, help="Sizes of the scaled-up data (can be repeated)", default=[1_000, 10_000, 100_000])
+@click.option('--seed', type=int, help="Random seed", default=111)
+def main(training_data, n_rows, seed):
+    """Compares the spec size and PNG render time of the EDA boxplots drawn from the raw
+    rows and from the box statistics of boxplot_chart, including the time to compute them."""
+    train_df = pd.read_csv(training_data)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp, alt.data_transformers.disable_max_rows():
+        for n in n_rows:
+            df_eda = train_df.sample(n, replace=n > len(train_df), random_state=seed)
+            raw = raw_boxplots(df_eda)
+            start = time.perf_counter()
+            raw.save(os.path.join(tmp, "raw.png"), scale_factor=2.0)
+            raw_s = time.perf_counter() - start
+
+            # Saved directly, as create_boxplots skips charts whose spec hash is unchanged
+            start = time.perf_counter()
+            aggregated = boxplot_chart(df_eda)
+            aggregated.save(os.path.join(tmp, "aggregated.png"), scale_factor=2.0)
+            aggregated_s = time.perf_counter() - start
+
+            rows.append({"n_rows": n, "raw_spec_kb": round(len(raw.to_json()) / 1024, 1),
+                         "aggregated_spec_kb": round(len(aggregated.to_json()) / 1024, 1),
+                         "raw_s": round(raw_s, 2), "aggregated_s": round(aggregated_s, 2)})
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
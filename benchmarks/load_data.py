@@ -0,0 +1,56 @@
+# load_data.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import click
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.load_data import read_maternal_csv, FAST_ENGINE
+
+
+def best_time(func, repeats):
+    """Returns the result of `func` and its best wall-clock time over `repeats` runs."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+@click.command()
+@click.option('--training-data', type=str, help="Path to processed training data", default="data/processed/train_df.csv")
+@click.option('--n-rows', type=int, multiple=True, help="Number of rows of the scaled-up copies (can be repeated)", default=[1_000_000, 5_000_000])
+@click.option('--repeats', type=int, help="Number of timed runs per loader, the best one is reported", default=3)
+@click.option('--seed', type=int, help="Random seed", default=111)
+def main(training_data, n_rows, repeats, seed):
+    """Compares the parse time and memory of plain `pd.read_csv` with `read_maternal_csv`
+    on scaled-up copies of the processed training data."""
+    df = pd.read_csv(training_data)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in n_rows:
+            path = os.path.join(tmp, f"train_{n}.csv")
+            df.sample(n, replace=True, random_state=seed).to_csv(path, index=False)
+
+            plain, plain_time = best_time(lambda: pd.read_csv(path), repeats)
+            compact, compact_time = best_time(lambda: read_maternal_csv(path), repeats)
+            plain_mb = plain.memory_usage(deep=True).sum() / 1e6
+            compact_mb = compact.memory_usage(deep=True).sum() / 1e6
+            rows.append({
+                "rows": n, "read_csv_s": round(plain_time, 2), "loader_s": round(compact_time, 2),
+                "read_csv_mb": round(plain_mb, 1), "loader_mb": round(compact_mb, 1),
+                "memory_reduction": f"{plain_mb / compact_mb:.1f}x"
+            })
+
+    print(f"read_maternal_csv engine: {FAST_ENGINE}")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# load_generator.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import click
+import json
+import time
+import asyncio
+import numpy as np
+import pandas as pd
+
+
+async def request(reader, writer, method, path, payload=None):
+    """Sends an HTTP/1.1 request on an open connection and returns the status and JSON body of the response."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, value = line.decode().split(":", 1)
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, records, n_requests, records_per_request, latencies, statuses, seed):
+    """Sends `n_requests` prediction requests one after the other on a keep-alive connection."""
+    rng = np.random.default_rng(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(n_requests):
+            payload = [records[i] for i in rng.integers(len(records), size=records_per_request)]
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, "POST", "/predict", payload)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def metrics(host, port):
+    """Returns the /metrics of the scoring service."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await request(reader, writer, "GET", "/metrics"))[1]
+    finally:
+        writer.close()
+
+
+async def run(host, port, records, concurrency, n_requests, records_per_request, seed):
+    """Runs `concurrency` clients and returns the client-side results and the server's /metrics."""
+    latencies, statuses = [], {}
+    before = await metrics(host, port)
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(host, port, records, n_requests // concurrency, records_per_request, latencies, statuses, seed + i)
+        for i in range(concurrency)
+    ])
+    seconds = time.perf_counter() - start
+    after = await metrics(host, port)
+    latencies = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency, "requests": len(latencies), "statuses": statuses,
+        "requests_per_second": round(len(latencies) / seconds, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2), "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        # Records per batch on the server during this run
+        "mean_batch_size": round((after["records"] - before["records"]) / max(after["batches"] - before["batches"], 1), 2),
+    }, after
+
+
+@click.command()
+@click.option('--host', type=str, help="Address of the scoring service", default="127.0.0.1")
+@click.option('--port', type=int, help="Port of the scoring service", default=8000)
+@click.option('--test-data', type=str, help="Path to the data the records are sampled from", default="data/processed/test_df.csv")
+@click.option('--concurrency', type=int, multiple=True, help="Numbers of concurrent clients to run (can be repeated)", default=[1, 16, 64])
+@click.option('--requests', 'n_requests', type=int, help="Number of requests per run", default=5000)
+@click.option('--records-per-request', type=int, help="Number of records in each request", default=1)
+@click.option('--seed', type=int, help="Random seed", default=111)
+def main(host, port, test_data, concurrency, n_requests, records_per_request, seed):
+    """Sends prediction requests to a running scripts/serve.py from several concurrent
+    keep-alive clients and reports the client-side latency and throughput."""
+    records = pd.read_csv(test_data).drop(columns=["RiskLevel"]).to_dict(orient="records")
+    rows = []
+    for clients in concurrency:
+        result, server_metrics = asyncio.run(run(host, port, records, clients, n_requests, records_per_request, seed))
+        rows.append(result)
+    print(pd.DataFrame(rows).to_string(index=False))
+    print("Server metrics:", json.dumps(server_metrics))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# model_artifact.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import click
+import os
+import sys
+import time
+import pickle
+import tempfile
+import subprocess
+import pandas as pd
+from scipy.stats import randint
+from sklearn.model_selection import RandomizedSearchCV
+from sklearn.tree import DecisionTreeClassifier
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model_artifact import save_model, load_model
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+def best_time(func, repeats):
+    """Returns the best wall-clock time of `func` over `repeats` runs."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def cold_start(code, repeats):
+    """Returns the best wall-clock time of running `code` in a new Python process."""
+    return best_time(lambda: subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT), repeats)
+
+
+@click.command()
+@click.option('--training-data', type=str, help="Path to processed training data", default="data/processed/train_df.csv")
+@click.option('--repeats', type=int, help="Number of timed loads per format, the best one is reported", default=20)
+@click.option('--cold-repeats', type=int, help="Number of timed cold starts per format", default=5)
+def main(training_data, repeats, cold_repeats):
+    """Compares the size and load time of the pickled RandomizedSearchCV of fit_classifier.py
+    with the slim model artifact of its best estimator."""
+    train_df = pd.read_csv(training_data)
+    X_train, y_train = train_df.drop(columns=["RiskLevel"]), train_df["RiskLevel"]
+    param_dist = {'criterion': ['gini', 'entropy'], 'max_depth': randint(3, 20)}
+    search = RandomizedSearchCV(DecisionTreeClassifier(random_state=123), param_dist, n_iter=100, n_jobs=-1,
+                                return_train_score=True, random_state=123).fit(X_train, y_train)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path, model_path = os.path.join(tmp, "dt_tuned_fit.pickle"), os.path.join(tmp, "dt_tuned_fit.model")
+        with open(pickle_path, "wb") as f:
+            pickle.dump(search, f)
+        save_model(search.best_estimator_, model_path, metadata={"best_params": search.best_params_})
+
+        def load_pickle():
+            with open(pickle_path, "rb") as f:
+                return pickle.load(f).best_estimator_
+
+        for name, path, load, code in [
+            ("search pickle", pickle_path, load_pickle,
+             f"import pickle; pickle.load(open({pickle_path!r}, 'rb')).best_estimator_"),
+            ("model artifact", model_path, lambda: load_model(model_path),
+             f"from src.model_artifact import load_model; load_model({model_path!r})"),
+        ]:
+            rows.append({
+                "format": name, "size_kb": round(os.path.getsize(path) / 1024, 1),
+                "load_ms": round(best_time(load, repeats) * 1000, 2),
+                "cold_start_ms": round(cold_start(code, cold_repeats) * 1000, 1),
+            })
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# shared_memory.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import click
+import os
+import sys
+import time
+import tempfile
+import multiprocessing
+import pandas as pd
+from scipy.stats import randint
+from sklearn.model_selection import RandomizedSearchCV
+from sklearn.tree import DecisionTreeClassifier
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.load_data import memmap_training_data
+
+
+def process_tree(pid):
+    """Returns `pid` and the pids of all its descendants."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except OSError:
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def pss_mb(pid):
+    """Returns the proportional set size of a process in MB, which splits shared pages between their users."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def run_search(path, n_jobs, share_data, n_iter):
+    """Runs the decision tree search of fit_classifier.py on the data at `path`."""
+    train_df = pd.read_csv(path)
+    X_train, y_train = train_df.drop(columns=["RiskLevel"]), train_df["RiskLevel"]
+    del train_df
+    with tempfile.TemporaryDirectory() as shared_dir:
+        if share_data:
+            X_train, y_train = memmap_training_data(X_train, y_train, shared_dir)
+        param_dist = {'criterion': ['gini', 'entropy'], 'max_depth': randint(3, 20)}
+        search = RandomizedSearchCV(DecisionTreeClassifier(random_state=123), param_dist, n_iter=n_iter,
+                                    n_jobs=n_jobs, return_train_score=True, random_state=123)
+        search.fit(X_train, y_train)
+
+
+def peak_memory(path, n_jobs, share_data, n_iter):
+    """Runs `run_search` in a new process and returns its wall-clock time and the peak total PSS of its process tree."""
+    process = multiprocessing.get_context("spawn").Process(target=run_search, args=(path, n_jobs, share_data, n_iter))
+    start = time.perf_counter()
+    process.start()
+    peak = 0.0
+    while process.is_alive():
+        peak = max(peak, sum(pss_mb(pid) for pid in process_tree(process.pid)))
+        time.sleep(0.05)
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"The search failed with exit code {process.exitcode}")
+    return time.perf_counter() - start, peak
+
+
+@click.command()
+@click.option('--training-data', type=str, help="Path to processed training data", default="data/processed/train_df.csv")
+@click.option('--n-rows', type=int, help="Number of rows of the scaled-up copy", default=2_000_000)
+@click.option('--n-jobs', type=int, multiple=True, help="Numbers of search workers to compare (can be repeated)", default=[1, 4, -1])
+@click.option('--n-iter', type=int, help="Number of sampled configurations of the search", default=10)
+@click.option('--seed', type=int, help="Random seed", default=111)
+def main(training_data, n_rows, n_jobs, n_iter, seed):
+    """Compares the peak memory of the decision tree search when workers receive a pickled
+    DataFrame and when they share a memory-mapped copy of the training data."""
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "train.csv")
+        pd.read_csv(training_data).sample(n_rows, replace=True, random_state=seed).to_csv(path, index=False)
+
+        for jobs in n_jobs:
+            for share_data in (False, True):
+                seconds, peak = peak_memory(path, jobs, share_data, n_iter)
+                rows.append({
+                    "n_jobs": jobs if jobs > 0 else f"{jobs} ({os.cpu_count()} cores)",
+                    "data": "memmap" if share_data else "DataFrame",
+                    "seconds": round(seconds, 1), "peak_pss_mb": round(peak, 1)
+                })
+
+    print(f"{n_rows} rows, {n_iter} configurations x 5 folds")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
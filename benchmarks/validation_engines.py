@@ -0,0 +1,68 @@
+# validation_engines.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import click
+import time
+import numpy as np
+import pandas as pd
+import pandera as pa
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data_validation import data_validation
+
+
+def time_engine(df, engine, repeats):
+    """Returns the best wall-clock time of validating `df` with `engine`, and its failure cases."""
+    best = float("inf")
+    failure_cases = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        try:
+            data_validation(df, engine=engine)
+        except pa.errors.SchemaErrors as e:
+            failure_cases = e.failure_cases.astype(str)
+        best = min(best, time.perf_counter() - start)
+    if failure_cases is not None:
+        failure_cases = failure_cases.sort_values(list(failure_cases.columns)).reset_index(drop=True)
+    return best, failure_cases
+
+
+@click.command()
+@click.option('--raw-data', type=str, help="The path to raw data", default="data/raw/Maternal Health Risk Data Set.csv")
+@click.option('--n-rows', type=int, multiple=True, help="Number of rows of the scaled-up copies (can be repeated)", default=[10_000, 100_000, 1_000_000])
+@click.option('--repeats', type=int, help="Number of timed runs per engine, the best one is reported", default=3)
+@click.option('--seed', type=int, help="Random seed", default=111)
+def main(raw_data, n_rows, repeats, seed):
+    """Times the pandera and numpy validation engines on scaled-up copies of the raw data,
+    both on clean data and on a copy with injected errors, and checks that the reports agree."""
+    df = pd.read_csv(raw_data)
+    df = df[df['HeartRate'] != 7]
+    rng = np.random.default_rng(seed)
+
+    rows = []
+    for n in n_rows:
+        clean = df.sample(n, replace=True, random_state=seed).reset_index(drop=True)
+        dirty = clean.copy()
+        bad = rng.choice(n, size=max(1, n // 1000), replace=False)
+        dirty.loc[bad, "Age"] = 99
+        dirty.loc[bad[::2], "RiskLevel"] = "unknown"
+
+        for label, data in [("clean", clean), ("dirty", dirty)]:
+            pandera_time, pandera_cases = time_engine(data, "pandera", repeats)
+            numpy_time, numpy_cases = time_engine(data, "numpy", repeats)
+            same = (pandera_cases is None and numpy_cases is None) or (
+                pandera_cases is not None and numpy_cases is not None and pandera_cases.equals(numpy_cases)
+            )
+            rows.append({
+                "rows": n, "data": label, "pandera_s": round(pandera_time, 4),
+                "numpy_s": round(numpy_time, 4), "speedup": round(pandera_time / numpy_time, 1),
+                "same_report": same
+            })
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
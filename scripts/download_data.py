@@ -6,24 +6,60 @@ import click
 import os
 import sys
 import logging
+import time
 import requests
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.read_zip import read_zip
+from src.read_zip import read_zips
 
 
 # Set up logging for better error handling and debugging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def read_url_file(url_file):
+    """Reads one URL per line from a file, skipping blank lines and # comments."""
+    with open(url_file) as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith('#')]
+
 @click.command()
-@click.option('--url', type = str, help = "URL of dataset to be downloaded", required = True)
+@click.option('--url', type = str, multiple = True, help = "URL of dataset to be downloaded (can be repeated)")
+@click.option('--url_file', type = str, help = "Path to a file listing one dataset URL per line")
 @click.option('--write_to', type = str, help = "Path to directory where raw data will be written to", required = True)
-def main(url, write_to):
+@click.option('--chunk_size', type = int, help = "Number of bytes downloaded and extracted at a time", default = 1024 * 1024)
+@click.option('--max_retries', type = int, help = "Number of times an interrupted download is resumed", default = 3)
+@click.option('--cache/--no_cache', default = True, help = "Skip the download and extraction when the archive is unchanged")
+@click.option('--max_workers', type = int, help = "Maximum number of archives fetched at the same time", default = 4)
+def main(url, url_file, write_to, chunk_size, max_retries, cache, max_workers):
     """Downloads zip data from the web to a local filepath and extracts it."""
     try:
+        urls = list(url) + (read_url_file(url_file) if url_file else [])
+        if not urls:
+            raise ValueError("At least one --url or a --url_file must be given.")
+
         os.makedirs(write_to, exist_ok = True)
-        logging.info(f"Starting the process to download and extract data from {url} to {write_to}...")
-        read_zip(url, write_to)
-        logging.info(f"Data successfully downloaded and extracted to {write_to}")
+        logging.info(f"Starting the process to download and extract data from {len(urls)} source(s) to {write_to}...")
+        start = time.perf_counter()
+        results = read_zips(
+            urls, write_to, max_workers=max_workers,
+            chunk_size=chunk_size, max_retries=max_retries, use_cache=cache
+        )
+        elapsed = time.perf_counter() - start
+
+        for result in results:
+            if result['status'] == 'failed':
+                logging.error(f"Error: {result['url']}: {result['error']}")
+                continue
+            run = "cold" if result['status'] == 'extracted' else "warm"
+            logging.info(
+                f"Data successfully downloaded and extracted from {result['url']} "
+                f"({run} run, {result['status']}, {result['bytes']} bytes downloaded in {result['seconds']:.3f}s, "
+                f"{result['throughput'] / 1e6:.2f} MB/s)"
+            )
+
+        failed = [result['url'] for result in results if result['status'] == 'failed']
+        logging.info(f"Processed {len(results)} source(s) in {elapsed:.3f}s, {len(failed)} failed")
+        if failed:
+            sys.exit(1)
         
     except ValueError as e:
         logging.error(f"Error: {e}")
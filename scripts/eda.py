@@ -6,26 +6,38 @@ import click
 import pandas as pd
 import os
 import sys
+import time
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.eda_utilities import create_heatmap, create_countplot, create_boxplots, save_data_summaries
+from src.eda_utilities import heatmap_chart, countplot_chart, boxplot_chart, render_charts, save_data_summaries
+from src.load_data import read_maternal_csv
 
 @click.command()
 @click.option('--processed-training-data', type=str, help="Path to processed training data")
 @click.option('--plot-to', type=str, help="Path to directory where the plot will be written to")
 @click.option('--table-to', type=str, help="Path to directory where the table will be written to")
-def main(processed_training_data, plot_to, table_to):
+@click.option('--n-jobs', type=int, help="Number of worker processes rendering the charts, -1 for all cores", default=-1)
+@click.option('--force', is_flag=True, help="Render every chart, even those whose spec has not changed")
+def main(processed_training_data, plot_to, table_to, n_jobs, force):
     '''
     Main function to perform EDA (Exploratory Data Analysis) on the provided dataset.
     '''
-    df_eda = pd.read_csv(processed_training_data)
+    # The float features are parsed as float64, float32 would show in the published summary statistics
+    df_eda = read_maternal_csv(processed_training_data, dtype={"BS": "float64", "BodyTemp": "float64"})
 
     df_corr = df_eda.copy()
     RiskLevel = {'low risk': 0, 'mid risk': 1, 'high risk': 2}
     df_corr['RiskLevel'] = df_corr['RiskLevel'].map(RiskLevel).astype(float)
 
-    create_heatmap(df_corr, plot_to)
-    create_countplot(df_eda, plot_to)
-    create_boxplots(df_eda, plot_to)
+    charts = {
+        os.path.join(plot_to, "heatmap_of_the_maternal_health.png"): heatmap_chart(df_corr),
+        os.path.join(plot_to, "countplot_of_risk_level.png"): countplot_chart(df_eda),
+        os.path.join(plot_to, "boxplot_by_risk_level.png"): boxplot_chart(df_eda),
+    }
+    start = time.perf_counter()
+    timings = render_charts(charts, n_jobs=n_jobs, force=force)
+    print(timings.round(3).to_string(index=False))
+    print(f"Chart rendering wall-clock: {time.perf_counter() - start:.2f}s, "
+          f"{(~timings['rendered']).sum()} of {len(timings)} charts unchanged (n_jobs={n_jobs})")
 
     save_data_summaries(df_eda, df_corr, table_to)
 
@@ -4,59 +4,77 @@
 
 import click
 import os
+import sys
 import numpy as np
 import pandas as pd
 import pickle
 import matplotlib.pyplot as plt
 from sklearn.tree import plot_tree
 from sklearn.metrics import ConfusionMatrixDisplay
-from sklearn.metrics import confusion_matrix
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.load_data import read_maternal_data
+from src.model_artifact import load_model
+from src.evaluation import evaluate_predictions, evaluate_chunks, evaluate_confusion
+from src.prediction import read_input_chunks
 
 @click.command()
-@click.option('--test_data', type=str, help="Path to test data")
-@click.option('--best_model_from', type=str, help="Path to directory where the fit best model object lives")
+@click.option('--test_data', type=str, help="Path to test data (.csv, .feather or .parquet)")
+@click.option('--best_model_from', type=str, help="Path to the best model artifact (.model), or to a pickled search object")
 @click.option('--plot_to', type=str, help="Path to directory where the plot will be written to")
 @click.option('--tbl_to', type=str, help="Path to directory where the tables will be written to")
 @click.option('--seed', type=int, help="Random seed", default=111)
+@click.option('--n-bootstrap', type=int, help="Number of bootstrap resamples of the test set for the confidence intervals", default=2000)
+@click.option('--chunksize', type=int, default=None,
+              help="Evaluate a .csv or .parquet test set this many rows at a time, merging the confusion counts of the chunks, instead of loading it whole")
+@click.option('--n-jobs', type=int, help="Number of worker processes evaluating the chunks with --chunksize, -1 for all cores", default=1)
 
 
-def main(test_data, best_model_from, plot_to, tbl_to, seed):
+def main(test_data, best_model_from, plot_to, tbl_to, seed, n_bootstrap, chunksize, n_jobs):
     np.random.seed(seed)
-    
-    # Reading the test data
-    test_df = pd.read_csv(test_data)
-    X_test = test_df.drop(columns=["RiskLevel"])
-    y_test = test_df["RiskLevel"]
 
-    # NEED TO LOAD IN THE BEST MODEL
-    with open(best_model_from, 'rb') as f:
-        random_search = pickle.load(f)
-    
-    # Scoring with the best model
-    test_score = {'test_score': [random_search.score(X_test, y_test)]}
+    # Load the best model, from a slim artifact or a pickled search object
+    best_model = load_model(best_model_from)
+
+    if chunksize:
+        # Only the confusion counts of each chunk are kept, every metric is derived from their sum
+        cm = evaluate_chunks(read_input_chunks(test_data, chunksize), best_model_from, best_model.classes_, n_jobs=n_jobs)
+        test_metrics = evaluate_confusion(cm, best_model.classes_, n_resamples=n_bootstrap, seed=seed)
+        feature_names, class_names = best_model.feature_names_in_, best_model.classes_
+    else:
+        # Reading the test data
+        test_df = read_maternal_data(test_data)
+        X_test = test_df.drop(columns=["RiskLevel"])
+        y_test = test_df["RiskLevel"]
+
+        # Predict once, every metric and its bootstrap confidence interval is derived from the confusion matrix
+        cm, test_metrics = evaluate_predictions(
+            y_test, best_model.predict(X_test), best_model.classes_, n_resamples=n_bootstrap, seed=seed
+        )
+        feature_names, class_names = X_test.columns, best_model.classes_
+    test_metrics.to_csv(os.path.join(tbl_to, "test_metrics.csv"), index=False)
+
+    test_score = {'test_score': [test_metrics.loc[test_metrics['metric'] == 'accuracy', 'estimate'].iloc[0]]}
     test_score = pd.DataFrame(test_score)
     test_score.to_csv(os.path.join(tbl_to, "test_score.csv"), index=False)
 
     # Decision Tree plot 
     plt.figure(figsize=(15, 5))
     plot_tree(
-        random_search.best_estimator_,
-        feature_names=X_test.columns,
-        class_names=y_test.unique(),
+        best_model,
+        feature_names=feature_names,
+        class_names=class_names,
         filled=True,
         max_depth=3  # Adjust the depth for better readability
     )
     plt.savefig(os.path.join(plot_to, "decision_tree.png"))
 
-    confmat_dt = ConfusionMatrixDisplay.from_predictions(
-        y_test,
-        random_search.predict(X_test),
-        display_labels=random_search.best_estimator_.classes_
-    )
+    confmat_dt = ConfusionMatrixDisplay(
+        confusion_matrix=cm,
+        display_labels=best_model.classes_
+    ).plot()
     plt.title('Confusion Matrix for Decision Tree')
     plt.savefig(os.path.join(plot_to, "confusion_matrix.png"))
 
-    cm = confusion_matrix(y_test, random_search.predict(X_test))
     pd.DataFrame(cm).to_csv(os.path.join(tbl_to, "confusion_matrix.csv"), index=False)
     
 
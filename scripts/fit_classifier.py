@@ -7,6 +7,8 @@ import os
 import sys
 import numpy as np
 import click
+import time
+import tempfile
 import pickle
 import matplotlib.pyplot as plt
 from sklearn.model_selection import train_test_split, RandomizedSearchCV, cross_validate
@@ -15,26 +17,70 @@ from sklearn.pipeline import make_pipeline
 from scipy.stats import loguniform, uniform, randint
 from sklearn.dummy import DummyClassifier
 from sklearn.naive_bayes import GaussianNB
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.svm import SVC
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.tree import plot_tree
 from deepchecks.tabular import Dataset
 from deepchecks.tabular.checks.data_integrity import FeatureFeatureCorrelation
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.cross_validation import mean_std_cross_val_scores
+from src.cross_validation import cross_validate_models, format_cv_scores, race_models
+from src.load_data import read_maternal_data, read_maternal_csv, memmap_training_data
+from src.data_validation import RISK_LEVELS
+from src.streaming import streaming_cross_validate
+from src.model_artifact import save_model
+from src.hyperparameter_search import tune, search_fits, SEARCH_METHODS
+
+def fit_streaming(training_data, best_model_to, tbl_to, seed, chunksize, epochs):
+    """Cross validates the models that support partial_fit over chunks of the training CSV, writes the
+    summary table in the usual format and saves each model trained on all the rows."""
+    models = {
+        "Gaussian Bayes": GaussianNB(),
+        "Logistic Regression (SGD)": SGDClassifier(loss="log_loss", random_state=123),
+    }
+    start = time.perf_counter()
+    cv_scores, final_models = streaming_cross_validate(
+        lambda: read_maternal_csv(training_data, chunksize=chunksize), models,
+        classes=sorted(RISK_LEVELS), n_splits=10, epochs=epochs, seed=seed
+    )
+    print(f"Streaming cross validation wall-clock: {time.perf_counter() - start:.2f}s")
+
+    results_df = pd.DataFrame({model_name: format_cv_scores(scores) for model_name, scores in cv_scores.items()}).T
+    results_df.to_csv(os.path.join(tbl_to, "summary_cv_scores.csv"), index=True)
+
+    with open(os.path.join(best_model_to, "streaming_models.pickle"), 'wb') as f:
+        pickle.dump(final_models, f)
 
 @click.command()
-@click.option('--training-data', type=str, help="Path to training data")
+@click.option('--training-data', type=str, help="Path to training data (.csv, .feather or .parquet)")
 @click.option('--best_model_to', type=str, help="Path to directory where the best model object will be written to")
 @click.option('--tbl_to', type=str, help="Path to directory where the tables will be written to")
 @click.option('--seed', type=int, help="Random seed", default=111)
+@click.option('--n-jobs', type=int, help="Number of worker processes for the model comparison, -1 for all cores", default=-1)
+@click.option('--cache-dir', type=str, help="Directory where cross validation results are cached between runs", default=None)
+@click.option('--search-method', type=click.Choice(SEARCH_METHODS), default='random',
+              help="'grid' tries each distinct decision tree configuration once, 'halving' also drops weak ones on subsamples first")
+@click.option('--journal', type=str, default=None,
+              help="Journal of completed search fits; a killed search rerun with the same journal resumes where it stopped (random and grid searches)")
+@click.option('--share-data/--no-share-data', default=False,
+              help="Memory-map the training data once so that all worker processes read the same copy; off by default, as benchmarks/shared_memory.py showed no saving on this data")
+@click.option('--racing', is_flag=True,
+              help="Evaluate the models fold by fold and stop fitting the ones whose scores are clearly behind the leader")
+@click.option('--streaming', is_flag=True,
+              help="Cross validate the partial_fit models chunk by chunk without loading the training CSV, instead of the full comparison and search")
+@click.option('--chunksize', type=int, help="Number of rows read at a time with --streaming", default=100_000)
+@click.option('--epochs', type=int, help="Number of passes over the training data with --streaming", default=5)
 
-def main(training_data, best_model_to, tbl_to, seed):
+def main(training_data, best_model_to, tbl_to, seed, n_jobs, cache_dir, search_method, journal, share_data, racing,
+         streaming, chunksize, epochs):
     np.random.seed(seed)
+
+    if streaming:
+        fit_streaming(training_data, best_model_to, tbl_to, seed, chunksize, epochs)
+        return
     
     # Read in training data and split into X and y
-    train_df = pd.read_csv(training_data)
+    train_df = read_maternal_data(training_data)
     X_train = train_df.drop(columns=["RiskLevel"])
     y_train = train_df["RiskLevel"]
     
@@ -42,6 +88,12 @@ def main(training_data, best_model_to, tbl_to, seed):
     maternal_train_ds = Dataset(train_df, label="RiskLevel", cat_features=[])
     check_feat_corr = FeatureFeatureCorrelation()
     check_feat_corr_result = check_feat_corr.run(maternal_train_ds)
+
+    if share_data:
+        # Workers get a reference to the mapped file instead of a pickled copy of the data
+        shared_dir = tempfile.TemporaryDirectory()
+        X_train, y_train = memmap_training_data(X_train, y_train, shared_dir.name)
+        del train_df, maternal_train_ds
     
     # DummyClassifier, Gaussian Bayes, Decision Tree, Logistic Regression, SVC
     models = {
@@ -52,16 +104,46 @@ def main(training_data, best_model_to, tbl_to, seed):
         "Logistic Regression": LogisticRegression(max_iter=2000, random_state=123),
     }
     
-    results_df = None
-    results_dict = {}
-    for model_name, model in models.items():
-        clf_pipe = make_pipeline(StandardScaler(), model)
-        results_dict[model_name] = mean_std_cross_val_scores(
-            clf_pipe, X_train, y_train, cv=10, return_train_score=True, error_score='raise'
+    # Cross validate every model on the same 10 folds, running the fits in parallel
+    start = time.perf_counter()
+    pipes = {model_name: make_pipeline(StandardScaler(), model) for model_name, model in models.items()}
+    if racing:
+        # Models clearly behind the leader are dropped after as few as 3 folds
+        cv_scores, eliminated, cached = race_models(
+            pipes, X_train, y_train, cv=10, n_jobs=n_jobs, cache_dir=cache_dir, return_cached=True,
+            return_train_score=True, error_score='raise'
+        )
+    else:
+        cv_scores, cached = cross_validate_models(
+            pipes, X_train, y_train, cv=10, n_jobs=n_jobs, cache_dir=cache_dir, return_cached=True,
+            return_train_score=True, error_score='raise'
         )
+    if cache_dir is not None:
+        print(f"Loaded {len(cached)} of {len(pipes)} models from the cross validation cache")
+    wall_time = time.perf_counter() - start
+
+    results_dict = {model_name: format_cv_scores(scores) for model_name, scores in cv_scores.items()}
     results_df = pd.DataFrame(results_dict).T
+    if racing:
+        results_df["racing"] = [
+            f"eliminated after {eliminated[model_name]} folds" if model_name in eliminated else "all 10 folds"
+            for model_name in results_df.index
+        ]
     results_df.to_csv(os.path.join(tbl_to, "summary_cv_scores.csv"), index=True)
 
+    # The times of cached models are those of the run that cached them, so they are left out of the total
+    fit_times = pd.DataFrame({
+        model_name: {"fits": len(scores["fit_time"]), "total_fit_s": scores["fit_time"].sum(),
+                     "mean_fit_s": scores["fit_time"].mean(), "total_score_s": scores["score_time"].sum(),
+                     "cached": model_name in cached}
+        for model_name, scores in cv_scores.items()
+    }).T.astype({"fits": int, "total_fit_s": float, "mean_fit_s": float, "total_score_s": float, "cached": bool})
+    print(fit_times.round(4).to_string())
+    fitted = fit_times[~fit_times["cached"]]
+    print(f"Cross validation wall-clock: {wall_time:.2f}s for "
+          f"{fitted['total_fit_s'].sum() + fitted['total_score_s'].sum():.2f}s of fitting and scoring "
+          f"{len(fitted)} models (n_jobs={n_jobs})")
+
     dt = DecisionTreeClassifier(random_state=123)
     
     param_dist = {
@@ -69,11 +151,23 @@ def main(training_data, best_model_to, tbl_to, seed):
         'max_depth': randint(3, 20),                
     }
     
-    random_search = RandomizedSearchCV(dt, param_dist, n_iter=100, n_jobs=-1, return_train_score = True, random_state=123)
-    random_search.fit(X_train, y_train)
+    random_search = tune(dt, param_dist, X_train, y_train, method=search_method, n_iter=100,
+                         n_jobs=-1, return_train_score=True, random_state=123, journal_path=journal)
+    # The random search runs n_iter configurations on every fold
+    baseline_fits = 100 * random_search.n_splits_
+    n_fits = search_fits(random_search)
+    print(f"{search_method} search best params: {random_search.best_params_}, "
+          f"{n_fits} fits ({baseline_fits - n_fits} saved compared to the random search)")
+
+    # Save only the refitted best tree, with the search results in their own table
+    save_model(random_search.best_estimator_, os.path.join(best_model_to, "dt_tuned_fit.model"), metadata={
+        "search_method": search_method, "best_params": random_search.best_params_,
+        "best_score": random_search.best_score_, "n_fits": n_fits
+    })
+    pd.DataFrame(random_search.cv_results_).to_csv(os.path.join(tbl_to, "dt_search_results.csv"), index=False)
 
-    with open(os.path.join(best_model_to, "dt_tuned_fit.pickle"), 'wb') as f:
-        pickle.dump(random_search, f)
+    if share_data:
+        shared_dir.cleanup()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
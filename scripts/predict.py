@@ -0,0 +1,29 @@
+# predict.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import click
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.prediction import predict_file
+
+@click.command()
+@click.option('--input', 'input_path', type=str, help="Path to the unlabeled data to score (.csv or .parquet)")
+@click.option('--model', type=str, help="Path to the model artifact", default="results/models/dt_tuned_fit.model")
+@click.option('--output', type=str, help="Path where the rows and their predictions are written (.csv, .feather or .parquet)")
+@click.option('--chunksize', type=int, help="Number of rows read, validated and predicted at a time", default=100_000)
+@click.option('--n-jobs', type=int, help="Number of worker processes, -1 for all cores", default=-1)
+@click.option('--validation-engine', type=click.Choice(['pandera', 'numpy']), help="Engine used to validate each chunk", default='numpy')
+@click.option('--max-pending', type=int, help="Maximum number of chunks in flight, twice the number of workers by default", default=None)
+
+def main(input_path, model, output, chunksize, n_jobs, validation_engine, max_pending):
+    """Predicts the risk level of every row of an unlabeled file, streaming it through the saved model
+    in parallel chunks and writing the predictions in input order."""
+    stats = predict_file(input_path, model, output, chunksize=chunksize, n_jobs=n_jobs,
+                         engine=validation_engine, max_pending=max_pending)
+    print(f"Predicted {stats['rows']} rows in {stats['chunks']} chunks in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+# serve.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import click
+import os
+import sys
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model_artifact import load_model
+from src.serving import ScoringService
+
+@click.command()
+@click.option('--model', type=str, help="Path to the model artifact", default="results/models/dt_tuned_fit.model")
+@click.option('--host', type=str, help="Address to listen on", default="127.0.0.1")
+@click.option('--port', type=int, help="Port to listen on", default=8000)
+@click.option('--max-batch-size', type=int, help="Number of records after which a batch is predicted without waiting", default=64)
+@click.option('--max-wait-ms', type=float, help="Longest time a request waits for others to share its batch", default=2.0)
+
+def main(model, host, port, max_batch_size, max_wait_ms):
+    """Serves the predictions of the tuned model over HTTP: POST records to /predict,
+    GET /metrics for latency and throughput."""
+    service = ScoringService(load_model(model), max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    print(f"Serving {model} on http://{host}:{port} (max batch size {max_batch_size}, max wait {max_wait_ms} ms)", flush=True)
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
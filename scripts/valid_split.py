@@ -9,57 +9,129 @@ import numpy as np
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.data_validation import data_validation
+from src.data_validation import COLUMNS, data_validation, data_validation_chunked, data_validation_incremental
+from src.load_data import read_maternal_csv, write_maternal_data, append_maternal_data, to_compact
+from src.hash_split import hash_split_csv
+from src.scaling import fit_scaler, save_scaler, scale_chunks, write_scaled
 from deepchecks.tabular import Dataset
 from deepchecks.tabular.checks.data_integrity import FeatureFeatureCorrelation
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.compose import make_column_transformer
+
+def save_outputs(df, name, data_dest, output_format):
+    """Saves a split dataset in each of the requested formats, with the compact dtypes in the columnar copies."""
+    for fmt in output_format:
+        if fmt == 'csv':
+            df.to_csv(os.path.join(data_dest, f"{name}.csv"), index=False)
+        else:
+            write_maternal_data(to_compact(df), os.path.join(data_dest, f"{name}.{fmt}"))
+
+def check_feature_correlation(train_df):
+    """Runs the deepchecks feature-feature correlation check on the training data."""
+    maternal_train_ds = Dataset(train_df, label="RiskLevel", cat_features=[])
+    return FeatureFeatureCorrelation().run(maternal_train_ds)
 
 @click.command()
 @click.option('--raw-data', type=str, help="The path to raw data")
 @click.option('--data-dest', type=str, help="The destination path where the data will be saved")
 @click.option('--seed', type=int, help="Random seed", default=111)
+@click.option('--validation-engine', type=click.Choice(['pandera', 'numpy']), help="Engine used to validate the raw data", default='pandera')
+@click.option('--chunksize', type=int, default=None,
+              help="Validate the raw data in chunks of this many rows instead of all at once; "
+                   "the random split still loads the data whole, --split-method hash also splits and writes it in chunks")
+@click.option('--incremental', is_flag=True, help="Only validate rows appended since the last run, using a watermark stored next to the raw data")
+@click.option('--output-format', type=click.Choice(['csv', 'feather', 'parquet']), multiple=True, default=['csv'],
+              help="Format of the processed data (can be repeated); the report needs csv, feather can be memory-mapped without a copy")
+@click.option('--split-method', type=click.Choice(['random', 'hash']), default='random',
+              help="'hash' streams the raw data into train/test by a stable hash of each row, so old rows keep their split as the file grows")
+@click.option('--stratify', is_flag=True, help="With --split-method hash, hash each RiskLevel into its own buckets, so every class is split at the 0.2 rate in expectation")
+@click.option('--exact-class-counts', is_flag=True,
+              help="With --stratify, put exactly round(0.2 * n) rows of each RiskLevel in the test set; reads the raw data twice, "
+                   "and is not stable: rows near the cutoff can change side as the file grows")
 
-def main(raw_data, data_dest, seed):
+def main(raw_data, data_dest, seed, validation_engine, chunksize, incremental, output_format, split_method, stratify,
+         exact_class_counts):
     """This script validates the data, splits the data into a train and test set, and lastly processes the data with Standard Scaler. 
     It saves the split data (a train and test set), and the standard scaler processor object."""
     np.random.seed(seed)
     
-    # Read in data
-    df = pd.read_csv(raw_data)
-    
-    #Drop two rows with out of range data
-    df = df[df['HeartRate'] != 7]
+    if incremental:
+        data_validation_incremental(
+            raw_data, chunksize=chunksize or 100_000, engine=validation_engine,
+            row_filter=lambda chunk: chunk[chunk['HeartRate'] != 7]
+        )
+    elif chunksize or split_method == 'hash':
+        # Stream the raw data through validation, dropping the out of range rows from each chunk
+        chunks = pd.read_csv(raw_data, chunksize=chunksize or 100_000)
+        data_validation_chunked((chunk[chunk['HeartRate'] != 7] for chunk in chunks), engine=validation_engine)
 
-    # Run validation tests on our dataframe
-    data_validation(df)
-    
-    # Split data into train and test sets and save
-    train_df, test_df = train_test_split(df, test_size=0.2, random_state=seed)
+    if split_method == 'hash':
+        # Stream the raw data straight into the train and test CSVs, without loading it whole
+        counts = hash_split_csv(
+            raw_data, os.path.join(data_dest, "train_df.csv"), os.path.join(data_dest, "test_df.csv"),
+            chunksize=chunksize or 100_000, test_size=0.2, seed=seed,
+            stratify='RiskLevel' if stratify else None, exact=exact_class_counts,
+            row_filter=lambda chunk: chunk[chunk['HeartRate'] != 7]
+        )
+        print(f"Hash split: {counts}")
+        n_rows = {"train_df": counts["train"], "test_df": counts["test"]}
+        split_formats = [fmt for fmt in output_format if fmt != 'csv']
+        # Re-read the split CSVs in chunks, so that the full data is never held in memory
+        read_chunks = lambda name: read_maternal_csv(os.path.join(data_dest, f"{name}.csv"), compact=False,
+                                                     chunksize=chunksize or 100_000)
+        for name in ("train_df", "test_df") if split_formats else ():
+            writers = {}
+            try:
+                for chunk in read_chunks(name):
+                    chunk = to_compact(chunk)
+                    for fmt in split_formats:
+                        append_maternal_data(writers, os.path.join(data_dest, f"{name}.{fmt}"), chunk)
+            finally:
+                for writer in writers.values():
+                    if writer is not None:
+                        writer.close()
 
-    train_df.to_csv(os.path.join(data_dest, "train_df.csv"), index=False)
-    test_df.to_csv(os.path.join(data_dest, "test_df.csv"), index=False)
+        # Check the correlations on a uniform sample of at most one chunk of the training rows
+        sample_fraction = min(1.0, (chunksize or 100_000) / max(n_rows["train_df"], 1))
+        check_feature_correlation(pd.concat(
+            chunk.sample(frac=sample_fraction, random_state=seed) for chunk in read_chunks("train_df")
+        ))
+    else:
+        # train_test_split needs every row, so only the validation above is bounded by --chunksize.
+        # Read in data, with the default dtypes as the raw data is not validated yet
+        df = read_maternal_csv(raw_data, compact=False)
 
-    # Data Validation for Checking Correlation
-    maternal_train_ds = Dataset(train_df, label="RiskLevel", cat_features=[])
+        #Drop two rows with out of range data
+        df = df[df['HeartRate'] != 7]
 
-    check_feat_corr = FeatureFeatureCorrelation()
-    check_feat_corr_result = check_feat_corr.run(maternal_train_ds)
-    check_feat_corr_result
+        # Run validation tests on our dataframe
+        if not (chunksize or incremental):
+            data_validation(df, engine=validation_engine)
 
-    # Scaled train and test data with Standard Scaler, and save
-    numeric_features =  train_df.columns[:-1].to_list()
-    passthrough = ['RiskLevel']
-    preprocessor = make_column_transformer((StandardScaler(), numeric_features),
-                                         ("passthrough", passthrough))
-    
-    preprocessor.fit(train_df)
-    scaled_train_df = pd.DataFrame(preprocessor.transform(train_df))
-    scaled_test_df = pd.DataFrame(preprocessor.transform(test_df))
+        # Split data into train and test sets and save
+        train_df, test_df = train_test_split(df, test_size=0.2, random_state=seed)
+        save_outputs(train_df, "train_df", data_dest, output_format)
+        save_outputs(test_df, "test_df", data_dest, output_format)
+
+        # Data Validation for Checking Correlation
+        check_feature_correlation(train_df)
+
+        split = {"train_df": train_df, "test_df": test_df}
+        n_rows = {name: len(df) for name, df in split.items()}
+        step = chunksize or 100_000
+        read_chunks = lambda name: (split[name].iloc[start:start + step] for start in range(0, n_rows[name], step))
+
+    # Fit the Standard Scaler chunk by chunk on the train set and save it for reuse
+    numeric_features = [name for name in COLUMNS if name != 'RiskLevel']
+    scaler = fit_scaler(read_chunks("train_df"), numeric_features)
+    save_scaler(scaler, os.path.join(data_dest, "scaler.pickle"))
 
-    scaled_train_df.to_csv(os.path.join(data_dest, "scaled_train_df.csv"), index=False)
-    scaled_test_df.to_csv(os.path.join(data_dest, "scaled_test_df.csv"), index=False)
+    # Scale train and test data into float32 memory-mapped .npy files, plus any other requested formats
+    for name in ("train_df", "test_df"):
+        write_scaled(
+            scale_chunks(scaler, read_chunks(name)), n_rows[name],
+            os.path.join(data_dest, f"scaled_{name}.npy"),
+            [os.path.join(data_dest, f"scaled_{name}.{fmt}") for fmt in output_format]
+        )
 
 if __name__ == '__main__':
     main() 
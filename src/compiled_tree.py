@@ -0,0 +1,144 @@
+# compiled_tree.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+
+# Rows routed down the tree together, small enough for the per-level arrays to stay in cache
+BLOCK_SIZE = 65_536
+
+
+class CompiledTree(NamedTuple):
+    """A fitted decision tree flattened into one array per node attribute."""
+    feature: np.ndarray
+    threshold: np.ndarray
+    children: np.ndarray
+    leaf_class: np.ndarray
+    classes: np.ndarray
+    feature_names: tuple
+    max_depth: int
+    n_features: int
+
+
+def compile_tree(estimator):
+    """
+    Flattens a fitted DecisionTreeClassifier into a CompiledTree
+
+    Each node `i` is described by the i-th entry of the arrays: the feature
+    and threshold of its split, its children (`children[i, 1]` for values at
+    or below the threshold, `children[i, 0]` for the others) and the index in
+    `classes` of the class it predicts. The children of a leaf point back to
+    the leaf, so a batch can step down the tree `max_depth` times without
+    tracking which rows have already reached a leaf. Thresholds are rounded
+    down to the nearest float32, which keeps every comparison with a float32
+    value the same as in scikit-learn.
+
+    Parameters
+    ----------
+    estimator : DecisionTreeClassifier
+        fitted single-output decision tree, e.g. the one loaded from dt_tuned_fit.model
+
+    Returns
+    ----------
+        CompiledTree
+    """
+    tree = estimator.tree_
+    if tree.n_outputs != 1:
+        raise ValueError("Only single-output trees can be compiled")
+    nodes = np.arange(tree.node_count, dtype=np.int32)
+    is_leaf = tree.children_left == -1
+    threshold = np.where(is_leaf, np.inf, tree.threshold)
+    threshold32 = threshold.astype(np.float32)
+    threshold32 = np.where(threshold32 > threshold, np.nextafter(threshold32, np.float32(-np.inf)), threshold32)
+    feature_names = getattr(estimator, "feature_names_in_", None)
+    return CompiledTree(
+        feature=np.where(is_leaf, 0, tree.feature).astype(np.int32),
+        threshold=threshold32,
+        children=np.column_stack([np.where(is_leaf, nodes, tree.children_right),
+                                  np.where(is_leaf, nodes, tree.children_left)]).astype(np.int32),
+        # Same tie-breaking as predict: the first class with the largest weight
+        leaf_class=np.argmax(tree.value[:, 0, :], axis=1).astype(np.int16),
+        classes=estimator.classes_,
+        feature_names=tuple(feature_names) if feature_names is not None else None,
+        max_depth=int(tree.max_depth),
+        n_features=int(estimator.n_features_in_),
+    )
+
+
+def _as_array(compiled, X):
+    """Returns `X` as a 2D float32 array with the columns in the order the tree was fitted on."""
+    if isinstance(X, dict):
+        if compiled.feature_names is None:
+            raise ValueError("Records can only be given as dicts to a tree fitted with feature names")
+        missing = [name for name in compiled.feature_names if name not in X]
+        if missing:
+            raise ValueError(f"The record is missing the features {missing}")
+        X = [X[name] for name in compiled.feature_names]
+    elif isinstance(X, pd.DataFrame):
+        X = X[list(compiled.feature_names)] if compiled.feature_names is not None else X
+        X = X.to_numpy()
+    # The splits were learned on float32 values, as in DecisionTreeClassifier.predict
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    # The rows are read from a raveled block, so a wrong width would silently shift values between rows
+    if X.ndim != 2 or X.shape[1] != compiled.n_features:
+        raise ValueError(f"X has {X.shape[-1]} features, but the tree was fitted with {compiled.n_features} features")
+    if np.isnan(X).any():
+        raise ValueError("Input contains NaN")
+    return X
+
+
+def apply_compiled(compiled, X):
+    """
+    Returns the index of the leaf each row of `X` ends in
+
+    Parameters
+    ----------
+    compiled : CompiledTree
+        tree returned by `compile_tree`
+    X : pandas DataFrame, numpy array or dict
+        rows to route, or a single record given as a 1D array or a dict of feature values
+
+    Returns
+    ----------
+        numpy array of node indices
+    """
+    X = _as_array(compiled, X)
+    n_features = X.shape[1]
+    children = compiled.children.ravel()
+    leaves = np.empty(len(X), dtype=np.int32)
+    for start in range(0, len(X), BLOCK_SIZE):
+        block = X[start:start + BLOCK_SIZE].ravel()
+        row_starts = np.arange(0, len(block), n_features, dtype=np.int32)
+        node = np.zeros(len(row_starts), dtype=np.int32)
+        for _ in range(compiled.max_depth):
+            goes_left = block[row_starts + compiled.feature[node]] <= compiled.threshold[node]
+            node = children[2 * node + goes_left]
+        leaves[start:start + BLOCK_SIZE] = node
+    return leaves
+
+
+def predict_compiled(compiled, X):
+    """
+    Predicts the class of each row of `X` with a compiled tree
+
+    Gives the same predictions as the `predict` method of the tree it was
+    compiled from, without its per-call input validation, so it is much
+    faster on single records and small batches.
+
+    Parameters
+    ----------
+    compiled : CompiledTree
+        tree returned by `compile_tree`
+    X : pandas DataFrame, numpy array or dict
+        rows to predict, or a single record given as a 1D array or a dict of feature values
+
+    Returns
+    ----------
+        numpy array of class labels
+    """
+    return compiled.classes[compiled.leaf_class[apply_compiled(compiled, X)]]
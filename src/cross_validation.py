@@ -1,9 +1,75 @@
+import os
+import json
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import cross_validate
+import joblib
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.base import clone, is_classifier
+from sklearn.model_selection import cross_validate, check_cv
+from scipy.stats import t
+
+# Default size above which the oldest cross validation results are evicted from a cache directory
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# cross_validate arguments that only change how the fits are run, not their scores
+_EXECUTION_KWARGS = ("n_jobs", "verbose", "pre_dispatch")
+
+
+def _cache_key(model, X_train, y_train, cv, folds, kwargs):
+    """
+    Returns a key identifying the cross validation of `model` on the data, or None if it cannot be cached
+
+    The key hashes the data, the class and parameters of the model, the fold
+    indices and every other argument that changes the scores.
+    """
+    if getattr(cv, "shuffle", False) and getattr(cv, "random_state", None) is None:
+        # The folds are different on every call
+        return None
+    unfitted = clone(model)
+    return joblib.hash({
+        "X": X_train,
+        "y": y_train,
+        "model": f"{type(unfitted).__module__}.{type(unfitted).__qualname__}",
+        "params": unfitted.get_params(deep=True),
+        "folds": folds,
+        "kwargs": {key: value for key, value in kwargs.items() if key not in _EXECUTION_KWARGS + ("cv",)},
+        "sklearn": sklearn.__version__,
+    })
+
+
+def _cache_load(cache_dir, key):
+    """Returns the per-fold scores stored under `key`, or None on a miss."""
+    path = os.path.join(cache_dir, f"{key}.json")
+    try:
+        with open(path) as f:
+            scores = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Mark the entry as recently used so that it is evicted last
+    os.utime(path)
+    return {name: np.array(values) for name, values in scores.items()}
+
+
+def _cache_store(cache_dir, key, scores, max_bytes):
+    """Stores per-fold scores under `key`, then evicts the least recently used entries above `max_bytes`."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.json")
+    with open(path + ".part", "w") as f:
+        json.dump({name: np.asarray(values).tolist() for name, values in scores.items()}, f)
+    os.replace(path + ".part", path)
+
+    entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".json")]
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    total = 0
+    for entry in entries:
+        total += entry.stat().st_size
+        if total > max_bytes and entry.path != path:
+            os.remove(entry.path)
+
 
 # The function below is adopted from DSCI571 Supervides Learning I Lecture 4 notes
-def mean_std_cross_val_scores(model, X_train, y_train, **kwargs):
+def mean_std_cross_val_scores(model, X_train, y_train, cache_dir=None, cache_max_bytes=CACHE_MAX_BYTES, **kwargs):
     """
     Returns mean and std of cross validation
 
@@ -15,14 +81,43 @@ def mean_std_cross_val_scores(model, X_train, y_train, **kwargs):
         X in the training data
     y_train :
         y in the training data
+    cache_dir : str, optional
+        directory where the per-fold scores are cached; the same model, data, folds
+        and scoring are then loaded from it instead of being fitted again
+    cache_max_bytes : int, optional
+        size above which the least recently used results are evicted from `cache_dir`
 
     Returns
     ----------
         pandas Series with mean scores from cross_validation
     """
 
-    scores = cross_validate(model, X_train, y_train, **kwargs)
+    if cache_dir is None:
+        return format_cv_scores(cross_validate(model, X_train, y_train, **kwargs))
+
+    cv = check_cv(kwargs.get("cv"), y_train, classifier=is_classifier(model))
+    key = _cache_key(model, X_train, y_train, cv, list(cv.split(X_train, y_train, kwargs.get("groups"))), kwargs)
+    scores = _cache_load(cache_dir, key) if key else None
+    if scores is None:
+        scores = cross_validate(model, X_train, y_train, **kwargs)
+        if key:
+            _cache_store(cache_dir, key, scores, cache_max_bytes)
+    return format_cv_scores(scores)
+
+
+def format_cv_scores(scores):
+    """
+    Formats the output of cross_validate as "mean (+/- std)" strings
+
+    Parameters
+    ----------
+    scores : dict
+        per-fold arrays keyed by score name, as returned by cross_validate
 
+    Returns
+    ----------
+        pandas Series with mean scores from cross_validation
+    """
     mean_scores = pd.DataFrame(scores).mean()
     std_scores = pd.DataFrame(scores).std()
     out_col = []
@@ -30,4 +125,165 @@ def mean_std_cross_val_scores(model, X_train, y_train, **kwargs):
     for i in range(len(mean_scores)):
         out_col.append((f"%0.3f (+/- %0.3f)" % (mean_scores.iloc[i], std_scores.iloc[i])))
 
-    return pd.Series(data=out_col, index=mean_scores.index)
\ No newline at end of file
+    return pd.Series(data=out_col, index=mean_scores.index)
+
+
+def _cross_validate_fold(model, X_train, y_train, train, test, **kwargs):
+    """Runs cross_validate on a single precomputed fold."""
+    return cross_validate(model, X_train, y_train, cv=[(train, test)], **kwargs)
+
+
+def cross_validate_models(models, X_train, y_train, cv=5, n_jobs=None, cache_dir=None,
+                          cache_max_bytes=CACHE_MAX_BYTES, return_cached=False, **kwargs):
+    """
+    Cross validates several models on the same folds, running every (model, fold) fit in parallel
+
+    The folds are computed once, the way cross_validate would for these models,
+    and all model x fold fits are scheduled as one set of jobs over a process
+    pool. Each fit is scored by cross_validate itself, so the scores are the
+    same as cross validating each model on its own.
+
+    Parameters
+    ----------
+    models : dict
+        scikit-learn models keyed by name
+    X_train : numpy array or pandas DataFrame
+        X in the training data
+    y_train :
+        y in the training data
+    cv : int or cross-validation generator, optional
+        as in cross_validate
+    n_jobs : int, optional
+        number of worker processes, -1 for all cores
+    cache_dir : str, optional
+        directory where the per-fold scores are cached, only the models whose
+        cached results are missing or out of date are fitted
+    cache_max_bytes : int, optional
+        size above which the least recently used results are evicted from `cache_dir`
+    return_cached : bool, optional
+        whether to also return the names of the models loaded from `cache_dir`,
+        whose fit and score times are those of the run that cached them
+    **kwargs :
+        passed on to cross_validate, e.g. scoring or return_train_score
+
+    Returns
+    ----------
+        dict of per-fold score arrays for each model, in the format of cross_validate,
+        and with `return_cached` the list of the models loaded from the cache
+    """
+    classifier = all(is_classifier(model) for model in models.values())
+    cv = check_cv(cv, y_train, classifier=classifier)
+    folds = list(cv.split(X_train, y_train, kwargs.get("groups")))
+
+    cached, keys = {}, {}
+    if cache_dir is not None:
+        for name, model in models.items():
+            keys[name] = _cache_key(model, X_train, y_train, cv, folds, kwargs)
+            scores = _cache_load(cache_dir, keys[name]) if keys[name] else None
+            if scores is not None:
+                cached[name] = scores
+
+    jobs = [(name, train, test) for name in models if name not in cached for train, test in folds]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_cross_validate_fold)(clone(models[name]), X_train, y_train, train, test, **kwargs)
+        for name, train, test in jobs
+    )
+
+    fitted = {name: {} for name in models if name not in cached}
+    for (name, _, _), result in zip(jobs, results):
+        for key, value in result.items():
+            fitted[name].setdefault(key, []).append(value[0])
+
+    scores = {}
+    for name in models:
+        if name in cached:
+            scores[name] = cached[name]
+            continue
+        scores[name] = {key: np.array(values) for key, values in fitted[name].items()}
+        if keys.get(name):
+            _cache_store(cache_dir, keys[name], scores[name], cache_max_bytes)
+    if return_cached:
+        return scores, list(cached)
+    return scores
+
+
+def race_models(models, X_train, y_train, cv=5, n_jobs=None, confidence=0.95, min_folds=3, cache_dir=None,
+                cache_max_bytes=CACHE_MAX_BYTES, return_cached=False, **kwargs):
+    """
+    Cross validates several models fold by fold, dropping the ones that are clearly behind
+
+    After each fold, a t confidence interval is computed for the mean test score
+    of every remaining model. Once `min_folds` folds are done, a model whose
+    upper bound falls below the lower bound of the current leader is eliminated
+    and not fitted on the remaining folds. The folds are the same for every
+    model, as in `cross_validate_models`, which caches each fold separately.
+    Only the remaining models are fitted in a round, one fold each, so at most
+    that many fits run in parallel.
+
+    Parameters
+    ----------
+    models : dict
+        scikit-learn models keyed by name
+    X_train : numpy array or pandas DataFrame
+        X in the training data
+    y_train :
+        y in the training data
+    cv : int or cross-validation generator, optional
+        as in cross_validate
+    n_jobs : int, optional
+        number of worker processes, -1 for all cores
+    confidence : float, optional
+        confidence level of the intervals
+    min_folds : int, optional
+        number of folds every model is evaluated on before any is eliminated
+    cache_dir : str, optional
+        directory where the result of each fold is cached between runs
+    cache_max_bytes : int, optional
+        size above which the least recently used results are evicted from `cache_dir`
+    return_cached : bool, optional
+        whether to also return the names of the models loaded from `cache_dir`
+        on any fold, whose fit and score times include those of an earlier run
+    **kwargs :
+        passed on to cross_validate; `scoring` must give a single test score
+
+    Returns
+    ----------
+        tuple of the per-fold score arrays of each model over the folds it
+        reached, in the format of cross_validate, a dict of the number of
+        folds after which each eliminated model was dropped and, with
+        `return_cached`, the list of the models loaded from the cache
+    """
+    classifier = all(is_classifier(model) for model in models.values())
+    folds = list(check_cv(cv, y_train, classifier=classifier).split(X_train, y_train, kwargs.get("groups")))
+
+    scores = {name: {} for name in models}
+    remaining = list(models)
+    eliminated = {}
+    cached = set()
+    for n_folds, fold in enumerate(folds, start=1):
+        results, fold_cached = cross_validate_models(
+            {name: models[name] for name in remaining}, X_train, y_train, cv=[fold], n_jobs=n_jobs,
+            cache_dir=cache_dir, cache_max_bytes=cache_max_bytes, return_cached=True, **kwargs
+        )
+        cached.update(fold_cached)
+        for name, result in results.items():
+            if "test_score" not in result:
+                raise ValueError("Racing needs a single scoring metric")
+            for key, values in result.items():
+                scores[name][key] = np.concatenate([scores[name].get(key, []), values])
+
+        if n_folds < min_folds or n_folds == len(folds):
+            continue
+        test_scores = {name: scores[name]["test_score"] for name in remaining}
+        margin = {name: t.ppf((1 + confidence) / 2, n_folds - 1) * values.std(ddof=1) / np.sqrt(n_folds)
+                  for name, values in test_scores.items()}
+        leader = max(remaining, key=lambda name: test_scores[name].mean())
+        leader_lower = test_scores[leader].mean() - margin[leader]
+        for name in list(remaining):
+            if test_scores[name].mean() + margin[name] < leader_lower:
+                remaining.remove(name)
+                eliminated[name] = n_folds
+
+    if return_cached:
+        return scores, eliminated, [name for name in models if name in cached]
+    return scores, eliminated
@@ -2,26 +2,249 @@
 # author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
 # date: 2024-12-13
 
+import io
+import os
+import json
+import hashlib
 import pandas as pd
 import pandera as pa
 import numpy as np
-import os
-from deepchecks.tabular import Dataset
-from deepchecks.tabular.checks.data_integrity import FeatureFeatureCorrelation
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.compose import make_column_transformer
+from pandera.errors import SchemaError, SchemaErrorReason
+from pandera.engines.pandas_engine import Engine
+from pandera.backends.pandas.error_formatters import reshape_failure_cases, scalar_failure_case
+
+# Allowed values of the target and the valid range of each feature
+RISK_LEVELS = ["high risk", "mid risk", "low risk"]
+FEATURE_RANGES = {
+    "Age": (int, 10, 70),
+    "SystolicBP": (int, 65, 185),
+    "DiastolicBP": (int, 40, 125),
+    "BS": (float, 3, 20),
+    "BodyTemp": (float, 94, 105),
+    "HeartRate": (int, 50, 110)
+}
+
+# Maximum fraction of missing values allowed in any column
+MAX_MISSING_FRACTION = 0.1
+
+# The schema is built once and shared by both validation engines
+COLUMNS = {
+    "RiskLevel": pa.Column(str, pa.Check.isin(RISK_LEVELS)),
+    **{
+        name: pa.Column(dtype, pa.Check.between(low, high))
+        for name, (dtype, low, high) in FEATURE_RANGES.items()
+    }
+}
+SCHEMA = pa.DataFrameSchema(
+    COLUMNS,
+    checks=[
+        pa.Check(lambda df: ~(df.isna().all(axis=1)).any(), error="Empty rows present."),
+        pa.Check(lambda df: (df.isna().sum() / len(df) < MAX_MISSING_FRACTION).all(), error="Some columns have more than 10% missing values.")
+    ]
+)
+# Row-level rules only, for data that is validated one chunk at a time
+COLUMN_SCHEMA = pa.DataFrameSchema(COLUMNS)
+# The rules on the features alone, for unlabeled data that is scored by the model
+FEATURE_SCHEMA = SCHEMA.remove_columns(["RiskLevel"])
+
+ENGINES = ("pandera", "numpy")
+
+
+def upcast_float_features(chunk):
+    """Returns `chunk` with the float features that were parsed as integers converted to float."""
+    # A CSV chunk that only holds whole numbers in a float column is parsed as
+    # integers, which the whole file would not be
+    upcast = {
+        name: float for name, (dtype, _, _) in FEATURE_RANGES.items()
+        if dtype is float and name in chunk and pd.api.types.is_integer_dtype(chunk[name])
+    }
+    return chunk.astype(upcast) if upcast else chunk
+
+
+def widen_compact_dtypes(chunk):
+    """Returns `chunk` with the compact int8/int16/float32/category columns widened back to the schema dtypes."""
+    # Columnar files written by `to_compact` store the narrow dtypes, which the
+    # schema rejects; widening them is exact
+    widen = {}
+    for name, (dtype, _, _) in FEATURE_RANGES.items():
+        if name not in chunk:
+            continue
+        if dtype is float and pd.api.types.is_numeric_dtype(chunk[name]) and chunk[name].dtype != np.float64:
+            widen[name] = np.float64
+        elif dtype is int and pd.api.types.is_integer_dtype(chunk[name]) and chunk[name].dtype != np.int64:
+            widen[name] = np.int64
+    if "RiskLevel" in chunk and isinstance(chunk["RiskLevel"].dtype, pd.CategoricalDtype):
+        widen["RiskLevel"] = object
+    return chunk.astype(widen) if widen else chunk
+
+
+def _check_mask(check, values):
+    """Evaluates a pandera `isin` or `in_range` check on an array of non-null values."""
+    stats = check.statistics
+    if check.name == "isin":
+        return pd.Series(values).isin(stats["allowed_values"]).to_numpy()
+    if check.name == "in_range":
+        low = values >= stats["min_value"] if stats["include_min"] else values > stats["min_value"]
+        high = values <= stats["max_value"] if stats["include_max"] else values < stats["max_value"]
+        return np.asarray(low & high, dtype=bool)
+    raise NotImplementedError(f"The numpy engine cannot evaluate the '{check.name}' check.")
+
+
+def _dtype_mask(column, series):
+    """Returns True, False or an element-wise mask telling whether `series` has the dtype of `column`."""
+    # Object columns of plain strings are detected in one C-level pass before
+    # falling back to pandera's element-wise check
+    if str(column.dtype) == "str" and series.dtype == object:
+        if pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+            return True
+    result = column.dtype.check(Engine.dtype(series.dtype), series)
+    return result if isinstance(result, bool) else result.to_numpy(dtype=bool)
+
+
+def _numpy_errors(df, frame_checks=True, schema=SCHEMA):
+    """
+    Evaluates the rules of `schema` on `df` with boolean masks over the column arrays.
+
+    Parameters
+    -----------
+    df : pandas.DataFrame
+        the dataframe with maternal health risk data
+    frame_checks : bool
+        whether to run the whole-frame checks (empty rows and missing fraction)
+    schema : pandera.DataFrameSchema
+        `SCHEMA`, or `FEATURE_SCHEMA` for data without the target
+
+    Returns
+    -----------
+    list of pandera.errors.SchemaError
+        one error per failed rule, in the order pandera reports them
+    """
+    errors = []
+    nulls = df.isna().to_numpy()
+    positions = {name: i for i, name in enumerate(df.columns)}
+
+    for name, column in schema.columns.items():
+        if name not in positions:
+            errors.append(SchemaError(
+                schema, df,
+                f"column '{name}' not in dataframe. Columns in dataframe: {df.columns.tolist()}",
+                failure_cases=scalar_failure_case(name),
+                check="column_in_dataframe",
+                reason_code=SchemaErrorReason.COLUMN_NOT_IN_DATAFRAME
+            ))
+            continue
+
+        series = df[name]
+        null = nulls[:, positions[name]]
+        if null.any():
+            errors.append(SchemaError(
+                column, series,
+                f"non-nullable series '{name}' contains null values:\n{series[null]}",
+                failure_cases=reshape_failure_cases(series[null], ignore_na=False),
+                check="not_nullable",
+                reason_code=SchemaErrorReason.SERIES_CONTAINS_NULLS
+            ))
+
+        dtype_ok = _dtype_mask(column, series)
+        if isinstance(dtype_ok, bool):
+            if not dtype_ok:
+                errors.append(SchemaError(
+                    column, series,
+                    f"expected series '{name}' to have type {column.dtype}, got {series.dtype}",
+                    failure_cases=scalar_failure_case(str(series.dtype)),
+                    check=f"dtype('{column.dtype}')",
+                    reason_code=SchemaErrorReason.WRONG_DATATYPE
+                ))
+        elif not dtype_ok.all():
+            failure_cases = reshape_failure_cases(series[~dtype_ok], ignore_na=False)
+            errors.append(SchemaError(
+                column, series,
+                f"expected series '{name}' to have type {column.dtype}:\nfailure cases:\n{failure_cases}",
+                failure_cases=failure_cases,
+                check=f"dtype('{column.dtype}')",
+                reason_code=SchemaErrorReason.WRONG_DATATYPE
+            ))
+
+        values = series.to_numpy()
+        for check_index, check in enumerate(column.checks):
+            # Like pandera, element-wise checks ignore null values
+            passed = np.ones(len(series), dtype=bool)
+            try:
+                passed[~null] = _check_mask(check, values[~null])
+            except (TypeError, ValueError) as e:
+                errors.append(SchemaError(
+                    column, series,
+                    f"Error while executing check function: {e!r}",
+                    failure_cases=scalar_failure_case(repr(e)),
+                    check=check, check_index=check_index,
+                    reason_code=SchemaErrorReason.CHECK_ERROR
+                ))
+                continue
+            if not passed.all():
+                failure_cases = reshape_failure_cases(series[~passed])
+                errors.append(SchemaError(
+                    column, series,
+                    f"Column '{name}' failed element-wise validator number {check_index}: "
+                    f"{check} failure cases: {', '.join(map(str, failure_cases['failure_case']))}",
+                    failure_cases=failure_cases,
+                    check=check, check_index=check_index,
+                    check_output=pd.Series(passed, index=series.index, name=name),
+                    reason_code=SchemaErrorReason.DATAFRAME_CHECK
+                ))
+
+    if frame_checks:
+        errors += _frame_errors(nulls.all(axis=1).sum(), nulls.sum(axis=0), len(df), df, schema)
+
+    return errors
+
+
+def _frame_errors(empty_rows, null_counts, n_rows, data, schema=SCHEMA):
+    """Evaluates the whole-frame checks of `schema` from row and null counts."""
+    frame_results = [
+        empty_rows == 0,
+        bool((np.asarray(null_counts) / n_rows < MAX_MISSING_FRACTION).all())
+    ]
+    errors = []
+    for check_index, (check, passed) in enumerate(zip(schema.checks, frame_results)):
+        if not passed:
+            errors.append(SchemaError(
+                schema, data,
+                f"DataFrameSchema '{schema.name}' failed series or dataframe validator {check_index}: {check}",
+                failure_cases=scalar_failure_case(False),
+                check=check, check_index=check_index,
+                reason_code=SchemaErrorReason.DATAFRAME_CHECK
+            ))
+    return errors
+
 
-def data_validation(df):
+def _column_errors(df, engine):
+    """Returns the errors of the row-level rules of `SCHEMA` on `df`."""
+    if engine == "numpy":
+        return _numpy_errors(df, frame_checks=False)
+    try:
+        COLUMN_SCHEMA.validate(df, lazy=True)
+    except pa.errors.SchemaErrors as e:
+        return e.schema_errors
+    return []
+
+
+def data_validation(df, engine="pandera", require_target=True):
     """
     Validates maternal health risk data
 
     Parameters
     -----------
-    raw_data : 
+    raw_data :
         the dataframe with maternal health risk data
+    engine : str, optional
+        "pandera" runs the pandera schema; "numpy" evaluates the same rules
+        with boolean masks over the column arrays, which is much faster on
+        large frames and raises an equivalent error report
+    require_target : bool, optional
+        whether the RiskLevel column is required and checked; set it to False
+        to validate the features of unlabeled data before predicting on it
 
-    Returns 
+    Returns
     -----------
     This function does not return anything, it validates the maternal health dataset.
     """
@@ -30,24 +253,258 @@ def data_validation(df):
         raise TypeError(f"Expected a pandas DataFrame, got {type(df)}")
     if df.shape[0] == 0:
         raise ValueError("Cannot validate empty an dataframe.")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown validation engine '{engine}', expected one of {ENGINES}")
 
-    # validate data
-    schema = pa.DataFrameSchema(
-        {
-            "RiskLevel": pa.Column(str, pa.Check.isin(["high risk", "mid risk", "low risk"])),
-            "Age": pa.Column(int, pa.Check.between(10, 70)),
-            "SystolicBP": pa.Column(int, pa.Check.between(65, 185)),
-            "DiastolicBP": pa.Column(int, pa.Check.between(40, 125)),
-            "BS": pa.Column(float, pa.Check.between(3, 20)),
-            "BodyTemp": pa.Column(float, pa.Check.between(94, 105)),
-            "HeartRate": pa.Column(int, pa.Check.between(50, 110))
-        },
-        checks=[
-            pa.Check(lambda df: ~(df.isna().all(axis=1)).any(), error="Empty rows present."),
-            pa.Check(lambda df: (df.isna().sum() / len(df) < 0.1).all(), error="Some columns have more than 10% missing values.")
-        ]
-    )
+    schema = SCHEMA if require_target else FEATURE_SCHEMA
 
     # Run validation tests on our dataframe
-    schema.validate(df, lazy=True)
-    
+    if engine == "pandera":
+        schema.validate(df, lazy=True)
+        return
+
+    errors = _numpy_errors(df, schema=schema)
+    if errors:
+        raise pa.errors.SchemaErrors(schema, errors, df)
+
+
+def data_validation_chunked(chunks, engine="pandera", max_failure_cases=1000, counters=None):
+    """
+    Validates maternal health risk data that is read one chunk at a time
+
+    The row-level rules are applied to each chunk as it arrives, while the
+    counts needed by the whole-frame checks (number of rows, null values per
+    column and empty rows) are accumulated across chunks, so memory use only
+    depends on the chunk size. Failures of the same rule in different chunks
+    are merged into one error of a single report. Float columns that a chunk
+    parsed as integers are upcast, as they would be in the whole file.
+
+    Parameters
+    -----------
+    chunks :
+        an iterable of dataframes, e.g. `pd.read_csv(path, chunksize=...)`
+    engine : str, optional
+        the engine applied to each chunk, "pandera" or "numpy"
+    max_failure_cases : int, optional
+        maximum number of failing rows retained in the report; every failed
+        rule keeps at least its first failure case
+    counters : dict, optional
+        counts of rows validated earlier, as returned by a previous call, that
+        the whole-frame checks are computed on together with `chunks`
+
+    Returns
+    -----------
+    dict
+        the accumulated counts: "rows", "null_counts" per column and "empty_rows"
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown validation engine '{engine}', expected one of {ENGINES}")
+
+    if counters is None:
+        counters = {"rows": 0, "null_counts": {}, "empty_rows": 0}
+    counters = {**counters, "null_counts": dict(counters["null_counts"])}
+
+    merged = {}
+    retained = 0
+    for chunk in chunks:
+        if not isinstance(chunk, pd.DataFrame):
+            raise TypeError(f"Expected a pandas DataFrame, got {type(chunk)}")
+        if chunk.shape[0] == 0:
+            continue
+
+        chunk = upcast_float_features(chunk)
+
+        nulls = chunk.isna()
+        counters["rows"] += len(chunk)
+        counters["empty_rows"] += int(nulls.all(axis=1).sum())
+        for name, count in nulls.sum().items():
+            counters["null_counts"][name] = counters["null_counts"].get(name, 0) + int(count)
+
+        for error in _column_errors(chunk, engine):
+            key = (type(error.schema).__name__, error.schema.name, str(error.check), error.reason_code)
+            failure_cases = error.failure_cases
+            if key not in merged:
+                merged[key] = {"error": error, "failure_cases": [], "total": 0, "seen": set()}
+            entry = merged[key]
+
+            if failure_cases["index"].isna().all():
+                # Scalar failure cases (wrong dtype, missing column) are only kept once
+                value = tuple(failure_cases["failure_case"].astype(str))
+                if value not in entry["seen"]:
+                    entry["seen"].add(value)
+                    entry["total"] += len(failure_cases)
+                    entry["failure_cases"].append(failure_cases)
+                continue
+
+            entry["total"] += len(failure_cases)
+            budget = max(max_failure_cases - retained, 0 if entry["failure_cases"] else 1)
+            if budget > 0:
+                entry["failure_cases"].append(failure_cases.iloc[:budget])
+                retained += min(budget, len(failure_cases))
+
+    if counters["rows"] == 0:
+        raise ValueError("Cannot validate empty an dataframe.")
+
+    data = pd.DataFrame(columns=list(counters["null_counts"]))
+    errors = []
+    for entry in merged.values():
+        error = entry["error"]
+        failure_cases = pd.concat(entry["failure_cases"], ignore_index=True)
+        message = str(error).splitlines()[0]
+        if entry["total"] > len(failure_cases):
+            message += f" ({len(failure_cases)} of {entry['total']} failure cases retained)"
+        errors.append(SchemaError(
+            error.schema, data, message,
+            failure_cases=failure_cases,
+            check=error.check, check_index=error.check_index,
+            reason_code=error.reason_code
+        ))
+    errors += _frame_errors(
+        counters["empty_rows"], list(counters["null_counts"].values()), counters["rows"], data
+    )
+
+    if errors:
+        raise pa.errors.SchemaErrors(SCHEMA, errors, data)
+    return counters
+
+
+class _BoundedReader(io.RawIOBase):
+    """Read-only view of a binary file from its current position up to byte `end`."""
+
+    def __init__(self, file, end):
+        self.file = file
+        self.end = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.end - self.file.tell())
+        if size <= 0:
+            return 0
+        data = self.file.read(size)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _hash_range(file, start, end, digest, block_size=1024 * 1024):
+    """Updates `digest` with the bytes of `file` between `start` and `end`."""
+    file.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = file.read(min(block_size, remaining))
+        if not block:
+            break
+        digest.update(block)
+        remaining -= len(block)
+
+
+def _last_line_end(file, size, block_size=64 * 1024):
+    """Returns the position just after the last newline of `file`, or 0 if there is none."""
+    position = size
+    while position > 0:
+        start = max(0, position - block_size)
+        file.seek(start)
+        block = file.read(position - start)
+        newline = block.rfind(b"\n")
+        if newline != -1:
+            return start + newline + 1
+        position = start
+    return 0
+
+
+def data_validation_incremental(path, watermark_path=None, chunksize=100_000, engine="numpy",
+                                row_filter=None, max_failure_cases=1000):
+    """
+    Validates an append-only maternal health risk CSV, checking only rows added since the last run
+
+    After a successful validation a watermark is stored next to the data with the
+    byte offset and row count validated so far, a sha256 of that prefix of the
+    file and the counters of the whole-frame checks. The next run hashes the
+    prefix again: if it is unchanged only the appended rows are read and
+    validated, and the missing-value checks are computed by adding their counts to
+    the stored ones. Otherwise the whole file is validated again. A trailing line
+    without a newline is treated as still being written and left for the next run.
+
+    Parameters
+    -----------
+    path : str
+        the path to the CSV file with maternal health risk data
+    watermark_path : str, optional
+        where the watermark is stored, defaults to `path` + ".watermark.json"
+    chunksize : int, optional
+        number of rows validated at a time
+    engine : str, optional
+        the engine applied to each chunk, "pandera" or "numpy"
+    row_filter : callable, optional
+        applied to each chunk before validation, e.g. to drop known bad rows;
+        it must not change between runs sharing a watermark
+    max_failure_cases : int, optional
+        maximum number of failing rows retained in the report
+
+    Returns
+    -----------
+    dict
+        the "mode" of the run ("incremental" or "full"), the number of
+        "rows_validated" in this run and the accumulated "counters"
+    """
+    if watermark_path is None:
+        watermark_path = path + ".watermark.json"
+
+    watermark = None
+    if os.path.exists(watermark_path):
+        with open(watermark_path) as f:
+            watermark = json.load(f)
+
+    with open(path, "rb") as file:
+        header = file.readline()
+        columns = pd.read_csv(io.BytesIO(header)).columns.tolist()
+        end = max(_last_line_end(file, os.path.getsize(path)), len(header))
+
+        # Resume from the watermark only if the validated prefix is byte for byte unchanged
+        digest = hashlib.sha256()
+        mode = "full"
+        if watermark and watermark["columns"] == columns and watermark["offset"] <= end:
+            _hash_range(file, 0, watermark["offset"], digest)
+            if digest.hexdigest() == watermark["prefix_sha256"]:
+                mode = "incremental"
+        if mode == "full":
+            digest = hashlib.sha256()
+            _hash_range(file, 0, len(header), digest)
+            watermark = {"offset": len(header), "raw_rows": 0, "counters": None}
+
+        start = watermark["offset"]
+        _hash_range(file, start, end, digest)
+
+        raw_rows = watermark["raw_rows"]
+        counters = watermark["counters"]
+        rows_before = counters["rows"] if counters else 0
+        file.seek(start)
+        reader = io.BufferedReader(_BoundedReader(file, end))
+
+        def tail_chunks():
+            nonlocal raw_rows
+            if end == start:
+                return
+            for chunk in pd.read_csv(reader, header=None, names=columns, chunksize=chunksize):
+                # Number the rows by their position in the whole file
+                chunk.index += raw_rows
+                raw_rows += len(chunk)
+                yield row_filter(chunk) if row_filter is not None else chunk
+
+        counters = data_validation_chunked(
+            tail_chunks(), engine=engine, max_failure_cases=max_failure_cases, counters=counters
+        )
+
+    watermark = {
+        "columns": columns,
+        "offset": end,
+        "raw_rows": raw_rows,
+        "prefix_sha256": digest.hexdigest(),
+        "counters": counters
+    }
+    with open(watermark_path + ".part", "w") as f:
+        json.dump(watermark, f, indent=2)
+    os.replace(watermark_path + ".part", watermark_path)
+
+    return {"mode": mode, "rows_validated": counters["rows"] - rows_before, "counters": counters}
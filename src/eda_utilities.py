@@ -1,9 +1,114 @@
 import os
+import json
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import altair as alt
 import pandas as pd
 
-def create_heatmap(df_corr, plot_to):
-    """Creates and saves a heatmap of correlations."""
+# Extension of the file next to each PNG holding the hash of the spec it was rendered from
+SPEC_HASH_EXTENSION = ".sha256"
+
+
+def spec_hash(chart, scale_factor=2.0):
+    """
+    Returns a content hash of a chart's Vega-Lite spec
+
+    The spec embeds the chart's data, so the hash changes with the data, the
+    encodings or the layout, and also with the scale factor and the Altair
+    version the PNG is rendered with.
+
+    Parameters
+    ----------
+    chart : altair chart
+        the chart to hash
+    scale_factor : float, optional
+        scale factor of the rendered PNG
+
+    Returns
+    ----------
+        str, the hexadecimal SHA-256 digest
+    """
+    content = {"spec": chart.to_dict(), "scale_factor": scale_factor, "altair": alt.__version__}
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def is_rendered(path, digest):
+    """Returns whether the PNG at `path` exists and was rendered from a spec with the hash `digest`."""
+    try:
+        with open(path + SPEC_HASH_EXTENSION) as f:
+            return os.path.exists(path) and f.read().strip() == digest
+    except FileNotFoundError:
+        return False
+
+
+def _render(chart, path, scale_factor, digest):
+    """Renders a chart to a PNG, then records its spec hash, returning the seconds taken."""
+    start = time.perf_counter()
+    # A PNG left half-written by a failed render must not look up to date
+    if os.path.exists(path + SPEC_HASH_EXTENSION):
+        os.remove(path + SPEC_HASH_EXTENSION)
+    chart.save(path, scale_factor=scale_factor)
+    with open(path + SPEC_HASH_EXTENSION, "w") as f:
+        f.write(digest + "\n")
+    return time.perf_counter() - start
+
+
+def render_charts(charts, n_jobs=-1, scale_factor=2.0, force=False):
+    """
+    Renders charts to PNG files in parallel, skipping those whose spec has not changed
+
+    The hash of each chart's spec from `spec_hash` is stored next to its PNG.
+    A chart is only rendered when its PNG or hash file is missing or its
+    spec hash has changed. The charts left to render are rasterized by a
+    pool of worker processes, one chart per task. The workers are started
+    from a fresh server process rather than forked from this one, as a
+    process forked after rendering a chart can hang in the renderer.
+
+    Parameters
+    ----------
+    charts : dict
+        maps the path of each PNG to its altair chart
+    n_jobs : int, optional
+        number of worker processes, -1 for all cores; 1 renders in this process
+    scale_factor : float, optional
+        scale factor of the rendered PNGs
+    force : bool, optional
+        render every chart, even if its spec has not changed
+
+    Returns
+    ----------
+        pandas DataFrame with one row per chart, in the order of `charts`, and
+        the columns "chart", "rendered" and "seconds" spent rendering it
+    """
+    digests = {path: spec_hash(chart, scale_factor) for path, chart in charts.items()}
+    stale = [path for path in charts if force or not is_rendered(path, digests[path])]
+    n_workers = n_jobs if n_jobs > 0 else max((os.cpu_count() or 1) + 1 + n_jobs, 1)
+    n_workers = min(n_workers, len(stale))
+
+    seconds = {}
+    if n_workers <= 1:
+        for path in stale:
+            seconds[path] = _render(charts[path], path, scale_factor, digests[path])
+    else:
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            context.set_forkserver_preload(["altair", "src.eda_utilities"])
+        with ProcessPoolExecutor(n_workers, mp_context=context) as executor:
+            futures = {path: executor.submit(_render, charts[path], path, scale_factor, digests[path]) for path in stale}
+            seconds = {path: future.result() for path, future in futures.items()}
+
+    return pd.DataFrame({
+        "chart": [os.path.basename(path) for path in charts],
+        "rendered": [path in seconds for path in charts],
+        "seconds": [seconds.get(path, 0.0) for path in charts],
+    })
+
+
+def heatmap_chart(df_corr):
+    """Returns a heatmap of correlations."""
     correlation_matrix = df_corr.corr().abs().round(2).reset_index().melt(
         id_vars='index', var_name='Variable', value_name='Correlation'
     )
@@ -25,43 +130,92 @@ def create_heatmap(df_corr, plot_to):
         title="Heatmap of the Maternal Health"
     )
 
-    final_chart = heatmap + text
-    final_chart.save(os.path.join(plot_to, "heatmap_of_the_maternal_health.png"), scale_factor=2.0)
+    return heatmap + text
 
 
-def create_countplot(df_eda, plot_to):
-    """Creates and saves a countplot of risk levels."""
-    chart = alt.Chart(df_eda).mark_bar(color='steelblue').encode(
-        x=alt.X('RiskLevel', title='Risk Level', axis=alt.Axis(labelAngle=0)),
-        y=alt.Y('count()', title='Count'),
+def create_heatmap(df_corr, plot_to):
+    """Creates and saves a heatmap of correlations."""
+    render_charts({os.path.join(plot_to, "heatmap_of_the_maternal_health.png"): heatmap_chart(df_corr)}, n_jobs=1)
+
+
+# Names of the box statistics, for the quantiles computed by `box_statistics`
+BOX_STATISTICS = {0.0: "min", 0.25: "q1", 0.5: "median", 0.75: "q3", 1.0: "max"}
+
+
+def risk_level_counts(df_eda):
+    """Returns the number of rows of each risk level, in a dataframe with the columns RiskLevel and Count."""
+    counts = df_eda['RiskLevel'].value_counts(sort=False)
+    return counts[counts > 0].rename_axis('RiskLevel').reset_index(name='Count')
+
+
+def box_statistics(df_eda):
+    """
+    Computes the statistics drawn by a min-max boxplot of each feature and risk level
+
+    The quantiles are interpolated linearly, like the quartiles of Vega-Lite's
+    boxplots, so the charts look as if they were drawn from the raw rows.
+
+    Parameters
+    ----------
+    df_eda : pandas DataFrame
+        the features and the RiskLevel of each row
+
+    Returns
+    ----------
+        pandas DataFrame with one row per risk level and feature, and the
+        columns RiskLevel, Feature, min, q1, median, q3 and max
+    """
+    columns = [col for col in df_eda.columns.tolist() if col != 'RiskLevel']
+    quantiles = df_eda.groupby('RiskLevel', observed=True)[columns].quantile(list(BOX_STATISTICS))
+    quantiles.index = quantiles.index.set_names(['RiskLevel', 'statistic']).set_levels(
+        [BOX_STATISTICS[q] for q in quantiles.index.levels[1]], level='statistic'
+    )
+    stats = quantiles.rename_axis(columns='Feature').stack().unstack('statistic')
+    return stats[list(BOX_STATISTICS.values())].rename_axis(columns=None).reset_index()
+
+
+def countplot_chart(df_eda):
+    """Returns a countplot of risk levels, drawn from the count of each risk level."""
+    return alt.Chart(risk_level_counts(df_eda)).mark_bar(color='steelblue').encode(
+        x=alt.X('RiskLevel:N', title='Risk Level', axis=alt.Axis(labelAngle=0)),
+        y=alt.Y('Count:Q', title='Count'),
         color=alt.Color('RiskLevel:N', title='Risk Level')
     ).properties(
         title="Countplot of Risk Level",
         width=300, height=300
     )
 
-    chart.save(os.path.join(plot_to, "countplot_of_risk_level.png"), scale_factor=2.0)
 
+def create_countplot(df_eda, plot_to):
+    """Creates and saves a countplot of risk levels."""
+    render_charts({os.path.join(plot_to, "countplot_of_risk_level.png"): countplot_chart(df_eda)}, n_jobs=1)
 
-def create_boxplots(df_eda, plot_to):
-    """Creates and saves boxplots for each feature grouped by risk levels."""
-    columns = [col for col in df_eda.columns.tolist() if col != 'RiskLevel']
-    boxplots = [
-        alt.Chart(df_eda).mark_boxplot(extent='min-max').encode(
-            x=alt.X('RiskLevel:N', title='Risk Level', axis=alt.Axis(labelAngle=0)),
-            y=alt.Y(f'{col}:Q', title=col),
-            color='RiskLevel:N'
-        ).properties(
+
+def boxplot_chart(df_eda):
+    """Returns boxplots for each feature grouped by risk levels, drawn from their box statistics."""
+    stats = box_statistics(df_eda)
+    boxplots = []
+    for col, feature_stats in stats.groupby('Feature', sort=False):
+        base = alt.Chart(feature_stats).encode(
+            x=alt.X('RiskLevel:N', title='Risk Level', axis=alt.Axis(labelAngle=0))
+        )
+        # The layers of Vega-Lite's min-max boxplot: whiskers, box and median tick
+        whiskers = base.mark_rule(color='black').encode(y=alt.Y('min:Q', title=col), y2='max:Q')
+        box = base.mark_bar(size=14).encode(y='q1:Q', y2='q3:Q', color='RiskLevel:N')
+        median = base.mark_tick(color='white', size=14).encode(y='median:Q')
+        boxplots.append((whiskers + box + median).properties(
             title=f'Comparing {col} Across Risk Levels',
             width=300, height=200
-        )
-        for col in columns
-    ]
+        ))
 
-    boxplot_chart = alt.vconcat(*boxplots).resolve_scale(
+    return alt.vconcat(*boxplots).resolve_scale(
         color='independent', y='independent'
     )
-    boxplot_chart.save(os.path.join(plot_to, "boxplot_by_risk_level.png"), scale_factor=2.0)
+
+
+def create_boxplots(df_eda, plot_to):
+    """Creates and saves boxplots for each feature grouped by risk levels."""
+    render_charts({os.path.join(plot_to, "boxplot_by_risk_level.png"): boxplot_chart(df_eda)}, n_jobs=1)
 
 
 def save_data_summaries(df_eda, df_corr, table_to):
@@ -0,0 +1,224 @@
+# evaluation.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import numpy as np
+import pandas as pd
+from src.prediction import map_chunks
+
+
+def confusion_counts(y_true, y_pred, labels):
+    """
+    Computes the confusion matrix of a vector of predictions in one pass
+
+    Parameters
+    ----------
+    y_true : array-like
+        true labels
+    y_pred : array-like
+        predicted labels
+    labels : array-like
+        the classes, in the order of the rows and columns of the matrix
+
+    Returns
+    ----------
+        numpy array of shape (n_classes, n_classes), with the true labels in
+        rows and the predicted labels in columns, as in sklearn's confusion_matrix
+    """
+    labels = np.asarray(labels)
+    n_classes = len(labels)
+    order = np.argsort(labels)
+    codes = []
+    for values in (y_true, y_pred):
+        values = np.asarray(values)
+        position = np.clip(np.searchsorted(labels[order], values), 0, n_classes - 1)
+        if (labels[order][position] != values).any():
+            raise ValueError("Found labels that are not in `labels`")
+        codes.append(order[position])
+    return np.bincount(codes[0] * n_classes + codes[1], minlength=n_classes ** 2).reshape(n_classes, n_classes)
+
+
+def metrics_from_confusion(confusion):
+    """
+    Derives accuracy and per-class precision, recall and F1 from confusion matrices
+
+    Classes that are never predicted (or never present) get a precision
+    (or recall) of 0, like scikit-learn's default `zero_division`.
+
+    Parameters
+    ----------
+    confusion : numpy array
+        a confusion matrix of shape (n_classes, n_classes), or a stack of them
+        of shape (n_matrices, n_classes, n_classes)
+
+    Returns
+    ----------
+        dict of "accuracy" with one value per matrix, and "precision",
+        "recall" and "f1" with one value per matrix and class
+    """
+    confusion = np.asarray(confusion, dtype=float)
+    correct = np.diagonal(confusion, axis1=-2, axis2=-1)
+    predicted = confusion.sum(axis=-2)
+    actual = confusion.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, correct / predicted, 0.0)
+        recall = np.where(actual > 0, correct / actual, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return {
+        "accuracy": correct.sum(axis=-1) / confusion.sum(axis=(-2, -1)),
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+    }
+
+
+def bootstrap_confusions(confusion, n_resamples=2000, seed=None):
+    """
+    Draws the confusion matrices of bootstrap resamples of a test set
+
+    Resampling the n rows of a test set with replacement and counting the
+    (true, predicted) pairs of the resample amounts to drawing the cell
+    counts of its confusion matrix from a multinomial distribution with n
+    trials and the observed cell frequencies. All the resamples are drawn as
+    one (n_resamples, n_classes ** 2) matrix of counts, so the cost depends
+    on the number of classes and not on the size of the test set.
+
+    Parameters
+    ----------
+    confusion : numpy array
+        the confusion matrix of the whole test set
+    n_resamples : int, optional
+        number of bootstrap resamples
+    seed : int, optional
+        seeds the resampling
+
+    Returns
+    ----------
+        numpy array of shape (n_resamples, n_classes, n_classes)
+    """
+    confusion = np.asarray(confusion)
+    n = int(confusion.sum())
+    counts = np.random.default_rng(seed).multinomial(n, confusion.ravel() / n, size=n_resamples)
+    return counts.reshape(n_resamples, *confusion.shape)
+
+
+def _chunk_confusion(model, chunk, labels, target):
+    """Returns the confusion matrix of the model's predictions on a labeled chunk."""
+    predictions = model.predict(chunk[list(model.feature_names_in_)])
+    return confusion_counts(chunk[target], predictions, labels)
+
+
+def evaluate_chunks(chunks, model_path, labels, n_jobs=1, max_pending=None, engine="numpy", target="RiskLevel",
+                    confusion=None):
+    """
+    Accumulates the confusion matrix of a model over chunks of a labeled test set
+
+    Each chunk is validated, predicted and counted by a worker process with
+    `map_chunks`, and only its confusion matrix is sent back. Confusion
+    matrices merge by addition, so the counts of the chunks, of workers or
+    of earlier runs (`confusion`) add up to those of the whole test set,
+    and the per-class counts and every metric of `metrics_from_confusion`
+    can be derived from the total. Memory use depends on the chunk size and
+    not on the size of the test set.
+
+    Parameters
+    ----------
+    chunks :
+        an iterable of labeled dataframes, e.g. from `read_input_chunks`
+    model_path : str
+        model artifact (.model) or pickled search object
+    labels : array-like
+        the classes, e.g. the `classes_` of the model
+    n_jobs : int, optional
+        number of worker processes, -1 for all cores
+    max_pending : int, optional
+        maximum number of chunks being evaluated at once, twice the number of workers by default
+    engine : str, optional
+        the validation engine, "numpy" or "pandera"
+    target : str, optional
+        name of the target column
+    confusion : numpy array, optional
+        counts of data evaluated earlier, that the counts of `chunks` are added to
+
+    Returns
+    ----------
+        numpy array of shape (n_classes, n_classes), the confusion matrix of all the rows
+    """
+    labels = np.asarray(labels)
+    total = np.zeros((len(labels), len(labels)), dtype=np.int64) if confusion is None else np.array(confusion)
+    results = map_chunks(_chunk_confusion, chunks, model_path, n_jobs=n_jobs, max_pending=max_pending,
+                         engine=engine, require_target=True, args=(labels, target))
+    for _, counts in results:
+        total += counts
+    return total
+
+
+def evaluate_confusion(confusion, labels, n_resamples=2000, confidence=0.95, seed=None):
+    """
+    Derives every metric and its bootstrap confidence interval from a confusion matrix
+
+    The intervals are the percentiles of the metrics of the resamples drawn
+    by `bootstrap_confusions`.
+
+    Parameters
+    ----------
+    confusion : numpy array
+        the confusion matrix of the whole test set
+    labels : array-like
+        the classes, in the order of the rows and columns of `confusion`
+    n_resamples : int, optional
+        number of bootstrap resamples
+    confidence : float, optional
+        confidence level of the intervals
+    seed : int, optional
+        seeds the resampling
+
+    Returns
+    ----------
+        dataframe with one row per metric ("accuracy", then precision, recall
+        and F1 of each class) and the columns "metric", "class", "estimate",
+        "lower" and "upper"
+    """
+    labels = np.asarray(labels)
+    estimates = metrics_from_confusion(confusion)
+    resampled = metrics_from_confusion(bootstrap_confusions(confusion, n_resamples, seed))
+    tail = (1 - confidence) / 2
+
+    rows = []
+    for metric, values in estimates.items():
+        classes = [None] if metric == "accuracy" else labels
+        estimate = np.atleast_1d(values)
+        lower, upper = np.quantile(resampled[metric], [tail, 1 - tail], axis=0).reshape(2, len(classes))
+        for i, label in enumerate(classes):
+            rows.append({"metric": metric, "class": label, "estimate": estimate[i], "lower": lower[i], "upper": upper[i]})
+    return pd.DataFrame(rows)
+
+
+def evaluate_predictions(y_true, y_pred, labels, n_resamples=2000, confidence=0.95, seed=None):
+    """
+    Evaluates a single vector of predictions, with bootstrap confidence intervals
+
+    The confusion matrix is computed once, and every metric is derived from
+    it with `evaluate_confusion`.
+
+    Parameters
+    ----------
+    y_true : array-like
+        true labels of the test set
+    y_pred : array-like
+        predictions of the model on the test set
+    labels : array-like
+        the classes, e.g. the `classes_` of the model
+    n_resamples : int, optional
+        number of bootstrap resamples
+    confidence : float, optional
+        confidence level of the intervals
+    seed : int, optional
+        seeds the resampling
+
+    Returns
+    ----------
+        tuple of the confusion matrix and the dataframe of `evaluate_confusion`
+    """
+    confusion = confusion_counts(y_true, y_pred, labels)
+    return confusion, evaluate_confusion(confusion, labels, n_resamples, confidence, seed)
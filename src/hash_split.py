@@ -0,0 +1,312 @@
+# hash_split.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+def _hash_key(seed, salt=""):
+    """Returns the 16 character key used by `pd.util.hash_pandas_object` for a seed."""
+    return hashlib.md5(f"{seed}:{salt}".encode()).hexdigest()[:16]
+
+
+def _row_hashes(keys, hash_key):
+    """Hashes each row of `keys` to a uint64 that does not depend on how the columns were parsed."""
+    canonical = {}
+    for name in keys.columns:
+        column = keys[name]
+        if pd.api.types.is_float_dtype(column) and column.dtype.itemsize < 8:
+            # Go through the shortest repr so that float32 17.8 hashes like float64 17.8
+            canonical[name] = column.astype(str).astype("float64")
+        elif pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            # The same value must hash the same whether a chunk parsed it as int8, int64 or float64
+            canonical[name] = column.astype("float64")
+        elif isinstance(column.dtype, pd.CategoricalDtype):
+            canonical[name] = column.astype(object)
+        else:
+            canonical[name] = column
+    return pd.util.hash_pandas_object(pd.DataFrame(canonical), index=False, hash_key=hash_key).to_numpy()
+
+
+def hash_fraction(df, seed=111, id_column=None, stratify=None):
+    """
+    Maps each row to a number in [0, 1) from a stable hash of its contents
+
+    The number only depends on the row itself and the seed, so that it does
+    not change when other rows are added or removed, and identical rows get
+    the same number.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        the rows to map
+    seed : int, optional
+        changes the number of every row
+    id_column : str, optional
+        hash only this column instead of the whole row
+    stratify : str, optional
+        name of the class column; the rows of each class are then hashed with
+        their own key, into per-class hash buckets
+
+    Returns
+    ----------
+        numpy float64 array
+    """
+    keys = df[[id_column]] if id_column is not None else df
+    if stratify is None:
+        hashes = _row_hashes(keys, _hash_key(seed))
+    else:
+        hashes = np.empty(len(df), dtype=np.uint64)
+        labels = df[stratify].astype(str).to_numpy()
+        for label in np.unique(labels):
+            in_class = labels == label
+            hashes[in_class] = _row_hashes(keys[in_class], _hash_key(seed, label))
+    # Use the top 53 bits so that the fraction is exact in float64
+    return (hashes >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def _hash_order(fractions, positions):
+    """Returns the order of rows by hash fraction, ties broken by position."""
+    return np.lexsort((positions, fractions))
+
+
+def stratified_cutoffs(chunks, test_size=0.2, seed=111, id_column=None, stratify="RiskLevel"):
+    """
+    Finds, for each class, where the test set of an exact stratified hash split ends
+
+    The rows of each class are ranked by their per-class `hash_fraction`, ties
+    broken by their position in `chunks`, and the lowest
+    `round(test_size * n_class)` of them go to the test set, so that every
+    class is split at the `test_size` rate up to rounding. This needs one pass
+    over the data before the split, which only keeps the fraction and class
+    of each row in memory. The cutoffs move when rows are added, so the rows
+    near them can change side.
+
+    Parameters
+    ----------
+    chunks :
+        an iterable of dataframes, in the order they will be split
+    test_size, seed, id_column :
+        see `hash_assign`
+    stratify : str, optional
+        name of the class column
+
+    Returns
+    ----------
+        dict mapping each class (as a string) to the (fraction, position) of
+        its first training row in rank order, every row ranked before it goes
+        to the test set
+    """
+    if not 0 < test_size < 1:
+        raise ValueError(f"test_size must be between 0 and 1, got {test_size}")
+    fractions, labels = [], []
+    for chunk in chunks:
+        fractions.append(hash_fraction(chunk, seed, id_column, stratify))
+        labels.append(chunk[stratify].astype(str).to_numpy())
+    fractions = np.concatenate(fractions) if fractions else np.empty(0)
+    labels = np.concatenate(labels) if labels else np.empty(0, dtype=object)
+    positions = np.arange(len(fractions))
+
+    cutoffs = {}
+    for label in np.unique(labels):
+        in_class = np.flatnonzero(labels == label)
+        order = in_class[_hash_order(fractions[in_class], positions[in_class])]
+        n_test = int(round(test_size * len(order)))
+        cutoffs[label] = (fractions[order[n_test]], positions[order[n_test]]) if n_test < len(order) else (np.inf, 0)
+    return cutoffs
+
+
+def _below_cutoffs(df, cutoffs, seed, id_column, stratify, start=0):
+    """Returns which rows of `df`, starting at position `start`, rank below the cutoff of their class."""
+    fractions = hash_fraction(df, seed, id_column, stratify)
+    positions = np.arange(start, start + len(df))
+    labels = df[stratify].astype(str).to_numpy()
+    in_test = np.zeros(len(df), dtype=bool)
+    for label in np.unique(labels):
+        if label not in cutoffs:
+            raise ValueError(f"Class {label!r} was not seen when the cutoffs were computed")
+        fraction, position = cutoffs[label]
+        in_class = labels == label
+        in_test[in_class] = (fractions[in_class] < fraction) | (
+            (fractions[in_class] == fraction) & (positions[in_class] < position)
+        )
+    return in_test
+
+
+def hash_assign(df, test_size=0.2, seed=111, id_column=None, stratify=None, exact=False):
+    """
+    Assigns each row to the train or test set from a stable hash of its contents
+
+    A row goes to the test set when its `hash_fraction` is below `test_size`.
+    A row keeps its assignment when other rows are added or removed, and
+    identical rows always end up on the same side of the split. The test set
+    then holds `test_size` of the rows in expectation, in every class.
+
+    With `stratify`, each class is hashed into its own buckets and split
+    independently at the `test_size` rate, which stays stable as rows are
+    added. With `exact` as well, the rows of each class are instead ranked by
+    their fraction and the lowest `round(test_size * n_class)` go to the test
+    set, see `stratified_cutoffs`. Every class is then split at exactly the
+    `test_size` rate, but this is not stable: the rows near the cutoff can
+    change side when rows are added, and identical rows at the cutoff can be
+    split.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        the rows to assign
+    test_size : float, optional
+        fraction of rows assigned to the test set
+    seed : int, optional
+        changes the assignment of every row
+    id_column : str, optional
+        hash only this column instead of the whole row
+    stratify : str, optional
+        name of the class column, to split every class at the `test_size` rate
+    exact : bool, optional
+        with `stratify`, put exactly `round(test_size * n_class)` rows of each
+        class in the test set, at the cost of stability
+
+    Returns
+    ----------
+        numpy boolean array, True for rows assigned to the test set
+    """
+    if not 0 < test_size < 1:
+        raise ValueError(f"test_size must be between 0 and 1, got {test_size}")
+    if stratify is not None and exact:
+        cutoffs = stratified_cutoffs([df], test_size, seed, id_column, stratify)
+        return _below_cutoffs(df, cutoffs, seed, id_column, stratify)
+    return hash_fraction(df, seed, id_column, stratify) < test_size
+
+
+def hash_folds(df, n_splits=10, seed=111, id_column=None, stratify=None, exact=False):
+    """
+    Assigns each row to one of `n_splits` cross validation folds from a stable hash of its contents
+
+    With `stratify`, each class is hashed into its own buckets. With `exact`
+    as well, the rows of each class are ranked by their hash fraction and
+    dealt into folds by rank, so that the folds of every class differ in size
+    by at most one row, but rows can change fold when rows are added.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        the rows to assign
+    n_splits : int, optional
+        number of folds
+    seed, id_column, stratify, exact :
+        see `hash_assign`
+
+    Returns
+    ----------
+        numpy integer array of fold numbers from 0 to `n_splits` - 1
+    """
+    if n_splits < 2:
+        raise ValueError(f"n_splits must be at least 2, got {n_splits}")
+    fractions = hash_fraction(df, seed, id_column, stratify)
+    if stratify is None or not exact:
+        return (fractions * n_splits).astype(np.int64)
+
+    folds = np.empty(len(df), dtype=np.int64)
+    labels = df[stratify].astype(str).to_numpy()
+    positions = np.arange(len(df))
+    for label in np.unique(labels):
+        in_class = np.flatnonzero(labels == label)
+        order = in_class[_hash_order(fractions[in_class], positions[in_class])]
+        folds[order] = np.arange(len(order)) * n_splits // len(order)
+    return folds
+
+
+def hash_split_chunks(chunks, test_size=0.2, seed=111, id_column=None, stratify=None, exact=False, cutoffs=None):
+    """
+    Splits an iterable of dataframes into train and test chunks with `hash_assign`
+
+    Parameters
+    ----------
+    chunks :
+        an iterable of dataframes, e.g. `pd.read_csv(path, chunksize=...)`
+    test_size, seed, id_column, stratify, exact :
+        see `hash_assign`
+    cutoffs : dict, optional
+        the `stratified_cutoffs` of the same chunks, needed with `exact`
+
+    Returns
+    ----------
+        generator of (train chunk, test chunk) pairs
+    """
+    exact = exact and stratify is not None
+    if exact and cutoffs is None:
+        raise ValueError("An exact stratified split of chunks needs the stratified_cutoffs of a first pass over them")
+    start = 0
+    for chunk in chunks:
+        if exact:
+            in_test = _below_cutoffs(chunk, cutoffs, seed, id_column, stratify, start)
+        else:
+            in_test = hash_assign(chunk, test_size, seed, id_column, stratify)
+        start += len(chunk)
+        yield chunk[~in_test], chunk[in_test]
+
+
+def hash_split_csv(path, train_path, test_path, chunksize=100_000, test_size=0.2, seed=111,
+                   id_column=None, stratify=None, exact=False, row_filter=None):
+    """
+    Streams a CSV file into train and test CSV files with `hash_assign`
+
+    Only one chunk is held in memory at a time. Since each row is assigned from
+    its own hash, re-running the split on a file that has grown keeps every old
+    row on the same side of the split, unless `exact` is set. An exact
+    stratified split reads the file twice, first to find the
+    `stratified_cutoffs`. The outputs are written next to their destination
+    first and only replace it once the whole file is split.
+
+    Parameters
+    ----------
+    path : str
+        path to the CSV file to split
+    train_path, test_path : str
+        destinations of the train and test CSV files
+    chunksize : int, optional
+        number of rows read at a time
+    test_size, seed, id_column, stratify, exact :
+        see `hash_assign`
+    row_filter : callable, optional
+        applied to each chunk before it is split, e.g. to drop invalid rows
+
+    Returns
+    ----------
+        dict with the number of "train" and "test" rows, and when `stratify` is
+        given the "test_fraction" achieved in each class
+    """
+    counts = {"train": 0, "test": 0}
+    class_counts = {}
+    first = True
+
+    def read_chunks():
+        chunks = pd.read_csv(path, chunksize=chunksize)
+        return (row_filter(chunk) for chunk in chunks) if row_filter is not None else chunks
+
+    exact = exact and stratify is not None
+    cutoffs = stratified_cutoffs(read_chunks(), test_size, seed, id_column, stratify) if exact else None
+    with open(train_path + ".part", "w", newline="") as train_file, \
+            open(test_path + ".part", "w", newline="") as test_file:
+        for train, test in hash_split_chunks(read_chunks(), test_size, seed, id_column, stratify, exact, cutoffs):
+            train.to_csv(train_file, index=False, header=first)
+            test.to_csv(test_file, index=False, header=first)
+            first = False
+            counts["train"] += len(train)
+            counts["test"] += len(test)
+            if stratify is not None:
+                for name, part in (("train", train), ("test", test)):
+                    for label, n in part[stratify].value_counts().items():
+                        class_counts.setdefault(label, {"train": 0, "test": 0})[name] += n
+    os.replace(train_path + ".part", train_path)
+    os.replace(test_path + ".part", test_path)
+
+    if stratify is not None:
+        counts["test_fraction"] = {
+            label: n["test"] / (n["train"] + n["test"]) for label, n in sorted(class_counts.items())
+        }
+    return counts
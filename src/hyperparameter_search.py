@@ -0,0 +1,333 @@
+# hyperparameter_search.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import os
+import json
+import time
+import joblib
+import numpy as np
+from numpy.ma import MaskedArray
+from scipy.stats import rankdata, rv_discrete
+from sklearn.base import clone, is_classifier
+from sklearn.metrics import check_scoring
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GridSearchCV, HalvingGridSearchCV, HalvingRandomSearchCV, RandomizedSearchCV,
+    ParameterGrid, ParameterSampler, check_cv
+)
+
+SEARCH_METHODS = ("random", "grid", "halving")
+
+# Search parameters that only change how the fits are run, not their results
+_EXECUTION_PARAMS = ("n_jobs", "verbose", "pre_dispatch")
+
+
+def finite_grid(param_distributions):
+    """
+    Enumerates a search space whose parameters all take finitely many values
+
+    Lists are deduplicated, keeping their order, and discrete scipy
+    distributions with bounded support, such as `randint(3, 20)`, are expanded
+    to every value they can draw.
+
+    Parameters
+    ----------
+    param_distributions : dict
+        parameter names mapped to lists or scipy distributions, as passed to RandomizedSearchCV
+
+    Returns
+    ----------
+        dict of parameter names to lists, usable as a GridSearchCV `param_grid`,
+        or None if a parameter is continuous or unbounded
+    """
+    grid = {}
+    for name, values in param_distributions.items():
+        if hasattr(values, "rvs"):
+            if not isinstance(getattr(values, "dist", None), rv_discrete):
+                return None
+            low, high = values.support()
+            if not (np.isfinite(low) and np.isfinite(high)):
+                return None
+            grid[name] = list(range(int(low), int(high) + 1))
+        else:
+            grid[name] = list(dict.fromkeys(values))
+    return grid
+
+
+def grid_size(param_grid):
+    """Returns the number of configurations in a parameter grid."""
+    return int(np.prod([len(values) for values in param_grid.values()]))
+
+
+def search_fits(search):
+    """Returns the number of fits a fitted search ran, not counting the final refit."""
+    if hasattr(search, "n_candidates_"):
+        # Successive halving searches record the candidates of each iteration
+        return int(sum(search.n_candidates_)) * search.n_splits_
+    return len(search.cv_results_["params"]) * search.n_splits_
+
+
+def tune(estimator, param_distributions, X_train, y_train, method="random", n_iter=100, cv=None,
+         random_state=123, journal_path=None, **kwargs):
+    """
+    Runs a hyperparameter search with `method` and returns the fitted search
+
+    "random" is a plain RandomizedSearchCV, which samples `n_iter`
+    configurations and can draw the same one several times. "grid" enumerates
+    the configurations of a finite space with `finite_grid` and tries each one
+    exactly once. "halving" also enumerates the space, then runs successive
+    halving: every configuration is first fitted on a small subsample of the
+    rows, and only the best third move on to three times as many rows, until
+    the last ones are fitted on (nearly) all the rows. A space that cannot be
+    enumerated falls back to random sampling, halved the same way. Every
+    method refits the best configuration on the full data.
+
+    Parameters
+    ----------
+    estimator :
+        scikit-learn model to tune
+    param_distributions : dict
+        the search space, as passed to RandomizedSearchCV
+    X_train : numpy array or pandas DataFrame
+        X in the training data
+    y_train :
+        y in the training data
+    method : str, optional
+        one of "random", "grid" or "halving"
+    n_iter : int, optional
+        number of sampled configurations for random searches
+    cv : int or cross-validation generator, optional
+        as in RandomizedSearchCV
+    random_state : int, optional
+        seeds the sampling of configurations and rows
+    journal_path : str, optional
+        journal of completed fits that makes the search resumable, see
+        `journaled_fit`; only for the "random" and "grid" methods
+    **kwargs :
+        passed on to the search, e.g. n_jobs or return_train_score
+
+    Returns
+    ----------
+        fitted scikit-learn search object
+    """
+    if method not in SEARCH_METHODS:
+        raise ValueError(f"Unknown search method '{method}', expected one of {SEARCH_METHODS}")
+    if journal_path is not None and method == "halving":
+        raise ValueError("A journal can only be kept for the 'random' and 'grid' searches")
+
+    param_grid = finite_grid(param_distributions)
+    if method == "random":
+        search = RandomizedSearchCV(estimator, param_distributions, n_iter=n_iter, cv=cv,
+                                    random_state=random_state, **kwargs)
+    elif method == "grid":
+        if param_grid is None:
+            raise ValueError("A grid search needs every parameter to take finitely many values")
+        search = GridSearchCV(estimator, param_grid, cv=cv, **kwargs)
+    else:
+        # Start from the subsample size that lets the last iteration use as many rows as possible.
+        # sklearn's "exhaust" never goes below 2 rows per class and fold, which can cost the last iteration.
+        n_candidates = grid_size(param_grid) if param_grid is not None else n_iter
+        n_iterations = 1 + int(np.floor(np.log(n_candidates) / np.log(3)))
+        min_resources = max(len(y_train) // 3 ** (n_iterations - 1), 1)
+        if param_grid is None:
+            search = HalvingRandomSearchCV(estimator, param_distributions, n_candidates=n_iter, cv=cv,
+                                           factor=3, min_resources=min_resources,
+                                           random_state=random_state, **kwargs)
+        else:
+            search = HalvingGridSearchCV(estimator, param_grid, cv=cv, factor=3, min_resources=min_resources,
+                                         random_state=random_state, **kwargs)
+    if journal_path is not None:
+        return journaled_fit(search, X_train, y_train, journal_path)
+    return search.fit(X_train, y_train)
+
+
+def _to_json(value):
+    """Converts the numpy scalars and dicts of scores returned by a fit to plain JSON values."""
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _rows(data, indices):
+    """Returns the rows of a dataframe, series or array at the given positions."""
+    return data.iloc[indices] if hasattr(data, "iloc") else data[indices]
+
+
+def _fit_and_record(estimator, X, y, parameters, train, test, scorer, return_train_score, error_score,
+                    journal_path, key):
+    """Fits and scores one configuration on one fold, then appends the result to the journal."""
+    estimator = clone(estimator).set_params(**clone(parameters, safe=False))
+    X_train, y_train, X_test, y_test = _rows(X, train), _rows(y, train), _rows(X, test), _rows(y, test)
+    result = {"fit_error": None}
+    start = time.perf_counter()
+    try:
+        estimator.fit(X_train, y_train)
+    except Exception as e:
+        if error_score == "raise":
+            raise
+        result.update(fit_time=time.perf_counter() - start, score_time=0.0, fit_error=repr(e),
+                      test_score=error_score)
+        if return_train_score:
+            result["train_score"] = error_score
+    else:
+        result["fit_time"] = time.perf_counter() - start
+        start = time.perf_counter()
+        result["test_score"] = scorer(estimator, X_test, y_test)
+        result["score_time"] = time.perf_counter() - start
+        if return_train_score:
+            result["train_score"] = scorer(estimator, X_train, y_train)
+
+    result = _to_json(result)
+    # One write per line, so that records appended by concurrent workers don't interleave
+    with open(journal_path, "a") as f:
+        f.write(json.dumps({"key": key, "params": parameters, "result": result}) + "\n")
+    return result
+
+
+def _cv_results(candidates, results, n_splits, return_train_score):
+    """
+    Arranges the (candidate, fold) results in the `cv_results_` layout of
+    scikit-learn's searches, with the same statistics and ranking.
+    """
+    n_candidates = len(candidates)
+    cv_results = {}
+
+    def store(name, values, rank=False):
+        array = np.array(values, dtype=np.float64).reshape(n_candidates, n_splits)
+        if name.endswith("_score"):
+            for split in range(n_splits):
+                cv_results[f"split{split}_{name}"] = array[:, split]
+        means = np.average(array, axis=1)
+        cv_results[f"mean_{name}"] = means
+        cv_results[f"std_{name}"] = np.sqrt(np.average((array - means[:, np.newaxis]) ** 2, axis=1))
+        if rank:
+            if np.isnan(means).all():
+                ranks = np.ones_like(means, dtype=np.int32)
+            else:
+                # Failed configurations are ranked last
+                ranks = rankdata(-np.nan_to_num(means, nan=np.nanmin(means) - 1), method="min").astype(np.int32)
+            cv_results[f"rank_{name}"] = ranks
+
+    store("fit_time", [result["fit_time"] for result in results])
+    store("score_time", [result["score_time"] for result in results])
+    for name in sorted({name for parameters in candidates for name in parameters}):
+        column = MaskedArray(np.empty(n_candidates, dtype=object), mask=True)
+        for i, parameters in enumerate(candidates):
+            if name in parameters:
+                column[i] = parameters[name]
+        cv_results[f"param_{name}"] = column
+    cv_results["params"] = candidates
+    store("test_score", [result["test_score"] for result in results], rank=True)
+    if return_train_score:
+        store("train_score", [result["train_score"] for result in results])
+    return cv_results
+
+
+def _load_journal(journal_path, fingerprint):
+    """Returns the fits recorded in a journal, starting a new one if it belongs to another search."""
+    completed = {}
+    if os.path.exists(journal_path):
+        with open(journal_path) as f:
+            content = f.read()
+        lines = content.splitlines()
+        if lines and json.loads(lines[0]).get("fingerprint") == fingerprint:
+            valid = lines[:1]
+            for line in lines[1:]:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last record of a killed run can be cut short
+                    continue
+                completed[record["key"]] = record["result"]
+                valid.append(line)
+            if len(valid) < len(lines) or not content.endswith("\n"):
+                # Drop the cut short record, so that new records start on a line of their own
+                with open(journal_path + ".part", "w") as f:
+                    f.write("\n".join(valid) + "\n")
+                os.replace(journal_path + ".part", journal_path)
+            return completed
+    with open(journal_path, "w") as f:
+        f.write(json.dumps({"fingerprint": fingerprint}) + "\n")
+    return completed
+
+
+def journaled_fit(search, X_train, y_train, journal_path):
+    """
+    Fits a random or grid search, recording every completed fit in a journal so that a killed run can resume
+
+    The configurations of the search are drawn with ParameterSampler (or
+    enumerated with ParameterGrid) and crossed with the folds of its `cv`, as
+    scikit-learn does. Each (parameters, fold) fit is cloned, fitted and
+    scored here, and appended to `journal_path` as a JSON line with its scores
+    and timings as soon as it finishes. When the search is run again on the
+    same data with the same settings, the fits found in the journal are not
+    repeated. A journal written for other data or settings is discarded. The
+    results are stored on `search` in the attributes scikit-learn sets
+    (`cv_results_`, `best_params_`, `best_estimator_`, ...), so it ends up
+    like an uninterrupted `search.fit`, apart from the recorded timings.
+    Only single-metric scoring is supported.
+
+    Parameters
+    ----------
+    search :
+        unfitted RandomizedSearchCV or GridSearchCV
+    X_train : numpy array or pandas DataFrame
+        X in the training data
+    y_train :
+        y in the training data
+    journal_path : str
+        path of the JSON lines journal
+
+    Returns
+    ----------
+        the fitted search
+    """
+    if isinstance(search, RandomizedSearchCV):
+        candidates = list(ParameterSampler(search.param_distributions, search.n_iter, random_state=search.random_state))
+    elif isinstance(search, GridSearchCV):
+        candidates = list(ParameterGrid(search.param_grid))
+    else:
+        raise ValueError("Only RandomizedSearchCV and GridSearchCV searches can be journaled")
+    if not (search.scoring is None or isinstance(search.scoring, str) or callable(search.scoring)):
+        raise ValueError("Only single-metric searches can be journaled")
+
+    params = {name: value for name, value in search.get_params(deep=True).items()
+              if name.split("__")[-1] not in _EXECUTION_PARAMS}
+    # The version changes with the layout of the records, so that older journals are discarded
+    fingerprint = joblib.hash({"version": 2, "search": type(search).__name__, "params": params,
+                               "X": X_train, "y": y_train})
+    completed = _load_journal(journal_path, fingerprint)
+
+    cv = check_cv(search.cv, y_train, classifier=is_classifier(search.estimator))
+    splits = list(cv.split(X_train, y_train))
+    scorer = check_scoring(search.estimator, scoring=search.scoring)
+    fits = [(parameters, train, test) for parameters in candidates for train, test in splits]
+    keys = [joblib.hash({"parameters": parameters, "train": train, "test": test}) for parameters, train, test in fits]
+
+    pending = [i for i, key in enumerate(keys) if key not in completed]
+    fitted = joblib.Parallel(n_jobs=search.n_jobs, pre_dispatch=search.pre_dispatch)(
+        joblib.delayed(_fit_and_record)(search.estimator, X_train, y_train, *fits[i], scorer,
+                                        search.return_train_score, search.error_score, journal_path, keys[i])
+        for i in pending
+    )
+    completed.update(zip([keys[i] for i in pending], fitted))
+    results = [completed[key] for key in keys]
+
+    search.cv_results_ = _cv_results(candidates, results, len(splits), search.return_train_score)
+    search.multimetric_ = False
+    search.scorer_ = scorer
+    search.n_splits_ = len(splits)
+    search.best_index_ = int(search.cv_results_["rank_test_score"].argmin())
+    search.best_params_ = candidates[search.best_index_]
+    search.best_score_ = search.cv_results_["mean_test_score"][search.best_index_]
+    if search.refit:
+        start = time.perf_counter()
+        search.best_estimator_ = clone(search.estimator).set_params(**clone(search.best_params_, safe=False))
+        search.best_estimator_.fit(X_train, y_train)
+        search.refit_time_ = time.perf_counter() - start
+        if hasattr(search.best_estimator_, "feature_names_in_"):
+            search.feature_names_in_ = search.best_estimator_.feature_names_in_
+    return search
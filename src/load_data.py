@@ -0,0 +1,231 @@
+# load_data.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import os
+import importlib.util
+import numpy as np
+import pandas as pd
+from src.data_validation import FEATURE_RANGES, RISK_LEVELS
+
+# The pyarrow CSV parser is multithreaded, fall back to pandas' C parser without it
+FAST_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
+
+def _narrowest_dtype(dtype, low, high):
+    """Returns the smallest dtype that holds every valid value of a feature."""
+    if dtype is float:
+        # The measurements have at most 4 significant digits, well within float32 precision
+        return np.dtype("float32")
+    for candidate in ("int8", "int16", "int32"):
+        info = np.iinfo(candidate)
+        if info.min <= low and high <= info.max:
+            return np.dtype(candidate)
+    return np.dtype("int64")
+
+
+COMPACT_DTYPES = {
+    **{name: _narrowest_dtype(*rule) for name, rule in FEATURE_RANGES.items()},
+    "RiskLevel": pd.CategoricalDtype(sorted(RISK_LEVELS))
+}
+
+
+def read_maternal_csv(path, compact=True, **kwargs):
+    """
+    Reads a maternal health risk CSV with the project's schema applied at parse time
+
+    With `compact` set, the integer features are parsed as int8/int16, the float
+    features as float32 and RiskLevel as a categorical, which takes a fraction of
+    the memory of pandas' default int64/float64/object columns. Only use it on
+    validated data: a missing or out of range value cannot be stored in these
+    types and makes parsing fail. Files are parsed with the multithreaded pyarrow
+    engine when it is installed and no `chunksize` is given.
+
+    Parameters
+    ----------
+    path : str
+        path to the CSV file
+    compact : bool, optional
+        whether to parse the columns with the compact dtypes
+    **kwargs :
+        passed on to `pd.read_csv`
+
+    Returns
+    ----------
+        pandas DataFrame, or an iterator of DataFrames if `chunksize` is given
+    """
+    if compact:
+        kwargs["dtype"] = {**COMPACT_DTYPES, **kwargs.get("dtype", {})}
+    if "engine" not in kwargs:
+        kwargs["engine"] = "c" if kwargs.get("chunksize") else FAST_ENGINE
+    return pd.read_csv(path, **kwargs)
+
+
+def to_compact(df):
+    """Returns a copy of validated maternal health data with the compact dtypes."""
+    return df.astype({name: dtype for name, dtype in COMPACT_DTYPES.items() if name in df.columns})
+
+
+def write_maternal_data(df, path):
+    """
+    Writes a dataframe as CSV, Feather or Parquet depending on the extension of `path`
+
+    Feather files are written uncompressed so that they can be memory-mapped back
+    without decoding. Column names are stored as strings in the columnar formats.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        the data to write
+    path : str
+        destination ending in .csv, .feather or .parquet
+
+    Returns
+    ----------
+    None
+    """
+    extension = os.path.splitext(path)[1]
+    if extension == ".csv":
+        df.to_csv(path, index=False)
+        return
+
+    df = df.reset_index(drop=True)
+    df.columns = df.columns.astype(str)
+    if extension == ".feather":
+        # A single record batch lets readers map each column as one contiguous array
+        df.to_feather(path, compression="uncompressed", chunksize=max(len(df), 1))
+    elif extension == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unsupported data format '{extension}', expected .csv, .feather or .parquet")
+
+
+class _FeatherWriter:
+    """
+    Collects the chunks of a Feather file and writes them as a single record batch on `close`,
+    so that the file can be memory-mapped back without copies by `read_maternal_data`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tables = []
+
+    def write_table(self, table):
+        self.tables.append(table)
+
+    def close(self):
+        import pyarrow as pa
+        table = pa.concat_tables(self.tables).combine_chunks()
+        with pa.ipc.new_file(self.path, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+
+
+def append_maternal_data(writers, path, chunk):
+    """
+    Appends a chunk to a CSV, Feather or Parquet file, opening its writer on the first chunk
+
+    CSV and Parquet chunks are written as they come. Feather files are written
+    as one record batch when their writer is closed, so their rows are held in
+    memory as Arrow arrays until then.
+
+    Parameters
+    ----------
+    writers : dict
+        open writers keyed by path, shared by the calls writing the same files;
+        the caller closes the ones that are not None when done
+    path : str
+        destination ending in .csv, .feather or .parquet
+    chunk : pandas DataFrame
+        the rows to append
+
+    Returns
+    ----------
+    None
+    """
+    extension = os.path.splitext(path)[1]
+    if extension == ".csv":
+        chunk.to_csv(path, index=False, mode="a" if path in writers else "w", header=path not in writers)
+        writers[path] = None
+        return
+
+    import pyarrow as pa
+    table = pa.Table.from_pandas(chunk.rename(columns=str), preserve_index=False)
+    if path not in writers:
+        if extension == ".feather":
+            writers[path] = _FeatherWriter(path)
+        elif extension == ".parquet":
+            import pyarrow.parquet as pq
+            writers[path] = pq.ParquetWriter(path, table.schema)
+        else:
+            raise ValueError(f"Unsupported data format '{extension}', expected .csv, .feather or .parquet")
+    writers[path].write_table(table)
+
+
+def read_maternal_data(path, **kwargs):
+    """
+    Reads processed maternal health data from CSV, Feather, Parquet or .npy
+
+    Only .npy and uncompressed Feather files are read without a copy: .npy files
+    are returned as a read-only `np.memmap`, and the numeric columns of Feather
+    files are pandas views on the memory-mapped Arrow buffers. Parquet files are
+    decoded into pandas memory like CSV files, which are read with
+    `read_maternal_csv`.
+
+    Parameters
+    ----------
+    path : str
+        path ending in .csv, .feather, .parquet or .npy
+    **kwargs :
+        passed on to `read_maternal_csv` for CSV files
+
+    Returns
+    ----------
+        pandas DataFrame, or numpy memmap for .npy files
+    """
+    extension = os.path.splitext(path)[1]
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r")
+    if extension == ".feather":
+        import pyarrow.feather as feather
+        # split_blocks keeps one pandas block per column, so that columns are not copied into a 2D block
+        return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+    if extension == ".parquet":
+        return pd.read_parquet(path, memory_map=True)
+    return read_maternal_csv(path, **kwargs)
+
+
+def memmap_training_data(X_train, y_train, directory):
+    """
+    Writes the training features and labels once as contiguous .npy files and maps them back read-only
+
+    Worker processes of joblib, and so of scikit-learn's searches and
+    cross_validate, receive arrays backed by a memory-mapped file as a
+    reference to the file instead of a pickled copy. All the workers then read
+    the same pages of the page cache, rather than each holding its own copy
+    of the training data.
+
+    Parameters
+    ----------
+    X_train : pandas DataFrame
+        X in the training data
+    y_train : pandas Series
+        y in the training data
+    directory : str
+        existing directory where X.npy and y.npy are written
+
+    Returns
+    ----------
+        tuple of a pandas DataFrame with the columns of `X_train` that is a view
+        on the mapped features, and the mapped labels as a numpy array
+    """
+    X = np.ascontiguousarray(X_train.to_numpy(dtype=np.result_type(*X_train.dtypes)))
+    # String labels are stored as fixed width unicode, since object arrays cannot be mapped
+    y = y_train.to_numpy()
+    if y.dtype == object:
+        y = y.astype(str)
+
+    X_path, y_path = os.path.join(directory, "X.npy"), os.path.join(directory, "y.npy")
+    np.save(X_path, X)
+    np.save(y_path, y)
+    X_mapped = pd.DataFrame(np.load(X_path, mmap_mode="r"), columns=X_train.columns, copy=False)
+    return X_mapped, np.load(y_path, mmap_mode="r")
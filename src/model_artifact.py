@@ -0,0 +1,125 @@
+# model_artifact.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import json
+import struct
+import pickle
+import hashlib
+import numpy as np
+import sklearn
+
+# First bytes of every model artifact, followed by the header length and the JSON header
+MAGIC = b"MHCMODEL"
+FORMAT_VERSION = 1
+
+
+def _json_default(value):
+    """Converts the numpy values found in parameters and labels to plain JSON values."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def save_model(estimator, path, feature_names=None, metadata=None):
+    """
+    Saves a fitted estimator as a slim model artifact
+
+    The artifact starts with `MAGIC`, the length of a JSON header and the
+    header itself, which records the estimator class, the scikit-learn
+    version, the feature names, the class labels and the sha256 of the
+    payload. The payload is the pickled estimator alone, without any search
+    results, so the artifact is small and quick to load.
+
+    Parameters
+    ----------
+    estimator :
+        fitted scikit-learn model
+    path : str
+        destination of the artifact
+    feature_names : list of str, optional
+        names of the features, taken from `estimator.feature_names_in_` if not given
+    metadata : dict, optional
+        JSON serializable information stored in the header, e.g. the best parameters
+
+    Returns
+    ----------
+        dict, the header written to the artifact
+    """
+    if feature_names is None and hasattr(estimator, "feature_names_in_"):
+        feature_names = estimator.feature_names_in_
+    payload = pickle.dumps(estimator, protocol=pickle.HIGHEST_PROTOCOL)
+    header = {
+        "format_version": FORMAT_VERSION,
+        "estimator": f"{type(estimator).__module__}.{type(estimator).__qualname__}",
+        "sklearn_version": sklearn.__version__,
+        "feature_names": [str(name) for name in feature_names] if feature_names is not None else None,
+        "classes": getattr(estimator, "classes_", None),
+        "payload_sha256": hashlib.sha256(payload).hexdigest(),
+        "payload_bytes": len(payload),
+        "metadata": metadata or {},
+    }
+    encoded = json.dumps(header, default=_json_default).encode()
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+        f.write(payload)
+    return json.loads(encoded)
+
+
+def is_model_artifact(path):
+    """Returns whether the file at `path` is a model artifact rather than a plain pickle."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _read_header(f):
+    """Reads the header of an artifact opened at its start, leaving `f` at the payload."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a model artifact")
+    (length,) = struct.unpack("<I", f.read(4))
+    header = json.loads(f.read(length))
+    if header["format_version"] > FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact version {header['format_version']}")
+    return header
+
+
+def read_header(path):
+    """Returns the JSON header of a model artifact without loading the model."""
+    with open(path, "rb") as f:
+        return _read_header(f)
+
+
+def load_model(path, verify=True):
+    """
+    Loads the fitted estimator of a model artifact, or of a pickled search object
+
+    Files that do not start with `MAGIC` are unpickled as before, and the
+    `best_estimator_` of a pickled search is returned.
+
+    Parameters
+    ----------
+    path : str
+        path of the model artifact or pickle
+    verify : bool, optional
+        whether to check the payload against the sha256 of the header
+
+    Returns
+    ----------
+        fitted scikit-learn model
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            f.seek(0)
+            model = pickle.load(f)
+            return getattr(model, "best_estimator_", model)
+        f.seek(0)
+        header = _read_header(f)
+        payload = f.read()
+
+    if len(payload) != header["payload_bytes"]:
+        raise ValueError("The model artifact is truncated")
+    if verify and hashlib.sha256(payload).hexdigest() != header["payload_sha256"]:
+        raise ValueError("The model artifact does not match its checksum")
+    return pickle.loads(payload)
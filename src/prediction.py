@@ -0,0 +1,212 @@
+# prediction.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from src.data_validation import data_validation, upcast_float_features, widen_compact_dtypes
+from src.load_data import append_maternal_data
+from src.model_artifact import load_model
+
+# The model of the current process, loaded once by `_init_worker`
+_MODEL = None
+
+
+def _init_worker(model_path):
+    """Loads the model once in each worker process."""
+    global _MODEL
+    _MODEL = load_model(model_path)
+
+
+def _apply(func, chunk, args):
+    """Calls `func` with the model of the current process."""
+    return func(_MODEL, chunk, *args)
+
+
+def _predict_chunk(model, chunk, csv_column=None):
+    """
+    Returns the predictions of the model on a chunk, or the CSV rows of the
+    chunk with the predictions in `csv_column` if it is given.
+    """
+    predictions = model.predict(chunk[list(model.feature_names_in_)])
+    if csv_column is None:
+        return predictions
+    # Formatting CSV text is the slowest step, so it is done by the workers
+    return chunk.assign(**{csv_column: predictions}).to_csv(index=False, header=False)
+
+
+def read_input_chunks(path, chunksize):
+    """
+    Reads maternal health data, with or without RiskLevel, from a CSV or Parquet file one chunk at a time
+
+    Parameters
+    ----------
+    path : str
+        path ending in .csv or .parquet
+    chunksize : int
+        number of rows per chunk
+
+    Returns
+    ----------
+        iterator of pandas DataFrames with the dtypes of the validation schema,
+        indexed by their row number in the file
+    """
+    extension = os.path.splitext(path)[1]
+    if extension == ".parquet":
+        import pyarrow.parquet as pq
+        start = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            chunk = widen_compact_dtypes(batch.to_pandas())
+            chunk.index += start
+            start += len(chunk)
+            yield chunk
+    elif extension == ".csv":
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            yield upcast_float_features(chunk)
+    else:
+        raise ValueError(f"Unsupported input format '{extension}', expected .csv or .parquet")
+
+
+def map_chunks(func, chunks, model_path, n_jobs=1, max_pending=None, engine="numpy", require_target=False, args=()):
+    """
+    Validates chunks of data and applies a function of the model to them in worker processes
+
+    Each worker loads the model once. Chunks are validated with
+    `data_validation` in this process, as the error report of pandera does
+    not survive the trip back from a worker, and at most `max_pending` of
+    them are sent ahead of the one being yielded, which bounds the number
+    of chunks held in memory.
+
+    Parameters
+    ----------
+    func : callable
+        top-level function called as `func(model, chunk, *args)` in the workers
+    chunks :
+        an iterable of dataframes, e.g. from `read_input_chunks`
+    model_path : str
+        model artifact (.model) or pickled search object
+    n_jobs : int, optional
+        number of worker processes, -1 for all cores; 1 runs `func` in this process
+    max_pending : int, optional
+        maximum number of chunks being processed at once, twice the number of workers by default
+    engine : str, optional
+        the validation engine, "numpy" or "pandera"
+    require_target : bool, optional
+        whether the chunks are validated with their RiskLevel column
+    args : tuple, optional
+        further arguments of `func`
+
+    Returns
+    ----------
+        iterator of (chunk, result of `func`) pairs, in input order
+    """
+    n_workers = n_jobs if n_jobs > 0 else max((os.cpu_count() or 1) + 1 + n_jobs, 1)
+    if max_pending is None:
+        max_pending = 2 * n_workers
+
+    if n_workers == 1:
+        _init_worker(model_path)
+        for chunk in chunks:
+            data_validation(chunk, engine=engine, require_target=require_target)
+            yield chunk, func(_MODEL, chunk, *args)
+        return
+
+    with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(model_path,)) as executor:
+        pending = deque()
+        try:
+            for chunk in chunks:
+                data_validation(chunk, engine=engine, require_target=require_target)
+                pending.append((chunk, executor.submit(_apply, func, chunk, args)))
+                # Waiting on the oldest chunk keeps the output in order and bounds the chunks held in memory
+                if len(pending) >= max_pending:
+                    chunk, future = pending.popleft()
+                    yield chunk, future.result()
+            while pending:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def predict_file(input_path, model_path, output_path, chunksize=100_000, n_jobs=1, engine="numpy",
+                 max_pending=None, prediction_column="PredictedRiskLevel"):
+    """
+    Predicts the risk level of every row of a large unlabeled file, one chunk at a time
+
+    The input is read in chunks that are validated and predicted by a pool
+    of worker processes with `map_chunks`. At most `max_pending` chunks are
+    read ahead of the one being written, so memory use depends on the chunk
+    size and not on the size of the file, except for Feather output, which
+    is kept as Arrow arrays until it is written in one piece. The rows are written in input order, with their predictions in
+    an extra column, to a temporary file that replaces `output_path` once
+    every chunk has been predicted. For CSV output the workers also format
+    the rows, which takes longer than predicting them.
+
+    Parameters
+    ----------
+    input_path : str
+        unlabeled data ending in .csv or .parquet
+    model_path : str
+        model artifact (.model) or pickled search object
+    output_path : str
+        destination ending in .csv, .feather or .parquet
+    chunksize : int, optional
+        number of rows read, validated and predicted at a time
+    n_jobs : int, optional
+        number of worker processes, -1 for all cores; 1 predicts in this process
+    engine : str, optional
+        the validation engine, "numpy" or "pandera"
+    max_pending : int, optional
+        maximum number of chunks being predicted at once, twice the number of workers by default
+    prediction_column : str, optional
+        name of the column holding the predictions
+
+    Returns
+    ----------
+        dict with the number of "rows" and "chunks" predicted, the "seconds"
+        taken and the throughput in "rows_per_second"
+    """
+    root, extension = os.path.splitext(output_path)
+    part_path = root + ".part" + extension
+    csv_column = prediction_column if extension == ".csv" else None
+
+    start = time.perf_counter()
+    rows, n_chunks = 0, 0
+    writers = {}
+    try:
+        chunks = read_input_chunks(input_path, chunksize)
+        results = map_chunks(_predict_chunk, chunks, model_path, n_jobs=n_jobs, max_pending=max_pending,
+                             engine=engine, args=(csv_column,))
+        for chunk, result in results:
+            if csv_column is None:
+                append_maternal_data(writers, part_path, chunk.assign(**{prediction_column: result}))
+            else:
+                if part_path not in writers:
+                    writers[part_path] = open(part_path, "w", newline="")
+                    writers[part_path].write(pd.DataFrame(columns=[*chunk.columns, csv_column]).to_csv(index=False))
+                writers[part_path].write(result)
+            rows += len(chunk)
+            n_chunks += 1
+    except BaseException:
+        _close(writers)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    _close(writers)
+    if n_chunks == 0:
+        raise ValueError("Cannot predict on an empty file.")
+    os.replace(part_path, output_path)
+
+    seconds = time.perf_counter() - start
+    return {"rows": rows, "chunks": n_chunks, "seconds": seconds, "rows_per_second": rows / seconds}
+
+
+def _close(writers):
+    """Closes the open output writers."""
+    for writer in writers.values():
+        if writer is not None:
+            writer.close()
@@ -1,41 +1,279 @@
 import os
+import json
+import time
+import shutil
+import hashlib
 import zipfile
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
-def read_zip(url, directory):
+# Size of the blocks streamed from the network and out of the archive
+CHUNK_SIZE = 1024 * 1024
+
+# Name of the cache manifest kept in the extraction directory
+CACHE_MANIFEST = '.read_zip_cache.json'
+
+# Serialises updates to the cache manifest when several archives share a directory
+_MANIFEST_LOCK = threading.Lock()
+
+
+def _sha256(path, chunk_size):
+    """Return the hex sha256 digest of the file at `path`, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_manifest(directory):
+    """Return the cache manifest of `directory`, or an empty one if there is none."""
+    manifest_path = os.path.join(directory, CACHE_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path) as file:
+            return json.load(file)
+    except ValueError:
+        # A corrupt manifest only costs a fresh download
+        return {}
+
+
+def _update_manifest(directory, url, entry):
+    """Atomically record the cache `entry` of `url` in the manifest of `directory`."""
+    manifest_path = os.path.join(directory, CACHE_MANIFEST)
+    with _MANIFEST_LOCK:
+        # Re-read under the lock so that concurrent downloads don't drop each other's entries
+        manifest = _load_manifest(directory)
+        manifest[url] = entry
+        with open(manifest_path + '.part', 'w') as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+        os.replace(manifest_path + '.part', manifest_path)
+
+
+def _members_match(directory, members, chunk_size):
+    """Check that every extracted member on disk still has its recorded sha256."""
+    for name, digest in members.items():
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path) or _sha256(path, chunk_size) != digest:
+            return False
+    return True
+
+
+def _download(url, zip_path, chunk_size, max_retries, conditional_headers=None, session=None):
+    """
+    Stream the file at `url` into `zip_path`, resuming a partial download if possible.
+
+    The body is written in `chunk_size` blocks to a `.part` file next to `zip_path`,
+    which is only renamed once the download is complete. When a `.part` file is
+    already present (e.g. from a dropped connection), an HTTP Range request is
+    sent so that only the missing bytes are fetched. Otherwise `conditional_headers`
+    are sent, and a 304 Not Modified response leaves `zip_path` untouched.
+
+    Parameters:
+    ----------
+    url : str
+        The URL of the file to download.
+    zip_path : str
+        The path the completed download is written to.
+    chunk_size : int
+        Number of bytes read from the response at a time.
+    max_retries : int
+        Number of times an interrupted download is resumed before giving up.
+    conditional_headers : dict, optional
+        Headers such as If-None-Match that are sent when no partial download exists.
+    session : requests.Session, optional
+        Session whose connection pool is used for the request.
+
+    Returns:
+    -------
+    tuple of (bool, int, requests.structures.CaseInsensitiveDict)
+        Whether the remote file was modified, the number of bytes downloaded
+        and the headers of the last response.
+    """
+    http = session if session is not None else requests
+    part_path = zip_path + '.part'
+    attempt = 0
+    downloaded = 0
+    while True:
+        resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={resume_from}-'} if resume_from else dict(conditional_headers or {})
+        try:
+            with http.get(url, headers=headers, stream=True) as response:
+                if response.status_code == 304 and not resume_from:
+                    return False, downloaded, response.headers
+                if response.status_code == 416 and resume_from:
+                    # The partial file does not match the remote one, start over
+                    os.remove(part_path)
+                    continue
+                if response.status_code not in (200, 206):
+                    raise ValueError('The URL provided does not exist.')
+
+                # A server that ignores the Range header sends the whole file again
+                mode = 'ab' if response.status_code == 206 else 'wb'
+                offset = resume_from if response.status_code == 206 else 0
+                # Content-Length is only comparable to the bytes written for unencoded bodies
+                expected = None
+                if 'Content-Encoding' not in response.headers:
+                    expected = response.headers.get('Content-Length')
+                written = 0
+                with open(part_path, mode) as file:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        file.write(chunk)
+                        written += len(chunk)
+                        downloaded += len(chunk)
+
+            if expected is not None and written < int(expected):
+                raise requests.exceptions.ChunkedEncodingError(
+                    f'Connection closed after {offset + written} bytes.'
+                )
+            break
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError):
+            attempt += 1
+            if attempt > max_retries:
+                raise
+
+    os.replace(part_path, zip_path)
+    return True, downloaded, response.headers
+
+
+def _extract(zip_ref, directory, chunk_size):
+    """
+    Extract every member of an open zip file into `directory`, one block at a time.
+
+    Members are copied in `chunk_size` blocks so that large files are never held in
+    memory, and each one is written to a temporary file that replaces the target
+    once it is complete.
+
+    Parameters:
+    ----------
+    zip_ref : zipfile.ZipFile
+        The open zip file.
+    directory : str
+        The directory where the contents of the zip file will be extracted.
+    chunk_size : int
+        Number of bytes copied at a time.
+
+    Returns:
+    -------
+    dict
+        The sha256 digest of each extracted file, keyed by member name.
+    """
+    members = {}
+    root = os.path.realpath(directory)
+    for member in zip_ref.infolist():
+        target = os.path.realpath(os.path.join(root, member.filename))
+        if os.path.commonpath([root, target]) != root:
+            raise ValueError('The ZIP file contains a path outside of the directory.')
+
+        if member.is_dir():
+            os.makedirs(target, exist_ok=True)
+            continue
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        digest = hashlib.sha256()
+        with zip_ref.open(member) as source, open(target + '.part', 'wb') as dest:
+            for chunk in iter(lambda: source.read(chunk_size), b''):
+                digest.update(chunk)
+                dest.write(chunk)
+        os.replace(target + '.part', target)
+        members[member.filename] = digest.hexdigest()
+
+    return members
+
+
+def read_zip(url, directory, chunk_size=CHUNK_SIZE, max_retries=3, use_cache=True, session=None):
     """
     Read a zip file from the given URL and extract its contents to the specified directory,
     replacing any existing files in the directory if necessary.
 
+    The archive is streamed to disk in chunks, and an interrupted download is resumed
+    with an HTTP Range request instead of starting over. Members are also streamed
+    out of the archive, so neither step holds a whole file in memory.
+
+    When `use_cache` is set, a manifest in `directory` records the ETag/Last-Modified
+    of each URL together with the sha256 of the archive and of every extracted member.
+    Later calls send a conditional request and skip both the download and the
+    extraction when the archive and the files on disk are unchanged.
+
     Parameters:
     ----------
     url : str
         The URL of the zip file to be read.
     directory : str
         The directory where the contents of the zip file will be extracted.
+    chunk_size : int, optional
+        Number of bytes downloaded and extracted at a time. Defaults to 1 MiB.
+    max_retries : int, optional
+        Number of times an interrupted download is resumed before giving up. Defaults to 3.
+    use_cache : bool, optional
+        Whether to consult and update the cache manifest. Defaults to True.
+    session : requests.Session, optional
+        Session to download through, so that connections can be pooled across calls.
 
     Returns:
     -------
-    None
+    dict
+        A summary with the `status` of the call ('extracted', 'unchanged' when the
+        downloaded archive matched the cache, or 'not-modified' when the server
+        answered 304), the number of `bytes` downloaded and the extracted `members`.
     """
 
+    fetched = _fetch(url, directory, chunk_size, max_retries, use_cache, session)
+    return _extract_fetched(fetched, directory, chunk_size, use_cache)
+
+
+def _fetch(url, directory, chunk_size, max_retries, use_cache, session):
+    """
+    Download the archive at `url` into `directory` unless the cached copy is current.
+
+    Returns:
+    -------
+    dict
+        The `url`, the `zip_path` of the archive, its cache `entry`, whether it was
+        `modified`, the number of bytes `downloaded`, the response `headers` and
+        the `archive_sha256`.
+    """
     if not os.path.isdir(directory):
         raise ValueError('The directory provided does not exist.')
 
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise ValueError('The URL provided does not exist.')
-
     filename = os.path.basename(url)
     if not filename.endswith('.zip'):
         raise ValueError('The URL provided does not point to a zip file.')
 
     zip_path = os.path.join(directory, filename)
-    with open(zip_path, 'wb') as file:
-        file.write(response.content)
+    entry = _load_manifest(directory).get(url) if use_cache else None
+
+    # Only ask the server for changes if the cached archive is still intact
+    conditional_headers = {}
+    if entry and os.path.isfile(zip_path) and _sha256(zip_path, chunk_size) == entry['archive_sha256']:
+        if entry.get('etag'):
+            conditional_headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            conditional_headers['If-Modified-Since'] = entry['last_modified']
+
+    modified, downloaded, headers = _download(
+        url, zip_path, chunk_size, max_retries, conditional_headers, session
+    )
+    archive_sha256 = entry['archive_sha256'] if not modified else _sha256(zip_path, chunk_size)
+    return {'url': url, 'zip_path': zip_path, 'entry': entry, 'modified': modified, 'downloaded': downloaded,
+            'headers': headers, 'archive_sha256': archive_sha256}
+
+
+def _extract_fetched(fetched, directory, chunk_size, use_cache):
+    """Extract an archive returned by `_fetch`, unless it and its extracted files are unchanged."""
+    entry, modified, downloaded = fetched['entry'], fetched['modified'], fetched['downloaded']
+    headers, archive_sha256 = fetched['headers'], fetched['archive_sha256']
+
+    if entry and entry['archive_sha256'] == archive_sha256 and _members_match(directory, entry['members'], chunk_size):
+        status = 'unchanged' if modified else 'not-modified'
+        print(f"Archive unchanged, skipping extraction of: {list(entry['members'])}")
+        return {'status': status, 'bytes': downloaded, 'members': list(entry['members'])}
 
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        with zipfile.ZipFile(fetched['zip_path'], 'r') as zip_ref:
             zip_file_contents = zip_ref.namelist()
 
             # Check if the zip file is empty
@@ -49,13 +287,134 @@ def read_zip(url, directory):
                     if os.path.isfile(file_path):
                         os.remove(file_path)
                     elif os.path.isdir(file_path):
-                        import shutil
                         shutil.rmtree(file_path)
 
             # Extract the zip file
-            zip_ref.extractall(directory)
+            members = _extract(zip_ref, directory, chunk_size)
     except zipfile.BadZipFile:
         raise ValueError('The provided file is not a valid zip file.')
 
+    if use_cache:
+        # Keep the validators of the original response if the server answered 304
+        _update_manifest(directory, fetched['url'], {
+            'etag': headers.get('ETag') if modified else entry.get('etag'),
+            'last_modified': headers.get('Last-Modified') if modified else entry.get('last_modified'),
+            'archive_sha256': archive_sha256,
+            'members': members,
+        })
 
     print(f"Extraction successful! Extracted files: {zip_file_contents}")
+    return {'status': 'extracted', 'bytes': downloaded, 'members': zip_file_contents}
+
+
+def _overlapping_members(zip_paths):
+    """
+    Return, for each of the archives at `zip_paths`, the paths it shares with another one.
+
+    A path is shared when more than one archive would write or clear it. A directory
+    entry clears the whole directory before extraction, so it overlaps with every path
+    below it in another archive. Directories that are only implied by the paths of
+    their files can be shared.
+    """
+    claims = []
+    for zip_path in zip_paths:
+        try:
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                names = zip_ref.namelist()
+        except zipfile.BadZipFile:
+            # Reported by the extraction of that archive
+            names = []
+        claims.append({name.rstrip('/'): name.endswith('/') for name in names})
+
+    overlapping = [set() for _ in claims]
+    for i, claim in enumerate(claims):
+        for j in range(i + 1, len(claims)):
+            for name, is_dir in claim.items():
+                for other_name, other_is_dir in claims[j].items():
+                    if (name == other_name
+                            or (is_dir and other_name.startswith(name + '/'))
+                            or (other_is_dir and name.startswith(other_name + '/'))):
+                        overlapping[i].add(min(name, other_name))
+                        overlapping[j].add(min(name, other_name))
+    return [sorted(paths) for paths in overlapping]
+
+
+def read_zips(urls, directory, max_workers=4, **kwargs):
+    """
+    Download and extract several zip files concurrently into the specified directory.
+
+    All downloads share one `requests.Session` whose connection pool holds up to
+    `max_workers` connections per host. Once every archive has been fetched, their
+    contents are compared, and archives that would write the same files as another
+    one are marked as failed without being extracted. The other archives are then
+    extracted in parallel. A failing URL is recorded in its result instead of
+    aborting the others.
+
+    Parameters:
+    ----------
+    urls : list of str
+        The URLs of the zip files to be read.
+    directory : str
+        The directory where the contents of the zip files will be extracted.
+    max_workers : int, optional
+        Maximum number of archives fetched at the same time. Defaults to 4.
+    **kwargs :
+        `chunk_size`, `max_retries` and `use_cache`, as in `read_zip`.
+
+    Returns:
+    -------
+    list of dict
+        One result per URL, in the order given, with the `url`, its `status`
+        ('failed' together with an `error` message if it raised), the number of
+        `bytes` downloaded, the elapsed `seconds` and the `throughput` in bytes/s.
+    """
+    if max_workers < 1:
+        raise ValueError('max_workers must be at least 1.')
+
+    filenames = [os.path.basename(url) for url in urls]
+    duplicated = sorted({name for name in filenames if filenames.count(name) > 1})
+    if duplicated:
+        raise ValueError(f'Several URLs would be written to the same file: {duplicated}')
+
+    chunk_size = kwargs.get('chunk_size', CHUNK_SIZE)
+    max_retries = kwargs.get('max_retries', 3)
+    use_cache = kwargs.get('use_cache', True)
+
+    def timed(func, *args):
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception as e:
+            result = e
+        return result, time.perf_counter() - start
+
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetched = list(executor.map(
+                lambda url: timed(_fetch, url, directory, chunk_size, max_retries, use_cache, session), urls
+            ))
+
+            # Archives that would overwrite each other's files are not extracted at all
+            ok = [i for i, (result, _) in enumerate(fetched) if not isinstance(result, Exception)]
+            overlapping = _overlapping_members([fetched[i][0]['zip_path'] for i in ok])
+            for i, paths in zip(ok, overlapping):
+                if paths:
+                    error = ValueError(f'Other archives would be extracted to the same files: {paths}')
+                    fetched[i] = (error, fetched[i][1])
+
+            extracted = list(executor.map(
+                lambda item: timed(_extract_fetched, item[0], directory, chunk_size, use_cache)
+                if not isinstance(item[0], Exception) else (item[0], 0.0),
+                fetched
+            ))
+
+    results = []
+    for url, (_, fetch_seconds), (result, extract_seconds) in zip(urls, fetched, extracted):
+        if isinstance(result, Exception):
+            result = {'status': 'failed', 'error': str(result), 'bytes': 0, 'members': []}
+        seconds = fetch_seconds + extract_seconds
+        results.append({'url': url, **result, 'seconds': seconds, 'throughput': result['bytes'] / seconds})
+    return results
@@ -0,0 +1,130 @@
+# scaling.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from src.load_data import append_maternal_data
+
+
+def fit_scaler(chunks, features):
+    """
+    Fits a StandardScaler one chunk at a time with `partial_fit`
+
+    Parameters
+    ----------
+    chunks :
+        an iterable of dataframes, e.g. `pd.read_csv(path, chunksize=...)`
+    features : list of str
+        the columns to scale
+
+    Returns
+    ----------
+        fitted sklearn StandardScaler
+    """
+    scaler = StandardScaler()
+    for chunk in chunks:
+        scaler.partial_fit(chunk[features])
+    if not hasattr(scaler, "n_samples_seen_"):
+        raise ValueError("Cannot fit the scaler on empty data")
+    return scaler
+
+
+def save_scaler(scaler, path):
+    """Pickles a fitted scaler to `path`."""
+    with open(path, "wb") as f:
+        pickle.dump(scaler, f)
+
+
+def load_scaler(path):
+    """Loads a scaler pickled with `save_scaler`."""
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def scale_chunks(scaler, chunks, passthrough=("RiskLevel",)):
+    """
+    Scales each chunk with a fitted scaler
+
+    The scaled chunks have the same layout as the output of
+    `make_column_transformer((scaler, features), ("passthrough", passthrough))`:
+    integer column names, the scaled features first and the passthrough
+    columns last.
+
+    Parameters
+    ----------
+    scaler : sklearn StandardScaler
+        fitted on the feature columns, e.g. with `fit_scaler`
+    chunks :
+        an iterable of dataframes
+    passthrough : tuple of str, optional
+        columns appended unchanged after the scaled features
+
+    Returns
+    ----------
+        generator of pandas DataFrames
+    """
+    features = list(scaler.feature_names_in_)
+    for chunk in chunks:
+        scaled = pd.DataFrame(scaler.transform(chunk[features]))
+        for name in passthrough:
+            scaled[len(scaled.columns)] = chunk[name].to_numpy()
+        yield scaled
+
+
+def write_scaled(scaled_chunks, n_rows, npy_path, paths=()):
+    """
+    Writes scaled chunks to a float32 memory-mapped .npy file as they are produced
+
+    The features of each chunk are copied straight into their rows of the
+    mapped file, so that only one chunk is ever held in memory. The chunks can
+    also be appended to CSV, Feather or Parquet files.
+
+    Parameters
+    ----------
+    scaled_chunks :
+        an iterable of dataframes from `scale_chunks`
+    n_rows : int
+        total number of rows in the chunks
+    npy_path : str
+        destination of the (n_rows, n_features) float32 feature matrix
+    paths : list of str, optional
+        other destinations, ending in .csv, .feather or .parquet
+
+    Returns
+    ----------
+    None
+    """
+    features = None
+    writers = {}
+    start = 0
+    try:
+        for chunk in scaled_chunks:
+            numeric = chunk.select_dtypes("number")
+            if features is None:
+                features = np.lib.format.open_memmap(
+                    npy_path + ".part", mode="w+", dtype=np.float32, shape=(n_rows, numeric.shape[1])
+                )
+            if start + len(chunk) > n_rows:
+                raise ValueError(f"Got more than the {n_rows} expected rows")
+            features[start:start + len(chunk)] = numeric.to_numpy(dtype=np.float32)
+            start += len(chunk)
+
+            for path in paths:
+                append_maternal_data(writers, path, chunk)
+    finally:
+        for writer in writers.values():
+            if writer is not None:
+                writer.close()
+
+    if features is None:
+        raise ValueError("No rows to write")
+    if start != n_rows:
+        raise ValueError(f"Expected {n_rows} rows but got {start}")
+    features.flush()
+    del features
+    os.replace(npy_path + ".part", npy_path)
+
@@ -0,0 +1,273 @@
+# serving.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import json
+import time
+import asyncio
+from collections import deque
+import numpy as np
+import pandas as pd
+import pandera as pa
+from sklearn.tree import DecisionTreeClassifier
+from src.data_validation import data_validation, upcast_float_features
+from src.compiled_tree import compile_tree, predict_compiled
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 1024 * 1024
+# Number of latest request latencies the percentiles are computed on
+LATENCY_WINDOW = 10_000
+# Length of the window the throughput is measured over, in seconds
+THROUGHPUT_WINDOW_S = 10
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+
+def _failure_report(error):
+    """Returns the failure cases of a pandera SchemaErrors as a list of JSON serializable dicts."""
+    failure_cases = error.failure_cases[["column", "check", "failure_case", "index"]]
+    return json.loads(failure_cases.to_json(orient="records", default_handler=str))
+
+
+class ScoringService:
+    """
+    Serves the predictions of a fitted model over HTTP, coalescing concurrent requests into micro-batches
+
+    Requests are queued and a single batching task collects them until
+    `max_batch_size` records are waiting or `max_wait_ms` have passed since
+    the first one arrived. The records of a batch are validated with
+    `data_validation` and predicted together, which costs little more than
+    predicting a single record. Decision trees are predicted with their
+    compiled form from `compile_tree`.
+
+    Endpoints:
+        POST /predict  a JSON record or list of records, returns {"predictions": [...]}
+        GET /metrics   request, record and batch counts, p50/p99 latency and throughput
+        GET /health    {"status": "ok"}
+
+    Parameters
+    ----------
+    model :
+        fitted scikit-learn classifier with `feature_names_in_`
+    max_batch_size : int, optional
+        number of records after which a batch is predicted without waiting
+    max_wait_ms : float, optional
+        longest time the first request of a batch waits for others
+    """
+
+    def __init__(self, model, max_batch_size=64, max_wait_ms=2.0):
+        self.model = model
+        self.feature_names = list(model.feature_names_in_)
+        self.compiled = compile_tree(model) if isinstance(model, DecisionTreeClassifier) else None
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self._batcher_task = None
+        self.started = time.perf_counter()
+        self.counts = {"requests": 0, "records": 0, "batches": 0, "batched_records": 0, "rejected": 0, "errors": 0}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.completed = deque()
+
+    def _frame(self, records):
+        """Returns the records as a dataframe of the model's features, with float features as floats."""
+        return upcast_float_features(pd.DataFrame.from_records(records, columns=self.feature_names))
+
+    def _predict(self, X):
+        """Returns the predictions of the model on a validated dataframe as a list."""
+        if self.compiled is not None:
+            return predict_compiled(self.compiled, X).tolist()
+        return self.model.predict(X).tolist()
+
+    def _run_batch(self, batch):
+        """Validates and predicts the records of a batch, resolving the future of each request."""
+        valid = [(records, future) for records, future in batch if not future.done()]
+        if not valid:
+            return
+        try:
+            X = self._frame([record for records, _ in valid for record in records])
+            try:
+                data_validation(X, engine="numpy", require_target=False)
+            except pa.errors.SchemaErrors:
+                # Find the invalid requests, so that the valid ones in the batch are still answered
+                checked = []
+                for records, future in valid:
+                    try:
+                        data_validation(self._frame(records), engine="numpy", require_target=False)
+                        checked.append((records, future))
+                    except pa.errors.SchemaErrors as e:
+                        future.set_exception(e)
+                valid = checked
+                if not valid:
+                    return
+                X = self._frame([record for records, _ in valid for record in records])
+
+            predictions = self._predict(X)
+        except Exception as e:
+            for _, future in valid:
+                future.set_exception(e)
+            return
+
+        self.counts["batches"] += 1
+        self.counts["batched_records"] += len(predictions)
+        start = 0
+        for records, future in valid:
+            future.set_result(predictions[start:start + len(records)])
+            start += len(records)
+
+    async def _batcher(self):
+        """Collects queued requests into batches until `max_batch_size` records or `max_wait_ms` is reached."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            size = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                if self.queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self.queue.get_nowait()
+                batch.append(item)
+                size += len(item[0])
+            self._run_batch(batch)
+
+    async def predict(self, records):
+        """Queues a list of records for the next batch and returns their predictions."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((records, future))
+        return await future
+
+    def _prune(self, now):
+        """Drops the completion times older than the throughput window."""
+        while self.completed and self.completed[0] < now - THROUGHPUT_WINDOW_S:
+            self.completed.popleft()
+
+    def metrics(self):
+        """Returns the counters of the service, the p50 and p99 request latency and the recent throughput."""
+        now = time.perf_counter()
+        self._prune(now)
+        latencies = np.array(self.latencies) * 1000
+        window = min(THROUGHPUT_WINDOW_S, now - self.started)
+        return {
+            "requests": self.counts["requests"],
+            "records": self.counts["records"],
+            "batches": self.counts["batches"],
+            "mean_batch_size": self.counts["batched_records"] / self.counts["batches"] if self.counts["batches"] else None,
+            "rejected": self.counts["rejected"],
+            "errors": self.counts["errors"],
+            "latency_ms": {
+                "p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                "p99": float(np.percentile(latencies, 99)) if len(latencies) else None,
+            },
+            "requests_per_second": len(self.completed) / window if window > 0 else None,
+            "uptime_s": now - self.started,
+        }
+
+    async def _handle_predict(self, body):
+        """Answers a POST /predict request, returning its status and JSON payload."""
+        try:
+            records = json.loads(body)
+        except ValueError:
+            return 400, {"error": "The body is not valid JSON"}
+        if isinstance(records, dict):
+            records = [records]
+        if not records or not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            return 400, {"error": "Expected a JSON record or a non-empty list of records"}
+
+        start = time.perf_counter()
+        try:
+            predictions = await self.predict(records)
+        except pa.errors.SchemaErrors as e:
+            self.counts["rejected"] += 1
+            return 422, {"error": "Invalid records", "failure_cases": _failure_report(e)}
+        except Exception as e:
+            self.counts["errors"] += 1
+            return 500, {"error": repr(e)}
+
+        finished = time.perf_counter()
+        self.latencies.append(finished - start)
+        self.completed.append(finished)
+        self._prune(finished)
+        self.counts["requests"] += 1
+        self.counts["records"] += len(records)
+        return 200, {"predictions": predictions}
+
+    async def _route(self, method, path, body):
+        """Returns the status and JSON payload of a request."""
+        if path == "/predict":
+            if method != "POST":
+                return 405, {"error": "Use POST"}
+            return await self._handle_predict(body)
+        if path in ("/metrics", "/health"):
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            return 200, self.metrics() if path == "/metrics" else {"status": "ok"}
+        return 404, {"error": f"Unknown path {path}"}
+
+    async def _handle_connection(self, reader, writer):
+        """Answers the HTTP/1.1 requests of a connection, keeping it open between requests."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        name, value = line.decode("latin-1").split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request"}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": f"The body exceeds {MAX_BODY_BYTES} bytes"}, keep_alive=False)
+                    break
+
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._route(method, path.split("?", 1)[0], body)
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        """Writes a JSON response."""
+        body = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+
+    async def start(self, host="127.0.0.1", port=8000):
+        """Starts the batching task and the HTTP server, returning the asyncio server."""
+        self.queue = asyncio.Queue()
+        self.started = time.perf_counter()
+        self._batcher_task = asyncio.create_task(self._batcher())
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        """Serves requests until cancelled."""
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._batcher_task.cancel()
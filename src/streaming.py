@@ -0,0 +1,108 @@
+# streaming.py
+# author: Shannon Pflueger, Nelli Hovhannisyan, Joseph Lim
+# date: 2024-12-16
+
+import time
+import numpy as np
+from sklearn.base import clone
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from src.hash_split import hash_folds
+
+
+def streaming_cross_validate(read_chunks, models, classes, n_splits=10, epochs=1, seed=111, target="RiskLevel"):
+    """
+    Cross validates models that support `partial_fit` without loading the training data
+
+    Rows are assigned to folds with `hash_folds`, so the folds do not depend on
+    how the file is chunked. Every (model, fold) pipeline of a StandardScaler
+    and the model is trained on the rows outside its fold, one chunk at a time:
+    a first pass over the file fits the scalers, then `epochs` passes train the
+    models, and a last pass scores them on the train and held out rows. Only
+    one chunk and the running accuracy counts are held in memory. The same
+    passes also train each model on every row, which is returned for reuse.
+
+    Parameters
+    ----------
+    read_chunks : callable
+        returns a new iterable of dataframes over the training data on every call,
+        e.g. `lambda: read_maternal_csv(path, chunksize=100_000)`
+    models : dict
+        scikit-learn models supporting `partial_fit`, keyed by name
+    classes : list
+        every class of the target, which `partial_fit` needs up front
+    n_splits : int, optional
+        number of folds
+    epochs : int, optional
+        number of passes over the data to train the models
+    seed : int, optional
+        seeds the fold assignment
+    target : str, optional
+        name of the target column
+
+    Returns
+    ----------
+        tuple of the per-fold arrays of each model, in the format of
+        cross_validate with `return_train_score=True`, and a dict of the
+        pipelines trained on all the rows
+    """
+    # Fold number n_splits trains on every row and is never scored
+    slots = range(n_splits + 1)
+    scalers = {slot: StandardScaler() for slot in slots}
+    fitted = {name: {slot: clone(model) for slot in slots} for name, model in models.items()}
+    fit_time = {name: np.zeros(n_splits + 1) for name in models}
+    score_time = {name: np.zeros(n_splits) for name in models}
+    correct = {name: {"train": np.zeros(n_splits), "test": np.zeros(n_splits)} for name in models}
+    counts = {"train": np.zeros(n_splits), "test": np.zeros(n_splits)}
+
+    def split_chunks():
+        for chunk in read_chunks():
+            yield chunk.drop(columns=[target]), chunk[target].to_numpy(), hash_folds(chunk, n_splits, seed)
+
+    scaler_time = np.zeros(n_splits + 1)
+    for X, _, folds in split_chunks():
+        for slot in slots:
+            train = folds != slot
+            if train.any():
+                start = time.perf_counter()
+                scalers[slot].partial_fit(X[train])
+                scaler_time[slot] += time.perf_counter() - start
+
+    for _ in range(epochs):
+        for X, y, folds in split_chunks():
+            for slot in slots:
+                train = folds != slot
+                if not train.any():
+                    continue
+                X_scaled = scalers[slot].transform(X[train])
+                for name in models:
+                    start = time.perf_counter()
+                    fitted[name][slot].partial_fit(X_scaled, y[train], classes=classes)
+                    fit_time[name][slot] += time.perf_counter() - start
+
+    for X, y, folds in split_chunks():
+        for slot in range(n_splits):
+            X_scaled = scalers[slot].transform(X)
+            for part, rows in (("train", folds != slot), ("test", folds == slot)):
+                counts[part][slot] += rows.sum()
+                if not rows.any():
+                    continue
+                for name in models:
+                    start = time.perf_counter()
+                    correct[name][part][slot] += (fitted[name][slot].predict(X_scaled[rows]) == y[rows]).sum()
+                    score_time[name][slot] += time.perf_counter() - start
+
+    if (counts["test"] == 0).any():
+        raise ValueError("Every fold needs at least one row, use fewer folds or more data")
+
+    scores = {
+        name: {
+            "fit_time": (fit_time[name] + scaler_time)[:n_splits],
+            "score_time": score_time[name],
+            "test_score": correct[name]["test"] / counts["test"],
+            "train_score": correct[name]["train"] / counts["train"],
+        }
+        for name in models
+    }
+    final = {name: make_pipeline(scalers[n_splits], fitted[name][n_splits]) for name in models}
+    return scores, final
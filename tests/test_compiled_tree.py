@@ -0,0 +1,75 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.compiled_tree import compile_tree, apply_compiled, predict_compiled
+
+rng = np.random.default_rng(0)
+X_train = pd.DataFrame({
+    "Age": rng.integers(10, 70, 500), "BS": rng.uniform(6, 19, 500).round(1).astype(np.float32),
+    "HeartRate": rng.integers(60, 90, 500)
+})
+y_train = pd.Series(rng.choice(["high risk", "low risk", "mid risk"], 500))
+
+@pytest.fixture
+def model():
+    return DecisionTreeClassifier(random_state=0).fit(X_train, y_train)
+
+# Test 1: Predictions and leaves agree with scikit-learn
+def test_matches_sklearn(model):
+    compiled = compile_tree(model)
+    X_test = X_train.sample(200, replace=True, random_state=1)
+    X_test["BS"] = rng.uniform(6, 19, 200)
+    assert (predict_compiled(compiled, X_test) == model.predict(X_test)).all()
+    assert (apply_compiled(compiled, X_test) == model.apply(X_test)).all()
+
+# Test 2: Values equal to a threshold go left like in scikit-learn
+def test_thresholds(model):
+    compiled = compile_tree(model)
+    splits = compiled.threshold != np.inf
+    X_test = np.tile(X_train.iloc[:1].to_numpy(dtype=float), (splits.sum(), 1))
+    X_test[np.arange(len(X_test)), compiled.feature[splits]] = compiled.threshold[splits]
+    X_test = pd.DataFrame(X_test, columns=X_train.columns)
+    assert (predict_compiled(compiled, X_test) == model.predict(X_test)).all()
+
+# Test 3: Single records can be given as dicts or 1D arrays, columns are matched by name
+def test_single_records(model):
+    compiled = compile_tree(model)
+    record = X_train.iloc[3]
+    expected = model.predict(X_train.iloc[[3]])
+    assert (predict_compiled(compiled, record.to_dict()) == expected).all()
+    assert (predict_compiled(compiled, record.to_numpy()) == expected).all()
+    assert (predict_compiled(compiled, X_train.iloc[[3], ::-1]) == expected).all()
+
+# Test 4: A tree that is a single leaf predicts its class
+def test_single_leaf():
+    model = DecisionTreeClassifier().fit(X_train, ["low risk"] * len(X_train))
+    assert (predict_compiled(compile_tree(model), X_train) == "low risk").all()
+
+# Test 5: Missing values are rejected
+def test_missing_values(model):
+    X_test = X_train.iloc[:2].astype(float)
+    X_test.iloc[0, 0] = np.nan
+    with pytest.raises(ValueError):
+        predict_compiled(compile_tree(model), X_test)
+
+# Test 6: Inputs with the wrong number of features are rejected instead of read across rows
+def test_wrong_number_of_features(model):
+    compiled = compile_tree(model)
+    with pytest.raises(ValueError, match="2 features"):
+        predict_compiled(compiled, X_train.to_numpy()[:, :2])
+    with pytest.raises(ValueError, match="4 features"):
+        predict_compiled(compiled, np.ones(4))
+    with pytest.raises(ValueError, match="missing"):
+        predict_compiled(compiled, {"Age": 30, "BS": 7.0})
+
+# Test 7: Dicts need the feature names the tree was fitted with
+def test_dict_without_feature_names():
+    compiled = compile_tree(DecisionTreeClassifier(random_state=0).fit(X_train.to_numpy(), y_train))
+    assert compiled.feature_names is None
+    assert predict_compiled(compiled, X_train.to_numpy()[:5]).shape == (5,)
+    with pytest.raises(ValueError, match="feature names"):
+        predict_compiled(compiled, X_train.iloc[0].to_dict())
@@ -3,7 +3,7 @@ import sys
 import os
 import pandas as pd
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.cross_validation import mean_std_cross_val_scores
+from src.cross_validation import mean_std_cross_val_scores, format_cv_scores, cross_validate_models, race_models
 from sklearn.linear_model import LogisticRegression
 
 # Small synthetic dataset
@@ -71,3 +71,139 @@ def test_invalid_kwargs():
         mean_std_cross_val_scores(model, X_train_small, y_train_small, invalid_arg="test")
 
 
+# Larger synthetic dataset for comparing models
+X_train_medium = pd.DataFrame({
+    "feature1": [i % 7 for i in range(40)],
+    "feature2": [(i * 3) % 11 for i in range(40)]
+})
+y_train_medium = pd.Series([int(i % 7 > 3) for i in range(40)])
+
+
+# Test 8: format_cv_scores gives the same output as mean_std_cross_val_scores
+def test_format_cv_scores():
+    from sklearn.model_selection import cross_validate
+    scores = cross_validate(LogisticRegression(), X_train_medium, y_train_medium, cv=4)
+    result = format_cv_scores(scores)
+    expected = mean_std_cross_val_scores(LogisticRegression(), X_train_medium, y_train_medium, cv=4)
+    assert list(result.index) == list(expected.index)
+    assert result["test_score"] == expected["test_score"]
+
+
+# Test 9: Comparing models in parallel gives the same scores as cross validating each one
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_cross_validate_models_matches_serial(n_jobs):
+    from sklearn.model_selection import cross_validate
+    from sklearn.tree import DecisionTreeClassifier
+    models = {"lr": LogisticRegression(), "dt": DecisionTreeClassifier(random_state=0)}
+    result = cross_validate_models(models, X_train_medium, y_train_medium, cv=4, n_jobs=n_jobs,
+                                   return_train_score=True)
+    assert list(result) == ["lr", "dt"]
+    for name, model in models.items():
+        expected = cross_validate(model, X_train_medium, y_train_medium, cv=4, return_train_score=True)
+        assert list(result[name]) == list(expected)
+        for key in ("test_score", "train_score"):
+            assert (result[name][key] == expected[key]).all()
+        assert len(result[name]["fit_time"]) == 4
+
+
+# Test 10: Errors raised by a fit are passed on
+def test_cross_validate_models_error_score():
+    with pytest.raises(ValueError):
+        cross_validate_models({"invalid": LogisticRegression(C=-1)}, X_train_medium, y_train_medium,
+                              cv=2, error_score="raise")
+
+
+# Test 11: Cached results are loaded instead of refitting
+def test_cache_hit(tmp_path, monkeypatch):
+    import src.cross_validation as cross_validation
+    first = mean_std_cross_val_scores(LogisticRegression(), X_train_medium, y_train_medium, cv=4, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cross_validate should not be called on a cache hit")
+    monkeypatch.setattr(cross_validation, "cross_validate", fail)
+    second = mean_std_cross_val_scores(LogisticRegression(), X_train_medium, y_train_medium, cv=4, cache_dir=tmp_path)
+    pd.testing.assert_series_equal(first, second)
+
+
+# Test 12: Changing the data, parameters, folds or scoring misses the cache
+@pytest.mark.parametrize("change", [
+    dict(X_train=X_train_medium + 1),
+    dict(model=LogisticRegression(C=0.5)),
+    dict(cv=5),
+    dict(scoring="f1"),
+])
+def test_cache_miss(tmp_path, change):
+    args = dict(model=LogisticRegression(), X_train=X_train_medium, y_train=y_train_medium, cv=4)
+    mean_std_cross_val_scores(**args, cache_dir=tmp_path)
+    mean_std_cross_val_scores(**{**args, **change}, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+# Test 13: Only the uncached models are fitted when comparing models
+def test_cross_validate_models_cache(tmp_path):
+    from sklearn.tree import DecisionTreeClassifier
+    models = {"lr": LogisticRegression(), "dt": DecisionTreeClassifier(random_state=0)}
+    first = cross_validate_models(models, X_train_medium, y_train_medium, cv=4, cache_dir=tmp_path)
+    models["dt"] = DecisionTreeClassifier(random_state=0, max_depth=2)
+    second, cached = cross_validate_models(models, X_train_medium, y_train_medium, cv=4, cache_dir=tmp_path,
+                                           return_cached=True)
+    assert cached == ["lr"]
+    assert (first["lr"]["fit_time"] == second["lr"]["fit_time"]).all()
+    assert len(list(tmp_path.glob("*.json"))) == 3
+    # The same folds and model give the same key in both functions
+    mean_std_cross_val_scores(LogisticRegression(), X_train_medium, y_train_medium, cv=4, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("*.json"))) == 3
+
+
+# Test 14: The least recently used results are evicted above the size limit
+def test_cache_eviction(tmp_path):
+    for C in (0.1, 0.2, 0.3):
+        mean_std_cross_val_scores(LogisticRegression(C=C), X_train_medium, y_train_medium, cv=4,
+                                  cache_dir=tmp_path, cache_max_bytes=1)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+# Test 15: Racing drops models that are clearly worse and keeps their scores up to that fold
+def test_race_models():
+    from sklearn.dummy import DummyClassifier
+    from sklearn.tree import DecisionTreeClassifier
+    X_train = pd.DataFrame({"feature1": list(range(100)), "feature2": [i % 5 for i in range(100)]})
+    y_train = pd.Series([int(i >= 50) for i in range(100)])
+    models = {"dummy": DummyClassifier(strategy="constant", constant=0), "dt": DecisionTreeClassifier(random_state=0)}
+    scores, eliminated = race_models(models, X_train, y_train, cv=10, n_jobs=1)
+    assert list(eliminated) == ["dummy"]
+    assert 3 <= eliminated["dummy"] < 10
+    assert len(scores["dummy"]["test_score"]) == eliminated["dummy"]
+    assert len(scores["dt"]["test_score"]) == 10
+    full = cross_validate_models(models, X_train, y_train, cv=10, n_jobs=1)
+    assert (scores["dummy"]["test_score"] == full["dummy"]["test_score"][:eliminated["dummy"]]).all()
+    assert (scores["dt"]["test_score"] == full["dt"]["test_score"]).all()
+
+
+# Test 16: Models whose intervals overlap are all kept
+def test_race_models_close_scores():
+    models = {"lr": LogisticRegression(), "lr_c2": LogisticRegression(C=2)}
+    scores, eliminated = race_models(models, X_train_medium, y_train_medium, cv=4, n_jobs=1, min_folds=2)
+    assert eliminated == {}
+    assert all(len(model_scores["test_score"]) == 4 for model_scores in scores.values())
+
+
+# Test 17: Racing needs a single score to compare
+def test_race_models_multiple_metrics():
+    with pytest.raises(ValueError):
+        race_models({"lr": LogisticRegression()}, X_train_medium, y_train_medium, cv=4,
+                    scoring=["accuracy", "f1"])
+
+
+# Test 18: A rerun race loads every fold from the cache and gives the same scores
+def test_race_models_cache(tmp_path):
+    models = {"lr": LogisticRegression(), "lr_c2": LogisticRegression(C=2)}
+    first, _, cached = race_models(models, X_train_medium, y_train_medium, cv=4, n_jobs=1, min_folds=2,
+                                   cache_dir=tmp_path, return_cached=True)
+    assert cached == []
+    assert len(list(tmp_path.glob("*.json"))) == 8
+    second, _, cached = race_models(models, X_train_medium, y_train_medium, cv=4, n_jobs=1, min_folds=2,
+                                    cache_dir=tmp_path, return_cached=True)
+    assert cached == ["lr", "lr_c2"]
+    assert (first["lr"]["fit_time"] == second["lr"]["fit_time"]).all()
@@ -6,7 +6,7 @@ import pandera as pa
 import numpy as np
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.data_validation import data_validation
+from src.data_validation import data_validation, data_validation_chunked, data_validation_incremental
 
 test_data = pd.DataFrame({
     "RiskLevel": ["high risk"], 
@@ -106,4 +106,205 @@ invalid_data_cases.append((empty_row_test, "Check for missing observations (e.g.
 @pytest.mark.parametrize("invalid_data, description", invalid_data_cases)
 def test_valid_w_invalid_data(invalid_data, description):
     with pytest.raises(pa.errors.SchemaErrors) as exc_info:
-        data_validation(invalid_data)
\ No newline at end of file
+        data_validation(invalid_data)
+
+# Numpy engine: every invalid case must fail just like with pandera
+@pytest.mark.parametrize("invalid_data, description", invalid_data_cases)
+def test_numpy_engine_w_invalid_data(invalid_data, description):
+    with pytest.raises(pa.errors.SchemaErrors):
+        data_validation(invalid_data, engine="numpy")
+
+def sorted_failure_cases(df, engine):
+    with pytest.raises(pa.errors.SchemaErrors) as exc_info:
+        data_validation(df, engine=engine)
+    failure_cases = exc_info.value.failure_cases.astype(str)
+    return failure_cases.sort_values(list(failure_cases.columns)).reset_index(drop=True), dict(exc_info.value.error_counts)
+
+# The numpy engine must produce the same error report as pandera
+@pytest.mark.parametrize("invalid_data, description", invalid_data_cases + [(invalid_test, "Out of range values")])
+def test_numpy_engine_report_matches_pandera(invalid_data, description):
+    pandera_cases, pandera_counts = sorted_failure_cases(invalid_data, "pandera")
+    numpy_cases, numpy_counts = sorted_failure_cases(invalid_data, "numpy")
+    pd.testing.assert_frame_equal(pandera_cases, numpy_cases)
+    assert pandera_counts == numpy_counts
+
+valid_data = pd.DataFrame(test_data_dict).astype({"BS": float, "BodyTemp": float})
+
+def test_valid_data_both_engines():
+    data_validation(valid_data)
+    data_validation(valid_data, engine="numpy")
+
+def test_numpy_engine_type_and_empty_errors():
+    with pytest.raises(TypeError):
+        data_validation(test_data_dict, engine="numpy")
+    with pytest.raises(ValueError):
+        data_validation(empty_df, engine="numpy")
+
+def test_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown validation engine"):
+        data_validation(test_data, engine="polars")
+
+# Unlabeled data: the features are checked without requiring the target
+@pytest.mark.parametrize("engine", ["pandera", "numpy"])
+def test_without_target(engine):
+    data_validation(valid_data.drop(columns=["RiskLevel"]), engine=engine, require_target=False)
+    with pytest.raises(pa.errors.SchemaErrors):
+        data_validation(invalid_test.drop(columns=["RiskLevel"]), engine=engine, require_target=False)
+    with pytest.raises(pa.errors.SchemaErrors):
+        data_validation(valid_data.drop(columns=["Age"]), engine=engine, require_target=False)
+
+def test_numpy_engine_report_matches_pandera_without_target():
+    invalid = invalid_test.drop(columns=["RiskLevel"])
+    reports = []
+    for engine in ["pandera", "numpy"]:
+        with pytest.raises(pa.errors.SchemaErrors) as exc_info:
+            data_validation(invalid, engine=engine, require_target=False)
+        reports.append(exc_info.value.failure_cases.astype(str).sort_values(["column", "check"]).reset_index(drop=True))
+    pd.testing.assert_frame_equal(*reports)
+
+
+# Chunked validation
+def split_chunks(df, size):
+    return (df.iloc[i:i + size] for i in range(0, len(df), size))
+
+large_valid = pd.concat([valid_data] * 10, ignore_index=True)
+
+@pytest.mark.parametrize("engine", ["pandera", "numpy"])
+def test_chunked_valid_data(engine):
+    counters = data_validation_chunked(split_chunks(large_valid, 7), engine=engine)
+    assert counters["rows"] == 30
+    assert counters["empty_rows"] == 0
+    assert set(counters["null_counts"].values()) == {0}
+
+@pytest.mark.parametrize("engine", ["pandera", "numpy"])
+def test_chunked_report_matches_whole_frame(engine):
+    invalid = large_valid.copy()
+    invalid.loc[[2, 17], "Age"] = 99
+    invalid.loc[25, "RiskLevel"] = "unknown"
+    whole_cases, whole_counts = sorted_failure_cases(invalid, engine)
+    with pytest.raises(pa.errors.SchemaErrors) as exc_info:
+        data_validation_chunked(split_chunks(invalid, 4), engine=engine)
+    failure_cases = exc_info.value.failure_cases.astype(str)
+    failure_cases = failure_cases.sort_values(list(failure_cases.columns)).reset_index(drop=True)
+    pd.testing.assert_frame_equal(whole_cases, failure_cases)
+    assert dict(exc_info.value.error_counts) == whole_counts
+
+def test_chunked_missing_fraction_uses_all_chunks():
+    # Each chunk of 10 rows has 10% missing values in BS, only the whole data does not
+    data = pd.concat([valid_data] * 10, ignore_index=True)
+    data.loc[[0, 10], "BS"] = np.nan
+    data = pd.concat([data, pd.concat([valid_data] * 10, ignore_index=True)], ignore_index=True)
+    with pytest.raises(pa.errors.SchemaErrors) as exc_info:
+        data_validation_chunked(split_chunks(data, 10), engine="numpy")
+    assert set(exc_info.value.failure_cases["check"]) == {"not_nullable"}
+
+def test_chunked_missing_fraction_fails():
+    data = large_valid.copy()
+    data.loc[0:5, "HeartRate"] = np.nan
+    with pytest.raises(pa.errors.SchemaErrors) as exc_info:
+        data_validation_chunked(split_chunks(data, 3), engine="numpy")
+    assert "Some columns have more than 10% missing values." in exc_info.value.failure_cases["check"].tolist()
+
+def test_chunked_failure_cases_are_capped():
+    data = large_valid.copy()
+    data["Age"] = 99
+    data.loc[29, "RiskLevel"] = "unknown"
+    with pytest.raises(pa.errors.SchemaErrors) as exc_info:
+        data_validation_chunked(split_chunks(data, 4), engine="numpy", max_failure_cases=5)
+    failure_cases = exc_info.value.failure_cases
+    assert (failure_cases["column"] == "Age").sum() == 5
+    # Rules that fail after the cap is reached still appear in the report
+    assert (failure_cases["column"] == "RiskLevel").sum() == 1
+
+def test_chunked_counters_continue_previous_run():
+    counters = data_validation_chunked(split_chunks(large_valid, 10), engine="numpy")
+    counters = data_validation_chunked(split_chunks(valid_data, 10), engine="numpy", counters=counters)
+    assert counters["rows"] == 33
+
+def test_chunked_empty_input():
+    with pytest.raises(ValueError):
+        data_validation_chunked(iter([]))
+    with pytest.raises(TypeError):
+        data_validation_chunked([test_data_dict])
+
+def test_chunked_upcasts_whole_number_float_chunks():
+    data = large_valid.copy()
+    data.loc[0, "BS"] = 7.5
+    # The chunks after the first one only hold whole numbers of BS and BodyTemp
+    chunks = [chunk.astype({"BS": int, "BodyTemp": int}) if i else chunk
+              for i, chunk in enumerate(split_chunks(data, 10))]
+    assert data_validation_chunked(chunks, engine="numpy")["rows"] == 30
+
+
+# Incremental validation with a watermark
+@pytest.fixture
+def raw_csv(tmp_path):
+    path = tmp_path / "raw.csv"
+    large_valid.to_csv(path, index=False)
+    return path
+
+def append_rows(path, df):
+    df.to_csv(path, mode="a", header=False, index=False)
+
+def test_incremental_validates_only_appended_rows(raw_csv):
+    first = data_validation_incremental(str(raw_csv), chunksize=7)
+    assert first["mode"] == "full" and first["rows_validated"] == 30
+    assert os.path.exists(str(raw_csv) + ".watermark.json")
+
+    append_rows(raw_csv, valid_data)
+    second = data_validation_incremental(str(raw_csv), chunksize=7)
+    assert second["mode"] == "incremental" and second["rows_validated"] == 3
+    assert second["counters"]["rows"] == 33
+
+    third = data_validation_incremental(str(raw_csv))
+    assert third["mode"] == "incremental" and third["rows_validated"] == 0
+
+def test_incremental_reports_file_row_numbers(raw_csv):
+    data_validation_incremental(str(raw_csv))
+    invalid = valid_data.copy()
+    invalid.loc[1, "Age"] = 99
+    append_rows(raw_csv, invalid)
+    with pytest.raises(pa.errors.SchemaErrors) as exc_info:
+        data_validation_incremental(str(raw_csv))
+    assert exc_info.value.failure_cases["index"].tolist() == [31]
+
+    # A failed run does not move the watermark, so the bad rows are checked again
+    with pytest.raises(pa.errors.SchemaErrors):
+        data_validation_incremental(str(raw_csv))
+
+def test_incremental_falls_back_to_full_when_prefix_changes(raw_csv):
+    data_validation_incremental(str(raw_csv))
+    edited = large_valid.copy()
+    edited.loc[0, "Age"] = 36
+    edited.to_csv(raw_csv, index=False)
+    append_rows(raw_csv, valid_data)
+    result = data_validation_incremental(str(raw_csv))
+    assert result["mode"] == "full" and result["rows_validated"] == 33
+
+def test_incremental_missing_fraction_uses_stored_counters(raw_csv):
+    data_validation_incremental(str(raw_csv))
+
+    # 3 missing values in 33 rows is below 10%, although all of the appended rows miss BS
+    missing = valid_data.copy()
+    missing["BS"] = np.nan
+    append_rows(raw_csv, missing)
+    with pytest.raises(pa.errors.SchemaErrors) as exc_info:
+        data_validation_incremental(str(raw_csv))
+    assert set(exc_info.value.failure_cases["check"]) == {"not_nullable"}
+
+    # 4 missing values in 34 rows is not
+    append_rows(raw_csv, missing.iloc[:1])
+    with pytest.raises(pa.errors.SchemaErrors) as exc_info:
+        data_validation_incremental(str(raw_csv))
+    assert "Some columns have more than 10% missing values." in exc_info.value.failure_cases["check"].tolist()
+
+def test_incremental_skips_partial_last_line(raw_csv):
+    data_validation_incremental(str(raw_csv))
+    with open(raw_csv, "a") as f:
+        f.write("mid risk,35,12")
+    result = data_validation_incremental(str(raw_csv))
+    assert result["rows_validated"] == 0
+
+def test_incremental_applies_row_filter(raw_csv):
+    result = data_validation_incremental(str(raw_csv), row_filter=lambda df: df[df["Age"] != 35])
+    assert result["rows_validated"] == 20
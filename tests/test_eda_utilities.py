@@ -6,7 +6,8 @@ import os
 import sys
 from unittest.mock import patch
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.eda_utilities import create_heatmap, save_data_summaries
+from src.eda_utilities import (create_heatmap, save_data_summaries, risk_level_counts, box_statistics,
+                               create_countplot, create_boxplots, countplot_chart, spec_hash, render_charts)
 
 @pytest.fixture
 def sample_data():
@@ -52,3 +53,89 @@ def test_save_data_summaries(sample_data, temp_dir):
     df_shape = pd.read_csv(os.path.join(table_to, "df_shape.csv"))
     assert "Rows" in df_shape["Metric"].values
     assert "Columns" in df_shape["Metric"].values
+
+@pytest.fixture
+def large_data():
+    """Fixture for a DataFrame with more rows than Altair embeds by default."""
+    rng = np.random.default_rng(123)
+    n = 20_000
+    return pd.DataFrame({
+        'Feature1': rng.normal(100, 15, n),
+        'Feature2': rng.integers(0, 50, n),
+        'RiskLevel': rng.choice(['low risk', 'mid risk', 'high risk'], n)
+    })
+
+def test_risk_level_counts(sample_data):
+    counts = risk_level_counts(sample_data).set_index('RiskLevel')['Count']
+    assert list(risk_level_counts(sample_data).columns) == ['RiskLevel', 'Count']
+    assert counts.to_dict() == {'low risk': 2, 'mid risk': 2, 'high risk': 1}
+
+def test_box_statistics_match_describe(large_data):
+    stats = box_statistics(large_data)
+    assert list(stats.columns) == ['RiskLevel', 'Feature', 'min', 'q1', 'median', 'q3', 'max']
+    assert len(stats) == 3 * 2
+
+    described = large_data.groupby('RiskLevel').describe()
+    for _, row in stats.iterrows():
+        expected = described.loc[row['RiskLevel'], row['Feature']]
+        np.testing.assert_allclose(
+            row[['min', 'q1', 'median', 'q3', 'max']].astype(float),
+            expected[['min', '25%', '50%', '75%', 'max']].astype(float)
+        )
+
+def test_charts_spec_size_independent_of_rows(sample_data, large_data, temp_dir):
+    # Charts of more than 5000 rows raise MaxRowsError when the rows are embedded
+    create_countplot(large_data, temp_dir)
+    create_boxplots(large_data, temp_dir)
+    assert os.path.exists(os.path.join(temp_dir, "countplot_of_risk_level.png"))
+    assert os.path.exists(os.path.join(temp_dir, "boxplot_by_risk_level.png"))
+
+    # Only the aggregates are embedded in the specs
+    for create_chart in (create_countplot, create_boxplots):
+        specs = []
+        for df in (sample_data, large_data):
+            with patch.object(alt.TopLevelMixin, 'save', autospec=True) as save:
+                create_chart(df, temp_dir)
+            specs.append(save.call_args[0][0].to_json())
+        assert len(specs[1]) < 2 * len(specs[0])
+
+def test_spec_hash(sample_data, large_data):
+    assert spec_hash(countplot_chart(sample_data)) == spec_hash(countplot_chart(sample_data.copy()))
+    assert spec_hash(countplot_chart(sample_data)) != spec_hash(countplot_chart(large_data))
+    assert spec_hash(countplot_chart(sample_data)) != spec_hash(countplot_chart(sample_data), scale_factor=1.0)
+
+def test_render_charts_skips_unchanged(sample_data, large_data, temp_dir):
+    path = os.path.join(temp_dir, "countplot.png")
+    timings = render_charts({path: countplot_chart(sample_data)}, n_jobs=1)
+    assert timings["rendered"].tolist() == [True]
+    assert timings["chart"].tolist() == ["countplot.png"]
+    with open(path + ".sha256") as f:
+        assert f.read().strip() == spec_hash(countplot_chart(sample_data))
+
+    with patch.object(alt.TopLevelMixin, 'save', autospec=True) as save:
+        # Same spec: nothing to render
+        timings = render_charts({path: countplot_chart(sample_data)}, n_jobs=1)
+        assert not save.called
+        assert timings["rendered"].tolist() == [False]
+        assert timings["seconds"].tolist() == [0.0]
+
+        # Forced, or with a missing PNG or a changed spec, the chart is rendered again
+        render_charts({path: countplot_chart(sample_data)}, n_jobs=1, force=True)
+        assert save.call_count == 1
+        os.remove(path)
+        render_charts({path: countplot_chart(sample_data)}, n_jobs=1)
+        assert save.call_count == 2
+        render_charts({path: countplot_chart(large_data)}, n_jobs=1)
+        assert save.call_count == 3
+
+def test_render_charts_in_parallel(sample_data, large_data, temp_dir):
+    # This process has already rendered charts, which the workers must not inherit
+    charts = {os.path.join(temp_dir, f"countplot_{i}.png"): countplot_chart(df)
+              for i, df in enumerate([sample_data, large_data])}
+    timings = render_charts(charts, n_jobs=2)
+    assert timings["rendered"].all()
+    for path, chart in charts.items():
+        assert os.path.getsize(path) > 0
+        with open(path + ".sha256") as f:
+            assert f.read().strip() == spec_hash(chart)
+    assert not render_charts(charts, n_jobs=2)["rendered"].any()
@@ -0,0 +1,119 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pandera as pa
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.metrics import confusion_matrix, precision_recall_fscore_support, accuracy_score
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.evaluation import confusion_counts, metrics_from_confusion, bootstrap_confusions, evaluate_predictions, evaluate_chunks
+from src.load_data import to_compact, write_maternal_data
+from src.model_artifact import save_model
+from src.prediction import read_input_chunks
+
+labels = np.array(["high risk", "low risk", "mid risk"])
+rng = np.random.default_rng(0)
+y_true = rng.choice(labels, 500)
+y_pred = np.where(rng.random(500) < 0.7, y_true, rng.choice(labels, 500))
+
+# Test 1: The confusion matrix is the one of scikit-learn, in the order of `labels`
+def test_confusion_counts():
+    assert (confusion_counts(y_true, y_pred, labels) == confusion_matrix(y_true, y_pred, labels=labels)).all()
+    reordered = labels[[2, 0, 1]]
+    assert (confusion_counts(y_true, y_pred, reordered) == confusion_matrix(y_true, y_pred, labels=reordered)).all()
+    with pytest.raises(ValueError):
+        confusion_counts(y_true, np.append(y_pred[:-1], "unknown"), labels)
+
+# Test 2: The metrics derived from the confusion matrix are those of scikit-learn
+def test_metrics_match_sklearn():
+    metrics = metrics_from_confusion(confusion_counts(y_true, y_pred, labels))
+    precision, recall, f1, _ = precision_recall_fscore_support(y_true, y_pred, labels=labels)
+    assert metrics["accuracy"] == accuracy_score(y_true, y_pred)
+    np.testing.assert_allclose(metrics["precision"], precision)
+    np.testing.assert_allclose(metrics["recall"], recall)
+    np.testing.assert_allclose(metrics["f1"], f1)
+
+# Test 3: Classes that are never predicted get a precision and F1 of 0
+def test_zero_division():
+    metrics = metrics_from_confusion(np.array([[5, 0], [3, 0]]))
+    assert metrics["precision"].tolist() == [5 / 8, 0.0]
+    assert metrics["f1"][1] == 0.0
+
+# Test 4: Bootstrap confusion matrices keep the size of the test set and vary around the observed one
+def test_bootstrap_confusions():
+    confusion = confusion_counts(y_true, y_pred, labels)
+    resampled = bootstrap_confusions(confusion, n_resamples=4000, seed=1)
+    assert resampled.shape == (4000, 3, 3)
+    assert (resampled.sum(axis=(1, 2)) == 500).all()
+    np.testing.assert_allclose(resampled.mean(axis=0), confusion, rtol=0.05)
+    assert (bootstrap_confusions(confusion, 10, seed=1) == bootstrap_confusions(confusion, 10, seed=1)).all()
+
+# Test 5: The intervals contain the estimates and narrow with the confidence level
+def test_evaluate_predictions():
+    confusion, table = evaluate_predictions(y_true, y_pred, labels, n_resamples=2000, seed=1)
+    assert (confusion == confusion_matrix(y_true, y_pred, labels=labels)).all()
+    assert len(table) == 10
+    assert table.iloc[0]["metric"] == "accuracy"
+    assert (table["lower"] <= table["estimate"]).all()
+    assert (table["estimate"] <= table["upper"]).all()
+    _, narrow = evaluate_predictions(y_true, y_pred, labels, n_resamples=2000, confidence=0.5, seed=1)
+    assert ((narrow["upper"] - narrow["lower"]) < (table["upper"] - table["lower"])).all()
+
+# Test 6: The accuracy interval agrees with resampling the rows of the test set
+def test_matches_row_resampling():
+    _, table = evaluate_predictions(y_true, y_pred, labels, n_resamples=4000, seed=1)
+    rows = np.random.default_rng(2).integers(0, 500, size=(4000, 500))
+    accuracies = (y_true[rows] == y_pred[rows]).mean(axis=1)
+    np.testing.assert_allclose(table.iloc[0][["lower", "upper"]].astype(float), np.quantile(accuracies, [0.025, 0.975]), atol=0.01)
+
+test_df = pd.DataFrame({
+    "RiskLevel": y_true,
+    "Age": rng.integers(10, 70, 500),
+    "SystolicBP": rng.integers(70, 160, 500),
+    "DiastolicBP": rng.integers(50, 100, 500),
+    "BS": rng.uniform(6, 19, 500).round(1),
+    "BodyTemp": rng.choice([98.0, 99.0, 101.0], 500),
+    "HeartRate": rng.integers(60, 90, 500)
+})
+
+@pytest.fixture
+def model_path(tmp_path):
+    model = DecisionTreeClassifier(max_depth=3, random_state=0).fit(test_df.drop(columns=["RiskLevel"]), test_df["RiskLevel"])
+    save_model(model, str(tmp_path / "model.model"))
+    return model, str(tmp_path / "model.model")
+
+def split_chunks(df, size):
+    return (df.iloc[i:i + size] for i in range(0, len(df), size))
+
+# Test 7: The merged counts of the chunks are the confusion matrix of the whole test set
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_evaluate_chunks(model_path, n_jobs):
+    model, path = model_path
+    expected = confusion_counts(test_df["RiskLevel"], model.predict(test_df.drop(columns=["RiskLevel"])), model.classes_)
+    confusion = evaluate_chunks(split_chunks(test_df, 60), path, model.classes_, n_jobs=n_jobs, max_pending=2)
+    assert (confusion == expected).all()
+    assert metrics_from_confusion(confusion)["accuracy"] == model.score(test_df.drop(columns=["RiskLevel"]), test_df["RiskLevel"])
+
+# Test 8: Counts of separate runs add up to those of a single run
+def test_evaluate_chunks_merges_previous_counts(model_path):
+    model, path = model_path
+    first = evaluate_chunks(split_chunks(test_df.iloc[:200], 50), path, model.classes_)
+    both = evaluate_chunks(split_chunks(test_df.iloc[200:], 50), path, model.classes_, confusion=first)
+    assert (both == evaluate_chunks([test_df], path, model.classes_)).all()
+    assert (first == evaluate_chunks([test_df.iloc[:200]], path, model.classes_)).all()
+
+# Test 9: Chunks are validated with their target
+def test_evaluate_chunks_validates(model_path):
+    model, path = model_path
+    invalid = test_df.copy()
+    invalid.loc[130, "RiskLevel"] = "unknown"
+    with pytest.raises(pa.errors.SchemaErrors):
+        evaluate_chunks(split_chunks(invalid, 60), path, model.classes_)
+
+# Test 10: A Parquet test set with the compact dtypes of the pipeline is evaluated chunk by chunk
+def test_evaluate_chunks_compact_parquet(model_path, tmp_path):
+    model, path = model_path
+    write_maternal_data(to_compact(test_df), str(tmp_path / "test_df.parquet"))
+    confusion = evaluate_chunks(read_input_chunks(str(tmp_path / "test_df.parquet"), 60), path, model.classes_)
+    assert (confusion == evaluate_chunks([test_df], path, model.classes_)).all()
@@ -0,0 +1,159 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.hash_split import hash_assign, hash_folds, hash_split_chunks, hash_split_csv, stratified_cutoffs
+from src.load_data import to_compact
+
+rng = np.random.default_rng(0)
+n_rows = 3000
+test_data = pd.DataFrame({
+    "Age": rng.integers(10, 70, n_rows),
+    "SystolicBP": rng.integers(70, 160, n_rows),
+    "DiastolicBP": rng.integers(49, 100, n_rows),
+    "BS": rng.integers(60, 190, n_rows) / 10,
+    "BodyTemp": rng.integers(980, 1030, n_rows) / 10,
+    "HeartRate": rng.integers(60, 90, n_rows),
+    "RiskLevel": rng.choice(["high risk", "mid risk", "low risk"], n_rows, p=[0.2, 0.3, 0.5])
+})
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    test_data.to_csv(path, index=False)
+    return str(path)
+
+# Test 1: About test_size of the rows are assigned to the test set
+def test_test_fraction():
+    in_test = hash_assign(test_data, test_size=0.2)
+    assert in_test.dtype == bool
+    assert 0.17 < in_test.mean() < 0.23
+
+# Test 2: The assignment is the same for the same seed and changes with it
+def test_seed():
+    assert np.array_equal(hash_assign(test_data, seed=1), hash_assign(test_data, seed=1))
+    assert not np.array_equal(hash_assign(test_data, seed=1), hash_assign(test_data, seed=2))
+
+# Test 3: A row's assignment does not depend on the other rows or their order
+def test_assignment_is_per_row():
+    in_test = hash_assign(test_data)
+    shuffled = test_data.sample(frac=1, random_state=0)
+    assert np.array_equal(hash_assign(shuffled), in_test[shuffled.index])
+    assert np.array_equal(hash_assign(test_data.iloc[100:200]), in_test[100:200])
+
+# Test 4: The assignment does not depend on the dtypes the rows were parsed with
+def test_assignment_ignores_dtypes():
+    in_test = hash_assign(test_data, stratify="RiskLevel")
+    assert np.array_equal(hash_assign(to_compact(test_data), stratify="RiskLevel"), in_test)
+    as_float = test_data.astype({"Age": "float64", "HeartRate": "float64"})
+    assert np.array_equal(hash_assign(as_float, stratify="RiskLevel"), in_test)
+
+# Test 5: Only the id column is hashed when given
+def test_id_column():
+    df = test_data.assign(PatientId=np.arange(n_rows))
+    in_test = hash_assign(df, id_column="PatientId")
+    changed = df.assign(Age=df["Age"] + 1)
+    assert np.array_equal(hash_assign(changed, id_column="PatientId"), in_test)
+
+# Test 6: Exact stratified assignment puts round(test_size * n_class) rows of every class in the test set
+@pytest.mark.parametrize("test_size", [0.2, 0.33])
+def test_stratify_exact(test_size):
+    in_test = hash_assign(test_data, test_size=test_size, stratify="RiskLevel", exact=True)
+    for label, n_test in pd.Series(in_test).groupby(test_data["RiskLevel"].to_numpy()).sum().items():
+        assert n_test == round(test_size * (test_data["RiskLevel"] == label).sum()), label
+    # Identical rows at the cutoff are split by position, so the counts stay exact
+    doubled = pd.concat([test_data.iloc[:5]] * 4, ignore_index=True)
+    assert hash_assign(doubled, test_size=0.25, stratify="RiskLevel", exact=True).sum() == \
+        sum(round(0.25 * n) for n in doubled["RiskLevel"].value_counts())
+
+# Test 7: Invalid test sizes are rejected
+@pytest.mark.parametrize("test_size", [0, 1, 1.5])
+def test_invalid_test_size(test_size):
+    with pytest.raises(ValueError):
+        hash_assign(test_data, test_size=test_size)
+
+# Test 8: Splitting in chunks gives the same rows as splitting all at once
+def test_chunks():
+    in_test = hash_assign(test_data)
+    pairs = list(hash_split_chunks(test_data.iloc[start:start + 450] for start in range(0, n_rows, 450)))
+    assert len(pairs) == 7
+    train = pd.concat([train for train, _ in pairs])
+    test = pd.concat([test for _, test in pairs])
+    pd.testing.assert_frame_equal(train, test_data[~in_test])
+    pd.testing.assert_frame_equal(test, test_data[in_test])
+
+# Test 9: A stratified split of chunks matches the stratified split of the whole data
+@pytest.mark.parametrize("exact", [False, True])
+def test_stratified_chunks(exact):
+    in_test = hash_assign(test_data, stratify="RiskLevel", exact=exact)
+    chunks = lambda: (test_data.iloc[start:start + 450] for start in range(0, n_rows, 450))
+    cutoffs = stratified_cutoffs(chunks(), stratify="RiskLevel") if exact else None
+    pairs = hash_split_chunks(chunks(), stratify="RiskLevel", exact=exact, cutoffs=cutoffs)
+    pd.testing.assert_frame_equal(pd.concat([test for _, test in pairs]), test_data[in_test])
+    with pytest.raises(ValueError):
+        next(hash_split_chunks(chunks(), stratify="RiskLevel", exact=True))
+
+# Test 10: A CSV is streamed into train and test files
+def test_split_csv(csv_path, tmp_path):
+    train_path, test_path = str(tmp_path / "train.csv"), str(tmp_path / "test.csv")
+    counts = hash_split_csv(csv_path, train_path, test_path, chunksize=500,
+                            stratify="RiskLevel", row_filter=lambda chunk: chunk[chunk["Age"] != 10])
+    train, test = pd.read_csv(train_path), pd.read_csv(test_path)
+    assert (counts["train"], counts["test"]) == (len(train), len(test))
+    assert len(train) + len(test) == (test_data["Age"] != 10).sum()
+    assert set(counts["test_fraction"]) == {"high risk", "mid risk", "low risk"}
+    expected = hash_assign(test_data[test_data["Age"] != 10], stratify="RiskLevel")
+    assert len(test) == expected.sum()
+    assert not os.path.exists(train_path + ".part")
+
+# Test 11: Rows keep their assignment when the file grows
+def test_split_csv_grown_file(csv_path, tmp_path):
+    paths = [str(tmp_path / name) for name in ("train.csv", "test.csv")]
+    hash_split_csv(csv_path, *paths, chunksize=500)
+    old_test = pd.read_csv(paths[1])
+
+    extra = test_data.assign(Age=test_data["Age"] + 100)
+    extra.to_csv(csv_path, mode="a", header=False, index=False)
+    hash_split_csv(csv_path, *paths, chunksize=700)
+    new_test = pd.read_csv(paths[1])
+    pd.testing.assert_frame_equal(new_test.iloc[:len(old_test)], old_test)
+    assert len(new_test) > len(old_test)
+
+# Test 12: Rows are spread evenly over stable folds
+def test_hash_folds():
+    folds = hash_folds(test_data, n_splits=5)
+    assert set(folds) == set(range(5))
+    assert np.bincount(folds).min() > 0.15 * n_rows
+    assert np.array_equal(hash_folds(test_data.iloc[::-1], n_splits=5), folds[::-1])
+    with pytest.raises(ValueError):
+        hash_folds(test_data, n_splits=1)
+
+# Test 13: Exact stratified folds of every class differ in size by at most one row
+def test_stratified_hash_folds():
+    folds = hash_folds(test_data, n_splits=5, stratify="RiskLevel", exact=True)
+    for _, class_folds in pd.Series(folds).groupby(test_data["RiskLevel"].to_numpy()):
+        sizes = np.bincount(class_folds, minlength=5)
+        assert sizes.max() - sizes.min() <= 1
+    stratified = hash_folds(test_data, n_splits=5, stratify="RiskLevel")
+    assert np.array_equal(hash_folds(test_data.iloc[:1000], n_splits=5, stratify="RiskLevel"), stratified[:1000])
+
+# Test 14: Stratified assignment keeps old rows on the same side as the data grows
+def test_stratify_is_stable():
+    in_test = hash_assign(test_data, stratify="RiskLevel")
+    assert np.array_equal(hash_assign(test_data.iloc[:800], stratify="RiskLevel"), in_test[:800])
+    shuffled = test_data.sample(frac=1, random_state=0)
+    assert np.array_equal(hash_assign(shuffled, stratify="RiskLevel"), in_test[shuffled.index])
+    # Each class is split at the test_size rate in expectation
+    for label, fraction in pd.Series(in_test).groupby(test_data["RiskLevel"].to_numpy()).mean().items():
+        assert 0.15 < fraction < 0.25, label
+
+# Test 15: A stratified split of a grown CSV keeps the old test rows
+def test_stratified_split_csv_grown_file(csv_path, tmp_path):
+    paths = [str(tmp_path / name) for name in ("train.csv", "test.csv")]
+    hash_split_csv(csv_path, *paths, chunksize=500, stratify="RiskLevel")
+    old_test = pd.read_csv(paths[1])
+    test_data.assign(Age=test_data["Age"] + 100).to_csv(csv_path, mode="a", header=False, index=False)
+    hash_split_csv(csv_path, *paths, chunksize=700, stratify="RiskLevel")
+    pd.testing.assert_frame_equal(pd.read_csv(paths[1]).iloc[:len(old_test)], old_test)
@@ -0,0 +1,126 @@
+import pytest
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+from scipy.stats import randint, uniform, poisson
+from sklearn.tree import DecisionTreeClassifier
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.hyperparameter_search import finite_grid, grid_size, search_fits, tune, journaled_fit
+
+rng = np.random.default_rng(0)
+X_train = pd.DataFrame({"feature1": rng.normal(size=300), "feature2": rng.normal(size=300)})
+y_train = pd.Series(np.where(X_train["feature1"] + rng.normal(scale=0.5, size=300) > 0, "yes", "no"))
+param_dist = {"criterion": ["gini", "entropy"], "max_depth": randint(3, 20)}
+
+# Test 1: Lists and bounded discrete distributions are enumerated
+def test_finite_grid():
+    grid = finite_grid(param_dist)
+    assert grid == {"criterion": ["gini", "entropy"], "max_depth": list(range(3, 20))}
+    assert grid_size(grid) == 34
+
+# Test 2: Repeated list values are tried once
+def test_finite_grid_deduplicates():
+    assert finite_grid({"criterion": ["gini", "gini", "entropy", "gini"]}) == {"criterion": ["gini", "entropy"]}
+
+# Test 3: Continuous and unbounded distributions cannot be enumerated
+@pytest.mark.parametrize("dist", [uniform(0, 1), poisson(3)])
+def test_finite_grid_infinite(dist):
+    assert finite_grid({"alpha": dist}) is None
+
+# Test 4: The grid search fits each distinct configuration once
+def test_grid_search():
+    search = tune(DecisionTreeClassifier(random_state=0), param_dist, X_train, y_train, method="grid", cv=3)
+    assert len(search.cv_results_["params"]) == 34
+    assert search_fits(search) == 34 * 3
+
+# Test 5: The random search samples n_iter configurations
+def test_random_search():
+    search = tune(DecisionTreeClassifier(random_state=0), param_dist, X_train, y_train, method="random",
+                  n_iter=20, cv=3)
+    assert search_fits(search) == 20 * 3
+
+# Test 6: Successive halving fits fewer configurations on the full data
+def test_halving_search():
+    search = tune(DecisionTreeClassifier(random_state=0), param_dist, X_train, y_train, method="halving", cv=3)
+    assert search.n_candidates_[0] == 34
+    assert search.n_resources_[-1] > 0.9 * len(y_train)
+    assert search_fits(search) == sum(search.n_candidates_) * 3
+    assert set(search.best_params_) == {"criterion", "max_depth"}
+    assert search.best_estimator_.predict(X_train).shape == (300,)
+
+# Test 7: Halving falls back to random sampling on continuous spaces
+def test_halving_continuous():
+    search = tune(DecisionTreeClassifier(random_state=0), {"min_impurity_decrease": uniform(0, 0.1)},
+                  X_train, y_train, method="halving", n_iter=9, cv=3)
+    assert search.n_candidates_[0] == 9
+
+# Test 8: Invalid methods and non-enumerable grids are rejected
+def test_invalid_search():
+    with pytest.raises(ValueError):
+        tune(DecisionTreeClassifier(), param_dist, X_train, y_train, method="bayes")
+    with pytest.raises(ValueError):
+        tune(DecisionTreeClassifier(), {"min_impurity_decrease": uniform(0, 0.1)}, X_train, y_train, method="grid")
+
+def random_search():
+    from sklearn.model_selection import RandomizedSearchCV
+    return RandomizedSearchCV(DecisionTreeClassifier(random_state=0), param_dist, n_iter=10, cv=3,
+                              random_state=0, return_train_score=True)
+
+def assert_same_results(search, expected):
+    for key, value in expected.cv_results_.items():
+        if "time" not in key:
+            assert np.array_equal(np.asarray(search.cv_results_[key]), np.asarray(value)), key
+    assert search.best_params_ == expected.best_params_
+
+# Test 9: A journaled search gives the same results as a plain one and records every fit
+def test_journaled_fit(tmp_path):
+    from sklearn.model_selection import RandomizedSearchCV
+    journal = tmp_path / "journal.jsonl"
+    search = journaled_fit(random_search(), X_train, y_train, str(journal))
+    assert type(search) is RandomizedSearchCV
+    assert_same_results(search, random_search().fit(X_train, y_train))
+    assert len(journal.read_text().splitlines()) == 1 + 10 * 3
+
+# Test 10: A killed search resumes without refitting the journaled fits
+def test_journaled_fit_resume(tmp_path, monkeypatch):
+    journal = tmp_path / "journal.jsonl"
+    expected = journaled_fit(random_search(), X_train, y_train, str(journal))
+    lines = journal.read_text().splitlines()
+    # Keep 12 complete records and one cut short, as a killed run would leave them
+    journal.write_text("\n".join(lines[:13]) + "\n" + lines[13][:20])
+    resumed = journaled_fit(random_search(), X_train, y_train, str(journal))
+    assert_same_results(resumed, expected)
+    records = journal.read_text().splitlines()
+    assert len(records) <= len(lines)
+    assert all(json.loads(line) for line in records)
+
+    # Once complete, a rerun refits nothing but the best model
+    fits = []
+    original = DecisionTreeClassifier.fit
+    monkeypatch.setattr(DecisionTreeClassifier, "fit", lambda self, *args, **kwargs: fits.append(1) or original(self, *args, **kwargs))
+    assert_same_results(journaled_fit(random_search().set_params(n_jobs=1), X_train, y_train, str(journal)), expected)
+    assert len(fits) == 1
+
+# Test 11: A journal written for other data is discarded
+def test_journaled_fit_other_data(tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    journaled_fit(random_search(), X_train, y_train, str(journal))
+    expected = random_search().fit(X_train * 2 + 1, y_train)
+    assert_same_results(journaled_fit(random_search(), X_train * 2 + 1, y_train, str(journal)), expected)
+
+# Test 12: A journaled grid search has the columns and best model of a plain one, halving searches cannot be journaled
+def test_journaled_grid_search(tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    search = tune(DecisionTreeClassifier(random_state=0), param_dist, X_train, y_train, method="grid", cv=3,
+                  return_train_score=True, journal_path=str(journal))
+    expected = tune(DecisionTreeClassifier(random_state=0), param_dist, X_train, y_train, method="grid", cv=3,
+                    return_train_score=True)
+    assert list(search.cv_results_) == list(expected.cv_results_)
+    assert_same_results(search, expected)
+    assert search.best_score_ == expected.best_score_
+    assert np.array_equal(search.predict(X_train), expected.predict(X_train))
+    assert search_fits(search) == 34 * 3
+    with pytest.raises(ValueError):
+        tune(DecisionTreeClassifier(), param_dist, X_train, y_train, method="halving", journal_path=str(journal))
@@ -0,0 +1,115 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.load_data import read_maternal_csv, read_maternal_data, write_maternal_data, to_compact, COMPACT_DTYPES, memmap_training_data
+
+test_data = pd.DataFrame({
+    "Age": [35, 15, 20],
+    "SystolicBP": [150, 110, 70],
+    "DiastolicBP": [80, 65, 100],
+    "BS": [9.0, 4.1, 15.2],
+    "BodyTemp": [98.6, 95.0, 98.0],
+    "HeartRate": [55, 90, 75],
+    "RiskLevel": ["high risk", "mid risk", "low risk"]
+})
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    test_data.to_csv(path, index=False)
+    return str(path)
+
+# Test 1: Features are parsed with the narrowest dtypes of the schema
+def test_compact_dtypes(csv_path):
+    df = read_maternal_csv(csv_path)
+    assert df["Age"].dtype == np.int8
+    assert df["SystolicBP"].dtype == np.int16
+    assert df["BS"].dtype == np.float32
+    assert isinstance(df["RiskLevel"].dtype, pd.CategoricalDtype)
+
+# Test 2: The compact frame takes less memory than the default dtypes
+def test_compact_memory(tmp_path):
+    path = tmp_path / "large.csv"
+    pd.concat([test_data] * 100).to_csv(path, index=False)
+    compact = read_maternal_csv(str(path)).memory_usage(deep=True).sum()
+    default = read_maternal_csv(str(path), compact=False).memory_usage(deep=True).sum()
+    assert compact * 4 < default
+
+# Test 3: Values are unchanged by the compact dtypes
+def test_compact_values_round_trip(csv_path, tmp_path):
+    df = read_maternal_csv(csv_path)
+    df.to_csv(tmp_path / "round_trip.csv", index=False)
+    assert (tmp_path / "round_trip.csv").read_text() == open(csv_path).read()
+
+# Test 4: Raw data can be read with pandas' default dtypes
+def test_not_compact(csv_path):
+    df = read_maternal_csv(csv_path, compact=False)
+    pd.testing.assert_frame_equal(df, test_data)
+
+# Test 5: Chunked reading keeps the compact dtypes
+def test_chunksize(csv_path):
+    chunks = list(read_maternal_csv(csv_path, chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert all(chunk["HeartRate"].dtype == COMPACT_DTYPES["HeartRate"] for chunk in chunks)
+
+# Test 6: Missing values cannot be parsed with the compact dtypes
+def test_compact_rejects_missing_values(tmp_path):
+    path = tmp_path / "missing.csv"
+    test_data.assign(Age=[35, None, 20]).to_csv(path, index=False)
+    with pytest.raises(ValueError):
+        read_maternal_csv(str(path))
+
+# Test 7: Columnar formats round trip with the compact dtypes
+@pytest.mark.parametrize("extension", [".feather", ".parquet", ".csv"])
+def test_columnar_round_trip(tmp_path, extension):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"data{extension}")
+    write_maternal_data(to_compact(test_data), path)
+    pd.testing.assert_frame_equal(read_maternal_data(path), to_compact(test_data))
+
+# Test 8: Feather columns are read without copying them out of the mapped file
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="needs /proc to inspect memory maps")
+def test_feather_is_memory_mapped(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "data.feather")
+    write_maternal_data(to_compact(pd.concat([test_data] * 1000)), path)
+    df = read_maternal_data(path)
+    with open("/proc/self/maps") as f:
+        mapped = [line.split()[0].split("-") for line in f if path in line]
+    address = df["BS"].to_numpy().__array_interface__["data"][0]
+    assert any(int(low, 16) <= address < int(high, 16) for low, high in mapped)
+
+# Test 9: .npy feature matrices are opened as read-only memory maps
+def test_npy_is_memory_mapped(tmp_path):
+    path = str(tmp_path / "features.npy")
+    np.save(path, np.arange(12, dtype=np.float32).reshape(4, 3))
+    features = read_maternal_data(path)
+    assert isinstance(features, np.memmap)
+    assert not features.flags.writeable
+    assert features[3, 2] == 11
+
+# Test 10: Unknown formats are rejected
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        write_maternal_data(test_data, str(tmp_path / "data.xlsx"))
+
+# Test 11: Training data is mapped back read-only with the same values and columns
+def test_memmap_training_data(tmp_path):
+    X, y = test_data.drop(columns=["RiskLevel"]), test_data["RiskLevel"]
+    X_mapped, y_mapped = memmap_training_data(X, y, str(tmp_path))
+    assert list(X_mapped.columns) == list(X.columns)
+    np.testing.assert_array_equal(X_mapped.to_numpy(), X.to_numpy(dtype=np.float64))
+    assert list(y_mapped) == list(y)
+    assert isinstance(y_mapped, np.memmap)
+    assert not X_mapped.to_numpy().flags.writeable
+
+# Test 12: Joblib workers receive the mapped features by reference
+def test_memmap_training_data_is_shared(tmp_path):
+    from joblib._memmapping_reducer import has_shareable_memory
+    X_mapped, _ = memmap_training_data(to_compact(test_data).drop(columns=["RiskLevel"]),
+                                       to_compact(test_data)["RiskLevel"], str(tmp_path))
+    assert X_mapped.dtypes.unique().tolist() == [np.float32]
+    assert has_shareable_memory(X_mapped.to_numpy())
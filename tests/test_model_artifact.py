@@ -0,0 +1,72 @@
+import pytest
+import sys
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import GridSearchCV
+from sklearn.tree import DecisionTreeClassifier
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model_artifact import save_model, load_model, read_header, is_model_artifact, MAGIC
+
+X_train = pd.DataFrame({"Age": [20, 30, 40, 50, 25, 35], "BS": [6.0, 7.5, 15.0, 12.0, 6.5, 8.0]})
+y_train = pd.Series(["low risk", "mid risk", "high risk", "high risk", "low risk", "mid risk"])
+
+@pytest.fixture
+def model():
+    return DecisionTreeClassifier(random_state=0).fit(X_train, y_train)
+
+# Test 1: A saved model predicts the same after loading
+def test_round_trip(model, tmp_path):
+    path = str(tmp_path / "model.model")
+    save_model(model, path)
+    loaded = load_model(path)
+    assert is_model_artifact(path)
+    assert (loaded.predict(X_train) == model.predict(X_train)).all()
+
+# Test 2: The header describes the model without loading it
+def test_header(model, tmp_path):
+    path = str(tmp_path / "model.model")
+    written = save_model(model, path, metadata={"best_params": {"max_depth": np.int64(3)}})
+    header = read_header(path)
+    assert header == written
+    assert header["feature_names"] == ["Age", "BS"]
+    assert header["classes"] == ["high risk", "low risk", "mid risk"]
+    assert header["estimator"] == "sklearn.tree._classes.DecisionTreeClassifier"
+    assert header["metadata"]["best_params"] == {"max_depth": 3}
+
+# Test 3: A corrupted payload is detected
+def test_checksum(model, tmp_path):
+    path = tmp_path / "model.model"
+    save_model(model, str(path))
+    data = bytearray(path.read_bytes())
+    data[-10] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        load_model(str(path))
+
+# Test 4: A truncated artifact is detected
+def test_truncated(model, tmp_path):
+    path = tmp_path / "model.model"
+    save_model(model, str(path))
+    path.write_bytes(path.read_bytes()[:-5])
+    with pytest.raises(ValueError):
+        load_model(str(path), verify=False)
+
+# Test 5: Pickled search objects still load as their best estimator
+def test_legacy_pickle(tmp_path):
+    search = GridSearchCV(DecisionTreeClassifier(random_state=0), {"max_depth": [1, 2]}, cv=2).fit(X_train, y_train)
+    path = str(tmp_path / "search.pickle")
+    with open(path, "wb") as f:
+        pickle.dump(search, f)
+    assert not is_model_artifact(path)
+    loaded = load_model(path)
+    assert isinstance(loaded, DecisionTreeClassifier)
+    assert (loaded.predict(X_train) == search.predict(X_train)).all()
+
+# Test 6: The artifact is smaller than the pickled search
+def test_smaller_than_search(tmp_path):
+    search = GridSearchCV(DecisionTreeClassifier(random_state=0), {"max_depth": list(range(1, 10))}, cv=2).fit(X_train, y_train)
+    save_model(search.best_estimator_, str(tmp_path / "model.model"))
+    assert os.path.getsize(tmp_path / "model.model") < len(pickle.dumps(search))
+    assert (tmp_path / "model.model").read_bytes().startswith(MAGIC)
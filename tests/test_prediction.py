@@ -0,0 +1,93 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pandera as pa
+from sklearn.tree import DecisionTreeClassifier
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model_artifact import save_model
+from src.load_data import to_compact, write_maternal_data
+from src.prediction import predict_file, read_input_chunks
+
+rng = np.random.default_rng(0)
+n_rows = 1000
+data = pd.DataFrame({
+    "Age": rng.integers(10, 70, n_rows),
+    "SystolicBP": rng.integers(70, 160, n_rows),
+    "DiastolicBP": rng.integers(50, 100, n_rows),
+    "BS": rng.uniform(6, 19, n_rows).round(1),
+    "BodyTemp": rng.choice([98.0, 99.0, 101.0], n_rows),
+    "HeartRate": rng.integers(60, 90, n_rows)
+})
+target = np.where(data["BS"] > 12, "high risk", np.where(data["Age"] > 40, "mid risk", "low risk"))
+
+@pytest.fixture
+def paths(tmp_path):
+    model = DecisionTreeClassifier(max_depth=4, random_state=0).fit(data, target)
+    save_model(model, str(tmp_path / "model.model"))
+    data.to_csv(tmp_path / "input.csv", index=False)
+    return model, tmp_path
+
+# Test 1: Predictions are written in input order and match the model, with one or several workers
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_predict_csv(paths, n_jobs):
+    model, tmp_path = paths
+    stats = predict_file(str(tmp_path / "input.csv"), str(tmp_path / "model.model"), str(tmp_path / "out.csv"),
+                         chunksize=64, n_jobs=n_jobs, max_pending=3)
+    output = pd.read_csv(tmp_path / "out.csv")
+    pd.testing.assert_frame_equal(output.drop(columns=["PredictedRiskLevel"]), data)
+    assert (output["PredictedRiskLevel"] == model.predict(data)).all()
+    assert stats["rows"] == n_rows
+    assert stats["chunks"] == 16
+    assert not os.path.exists(tmp_path / "out.part.csv")
+
+# Test 2: The CSV rows formatted by the workers are those of DataFrame.to_csv
+def test_csv_formatting(paths):
+    model, tmp_path = paths
+    predict_file(str(tmp_path / "input.csv"), str(tmp_path / "model.model"), str(tmp_path / "out.csv"), chunksize=100)
+    expected = data.assign(PredictedRiskLevel=model.predict(data)).to_csv(index=False)
+    assert (tmp_path / "out.csv").read_text() == expected
+
+# Test 3: Parquet files can be read and written
+def test_predict_parquet(paths):
+    model, tmp_path = paths
+    data.to_parquet(tmp_path / "input.parquet", index=False)
+    predict_file(str(tmp_path / "input.parquet"), str(tmp_path / "model.model"), str(tmp_path / "out.parquet"),
+                 chunksize=300, n_jobs=2)
+    output = pd.read_parquet(tmp_path / "out.parquet")
+    assert (output["PredictedRiskLevel"] == model.predict(data)).all()
+
+# Test 4: An invalid chunk stops the run without leaving an output file
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_invalid_chunk(paths, n_jobs):
+    _, tmp_path = paths
+    invalid = data.copy()
+    invalid.loc[700, "Age"] = 200
+    invalid.to_csv(tmp_path / "invalid.csv", index=False)
+    with pytest.raises(pa.errors.SchemaErrors) as exc_info:
+        predict_file(str(tmp_path / "invalid.csv"), str(tmp_path / "model.model"), str(tmp_path / "out.csv"),
+                     chunksize=100, n_jobs=n_jobs)
+    assert exc_info.value.failure_cases["index"].tolist() == [700]
+    assert not os.path.exists(tmp_path / "out.csv")
+    assert not os.path.exists(tmp_path / "out.part.csv")
+
+# Test 5: CSV chunks with only whole numbers in a float feature are upcast before validation
+def test_read_input_chunks_upcasts(tmp_path):
+    pd.DataFrame({"BS": [7.0, 8.0, 9.5], "Age": [20, 30, 40]}).to_csv(tmp_path / "input.csv", index=False)
+    chunks = list(read_input_chunks(str(tmp_path / "input.csv"), 2))
+    assert [chunk["BS"].dtype for chunk in chunks] == [np.float64, np.float64]
+    assert chunks[1].index.tolist() == [2]
+    with pytest.raises(ValueError):
+        list(read_input_chunks(str(tmp_path / "input.json"), 2))
+
+# Test 6: Parquet files with the compact dtypes of the pipeline are widened to the schema dtypes
+def test_predict_compact_parquet(paths):
+    model, tmp_path = paths
+    write_maternal_data(to_compact(data), str(tmp_path / "input.parquet"))
+    predict_file(str(tmp_path / "input.parquet"), str(tmp_path / "model.model"), str(tmp_path / "out.csv"),
+                 chunksize=300)
+    output = pd.read_csv(tmp_path / "out.csv")
+    assert (output["PredictedRiskLevel"] == model.predict(data)).all()
+    chunk = next(read_input_chunks(str(tmp_path / "input.parquet"), 300))
+    assert chunk.dtypes.tolist() == [np.int64, np.int64, np.int64, np.float64, np.float64, np.int64]
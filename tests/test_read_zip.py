@@ -6,7 +6,7 @@ import sys
 import zipfile
 from unittest.mock import patch
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.read_zip import read_zip
+from src.read_zip import read_zip, read_zips
 
 if os.path.exists('tests/test_zip_data'):
     shutil.rmtree('tests/test_zip_data')
@@ -63,6 +63,230 @@ def test_read_zip_error_on_invalid_url(mock_response):
     with pytest.raises(ValueError, match='The URL provided does not exist.'):
         read_zip(url_invalid_zip, 'tests/test_zip_data')
 
+def test_read_zip_error_on_unsatisfiable_range_without_partial_file():
+    # A 416 without a Range header sent is an error, not a stale partial download
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, url_invalid_zip, status=416)
+        with pytest.raises(ValueError, match='The URL provided does not exist.'):
+            read_zip(url_invalid_zip, 'tests/test_zip_data')
+
 def test_read_zip_error_on_nonzip_url():
     with pytest.raises(ValueError, match='The URL provided does not point to a zip file.'):
         read_zip('https://github.com/', 'tests/test_zip_data')
+
+
+# Local HTTP server for the streaming and resume tests
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import io
+
+
+def zip_bytes(members):
+    """Returns the bytes of a zip file holding `members`, a dict of member name to text."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_ref:
+        for name, text in members.items():
+            zip_ref.writestr(name, text)
+    return buffer.getvalue()
+
+
+zip_body = open('tests/files_with_nested.zip', 'rb').read()
+served_files = {
+    'files_with_nested.zip': zip_body,
+    'files_json_and_csv.zip': open('tests/files_json_and_csv.zip', 'rb').read(),
+    # Per-site extracts, the first sharing a file and the second a subdirectory with files_with_nested.zip
+    'site_a.zip': zip_bytes({'file1.txt': 'site a'}),
+    'site_b.zip': zip_bytes({'nested_dir/file5.txt': 'site b'}),
+    'site_c.zip': zip_bytes({'nested_dir/': ''}),
+}
+
+
+class ZipHandler(BaseHTTPRequestHandler):
+    """Serves the test zip files, honouring Range requests and optionally dropping the first connection."""
+
+    def do_GET(self):
+        server = self.server
+        if os.path.basename(self.path) not in served_files:
+            self.send_response(404)
+            self.end_headers()
+            return
+        zip_body = served_files[os.path.basename(self.path)]
+        range_header = self.headers.get('Range')
+        server.range_headers.append(range_header)
+        server.conditional_headers.append(self.headers.get('If-None-Match'))
+
+        if server.etag and self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        start = 0
+        if range_header and server.support_range:
+            start = int(range_header.split('=')[1].rstrip('-'))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(zip_body) - 1}/{len(zip_body)}')
+        else:
+            self.send_response(200)
+        if server.etag:
+            self.send_header('ETag', server.etag)
+        self.send_header('Content-Length', str(len(zip_body) - start))
+        self.end_headers()
+
+        if server.drop_after is not None:
+            # Simulate a network drop part way through the body
+            drop_after, server.drop_after = server.drop_after, None
+            self.wfile.write(zip_body[start:drop_after])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(zip_body[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def zip_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ZipHandler)
+    server.range_headers = []
+    server.conditional_headers = []
+    server.etag = None
+    server.support_range = True
+    server.drop_after = None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def server_url(server, filename='files_with_nested.zip'):
+    return f'http://127.0.0.1:{server.server_address[1]}/{filename}'
+
+
+def test_read_zip_streams_from_local_server(zip_server, tmp_path):
+    read_zip(server_url(zip_server), str(tmp_path), chunk_size=16)
+    assert (tmp_path / 'nested_dir' / 'file4.csv').read_text() == 'some,text'
+    assert (tmp_path / 'files_with_nested.zip').read_bytes() == zip_body
+    assert not (tmp_path / 'files_with_nested.zip.part').exists()
+
+
+def test_read_zip_resumes_partial_download(zip_server, tmp_path):
+    (tmp_path / 'files_with_nested.zip.part').write_bytes(zip_body[:100])
+    read_zip(server_url(zip_server), str(tmp_path))
+    assert zip_server.range_headers == ['bytes=100-']
+    assert (tmp_path / 'files_with_nested.zip').read_bytes() == zip_body
+
+
+def test_read_zip_resumes_after_dropped_connection(zip_server, tmp_path):
+    zip_server.drop_after = 150
+    read_zip(server_url(zip_server), str(tmp_path), chunk_size=16)
+    # Only the bytes already flushed to the partial file are kept
+    first, resumed = zip_server.range_headers
+    assert first is None
+    assert 0 < int(resumed.split('=')[1].rstrip('-')) <= 150
+    assert (tmp_path / 'nested_dir' / 'file3.txt').read_text() == 'some text'
+
+
+def test_read_zip_restarts_when_range_is_ignored(zip_server, tmp_path):
+    zip_server.support_range = False
+    (tmp_path / 'files_with_nested.zip.part').write_bytes(b'stale bytes')
+    read_zip(server_url(zip_server), str(tmp_path))
+    assert (tmp_path / 'files_with_nested.zip').read_bytes() == zip_body
+
+
+def test_read_zip_gives_up_after_max_retries(zip_server, tmp_path):
+    zip_server.drop_after = 150
+    with pytest.raises(Exception):
+        read_zip(server_url(zip_server), str(tmp_path), chunk_size=16, max_retries=0)
+    assert 0 < (tmp_path / 'files_with_nested.zip.part').stat().st_size <= 150
+    assert not (tmp_path / 'files_with_nested.zip').exists()
+
+
+def test_read_zip_skips_unchanged_archive_with_etag(zip_server, tmp_path):
+    zip_server.etag = '"v1"'
+    first = read_zip(server_url(zip_server), str(tmp_path))
+    mtime = (tmp_path / 'file2.csv').stat().st_mtime_ns
+    second = read_zip(server_url(zip_server), str(tmp_path))
+    assert first['status'] == 'extracted'
+    assert second == {'status': 'not-modified', 'bytes': 0, 'members': first['members']}
+    assert zip_server.conditional_headers == [None, '"v1"']
+    assert (tmp_path / 'file2.csv').stat().st_mtime_ns == mtime
+
+
+def test_read_zip_skips_extraction_without_etag(zip_server, tmp_path):
+    read_zip(server_url(zip_server), str(tmp_path))
+    second = read_zip(server_url(zip_server), str(tmp_path))
+    assert second['status'] == 'unchanged'
+    assert second['bytes'] == len(zip_body)
+
+
+def test_read_zip_reextracts_modified_member(zip_server, tmp_path):
+    zip_server.etag = '"v1"'
+    read_zip(server_url(zip_server), str(tmp_path))
+    (tmp_path / 'nested_dir' / 'file4.csv').write_text('edited')
+    second = read_zip(server_url(zip_server), str(tmp_path))
+    assert second['status'] == 'extracted'
+    assert second['bytes'] == 0
+    assert (tmp_path / 'nested_dir' / 'file4.csv').read_text() == 'some,text'
+
+
+def test_read_zip_without_cache_always_extracts(zip_server, tmp_path):
+    zip_server.etag = '"v1"'
+    read_zip(server_url(zip_server), str(tmp_path), use_cache=False)
+    second = read_zip(server_url(zip_server), str(tmp_path), use_cache=False)
+    assert second['status'] == 'extracted'
+    assert zip_server.conditional_headers == [None, None]
+
+
+def test_read_zips_fetches_all_sources(zip_server, tmp_path):
+    urls = [server_url(zip_server), server_url(zip_server, 'files_json_and_csv.zip')]
+    results = read_zips(urls, str(tmp_path), max_workers=2)
+    assert [result['url'] for result in results] == urls
+    assert all(result['status'] == 'extracted' for result in results)
+    assert results[0]['bytes'] == len(zip_body)
+    assert all(result['throughput'] > 0 for result in results)
+    assert (tmp_path / 'test.json').exists()
+    assert (tmp_path / 'nested_dir' / 'file3.txt').exists()
+
+
+def test_read_zips_isolates_failures(zip_server, tmp_path):
+    urls = [server_url(zip_server, 'missing.zip'), server_url(zip_server), 'https://example.org/not-a-zip']
+    results = read_zips(urls, str(tmp_path))
+    assert [result['status'] for result in results] == ['failed', 'extracted', 'failed']
+    assert results[0]['error'] == 'The URL provided does not exist.'
+    assert (tmp_path / 'file1.txt').exists()
+
+
+def test_read_zips_rejects_clashing_filenames(tmp_path):
+    with pytest.raises(ValueError, match='same file'):
+        read_zips(['https://a.org/data.zip', 'https://b.org/data.zip'], str(tmp_path))
+
+
+def test_read_zips_rejects_overlapping_members(zip_server, tmp_path):
+    (tmp_path / 'file1.txt').write_text('existing')
+    urls = [server_url(zip_server), server_url(zip_server, 'site_a.zip'),
+            server_url(zip_server, 'files_json_and_csv.zip')]
+    results = read_zips(urls, str(tmp_path), max_workers=2)
+    assert [result['status'] for result in results] == ['failed', 'failed', 'extracted']
+    assert results[1]['error'] == "Other archives would be extracted to the same files: ['file1.txt']"
+    # The clashing archives are neither extracted nor cleared, the other source is
+    assert (tmp_path / 'file1.txt').read_text() == 'existing'
+    assert not (tmp_path / 'nested_dir').exists()
+    assert (tmp_path / 'test.json').exists()
+
+
+def test_read_zips_overlapping_directory_entries(zip_server, tmp_path):
+    # Files in the same subdirectory can be extracted side by side
+    urls = [server_url(zip_server), server_url(zip_server, 'site_b.zip')]
+    assert all(result['status'] == 'extracted' for result in read_zips(urls, str(tmp_path)))
+    assert (tmp_path / 'nested_dir' / 'file4.csv').exists()
+    assert (tmp_path / 'nested_dir' / 'file5.txt').exists()
+
+    # but a directory entry clears the directory before it is extracted
+    urls = [server_url(zip_server), server_url(zip_server, 'site_c.zip')]
+    results = read_zips(urls, str(tmp_path), use_cache=False)
+    assert [result['status'] for result in results] == ['failed', 'failed']
+    assert all(result['error'].endswith("same files: ['nested_dir']") for result in results)
@@ -0,0 +1,94 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from sklearn.compose import make_column_transformer
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.scaling import fit_scaler, save_scaler, load_scaler, scale_chunks, write_scaled
+from src.load_data import read_maternal_data
+
+rng = np.random.default_rng(0)
+n_rows = 1000
+test_data = pd.DataFrame({
+    "Age": rng.integers(10, 70, n_rows),
+    "SystolicBP": rng.integers(70, 160, n_rows),
+    "BS": rng.integers(60, 190, n_rows) / 10,
+    "RiskLevel": rng.choice(["high risk", "mid risk", "low risk"], n_rows)
+})
+features = ["Age", "SystolicBP", "BS"]
+
+def split_chunks(df, size=300):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+def column_transformer_output(df):
+    preprocessor = make_column_transformer((StandardScaler(), features), ("passthrough", ["RiskLevel"]))
+    preprocessor.fit(df)
+    return pd.DataFrame(preprocessor.transform(df)).infer_objects()
+
+# Test 1: Fitting in chunks gives the same scaler as fitting all at once
+def test_fit_in_chunks():
+    scaler = fit_scaler(split_chunks(test_data), features)
+    full = StandardScaler().fit(test_data[features])
+    np.testing.assert_allclose(scaler.mean_, full.mean_)
+    np.testing.assert_allclose(scaler.scale_, full.scale_)
+    assert list(scaler.feature_names_in_) == features
+
+# Test 2: An empty input cannot be fitted
+def test_fit_empty():
+    with pytest.raises(ValueError):
+        fit_scaler([], features)
+
+# Test 3: The scaler round trips through its artifact
+def test_save_and_load(tmp_path):
+    scaler = fit_scaler([test_data], features)
+    save_scaler(scaler, tmp_path / "scaler.pickle")
+    loaded = load_scaler(tmp_path / "scaler.pickle")
+    np.testing.assert_array_equal(loaded.transform(test_data[features]), scaler.transform(test_data[features]))
+
+# Test 4: Scaled chunks match the column transformer output
+def test_scale_chunks_layout():
+    scaler = fit_scaler([test_data], features)
+    scaled = pd.concat(scale_chunks(scaler, split_chunks(test_data)), ignore_index=True)
+    pd.testing.assert_frame_equal(scaled, column_transformer_output(test_data))
+
+# Test 5: Scaled features are written to a float32 memory-mapped .npy file
+def test_write_scaled_npy(tmp_path):
+    scaler = fit_scaler(split_chunks(test_data), features)
+    path = str(tmp_path / "scaled.npy")
+    write_scaled(scale_chunks(scaler, split_chunks(test_data)), n_rows, path)
+    features_matrix = np.load(path, mmap_mode="r")
+    assert isinstance(features_matrix, np.memmap)
+    assert features_matrix.dtype == np.float32
+    assert features_matrix.shape == (n_rows, len(features))
+    np.testing.assert_allclose(features_matrix, scaler.transform(test_data[features]), rtol=1e-6, atol=1e-6)
+    assert not os.path.exists(path + ".part")
+
+# Test 6: Other formats are written chunk by chunk alongside the .npy file
+@pytest.mark.parametrize("extension", [".csv", ".feather", ".parquet"])
+def test_write_scaled_formats(tmp_path, extension):
+    scaler = fit_scaler([test_data], features)
+    path = str(tmp_path / f"scaled{extension}")
+    write_scaled(scale_chunks(scaler, split_chunks(test_data)), n_rows, str(tmp_path / "scaled.npy"), [path])
+    expected = column_transformer_output(test_data)
+    expected.columns = expected.columns.astype(str)
+    written = pd.read_csv(path) if extension == ".csv" else read_maternal_data(path)
+    pd.testing.assert_frame_equal(written, expected, check_dtype=False)
+
+# Test 7: The number of rows must match n_rows
+@pytest.mark.parametrize("expected_rows", [n_rows - 1, n_rows + 1])
+def test_write_scaled_row_count(tmp_path, expected_rows):
+    scaler = fit_scaler([test_data], features)
+    with pytest.raises(ValueError):
+        write_scaled(scale_chunks(scaler, split_chunks(test_data)), expected_rows, str(tmp_path / "scaled.npy"))
+
+# Test 8: The scaled Feather file is one record batch, so its columns are mapped without copies
+def test_write_scaled_feather_single_batch(tmp_path):
+    import pyarrow as pa
+    scaler = fit_scaler([test_data], features)
+    path = str(tmp_path / "scaled.feather")
+    write_scaled(scale_chunks(scaler, split_chunks(test_data)), n_rows, str(tmp_path / "scaled.npy"), [path])
+    with pa.memory_map(path) as source:
+        assert pa.ipc.open_file(source).num_record_batches == 1
+    assert not read_maternal_data(path)["0"].to_numpy().flags.writeable
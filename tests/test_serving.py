@@ -0,0 +1,112 @@
+import pytest
+import sys
+import os
+import json
+import asyncio
+import numpy as np
+import pandas as pd
+from sklearn.naive_bayes import GaussianNB
+from sklearn.tree import DecisionTreeClassifier
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.serving import ScoringService
+
+rng = np.random.default_rng(0)
+n_rows = 300
+data = pd.DataFrame({
+    "Age": rng.integers(10, 70, n_rows),
+    "SystolicBP": rng.integers(70, 160, n_rows),
+    "DiastolicBP": rng.integers(50, 100, n_rows),
+    "BS": rng.uniform(6, 19, n_rows).round(1),
+    "BodyTemp": rng.choice([98.0, 99.0, 101.0], n_rows),
+    "HeartRate": rng.integers(60, 90, n_rows)
+})
+target = np.where(data["BS"] > 12, "high risk", np.where(data["Age"] > 40, "mid risk", "low risk"))
+records = data.to_dict(orient="records")
+tree = DecisionTreeClassifier(max_depth=4, random_state=0).fit(data, target)
+
+async def send(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, payload = response.split(b"\r\n\r\n", 1)
+    return int(head.split()[1]), json.loads(payload)
+
+def run_with_service(service, scenario):
+    async def main():
+        server = await service.start("127.0.0.1", 0)
+        try:
+            return await scenario(server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+            service._batcher_task.cancel()
+    return asyncio.run(main())
+
+# Test 1: Single records and lists of records are predicted like the model does
+@pytest.mark.parametrize("model", [tree, GaussianNB().fit(data, target)])
+def test_predict(model):
+    async def scenario(port):
+        single = await send(port, "POST", "/predict", json.dumps(records[0]).encode())
+        several = await send(port, "POST", "/predict", json.dumps(records[:50]).encode())
+        return single, several
+    single, several = run_with_service(ScoringService(model), scenario)
+    assert single == (200, {"predictions": model.predict(data.iloc[:1]).tolist()})
+    assert several == (200, {"predictions": model.predict(data.iloc[:50]).tolist()})
+
+# Test 2: Concurrent requests share batches and each gets its own predictions
+def test_micro_batching():
+    service = ScoringService(tree, max_batch_size=32, max_wait_ms=50)
+    async def scenario(port):
+        return await asyncio.gather(*[send(port, "POST", "/predict", json.dumps(record).encode()) for record in records[:64]])
+    responses = run_with_service(service, scenario)
+    assert [response for _, response in responses] == [{"predictions": [label]} for label in tree.predict(data.iloc[:64])]
+    assert service.counts["batches"] < 64
+    assert service.metrics()["mean_batch_size"] > 1
+
+# Test 3: Invalid records are rejected with their failure cases without failing the rest of the batch
+def test_invalid_records():
+    invalid = [dict(records[0], Age=200), {key: value for key, value in records[1].items() if key != "BS"}]
+    service = ScoringService(tree, max_wait_ms=50)
+    async def scenario(port):
+        return await asyncio.gather(
+            send(port, "POST", "/predict", json.dumps(invalid).encode()),
+            send(port, "POST", "/predict", json.dumps(records[2]).encode()),
+        )
+    (status, payload), valid = run_with_service(service, scenario)
+    assert status == 422
+    row_cases = {(case["column"], case["index"]) for case in payload["failure_cases"] if case["index"] is not None}
+    assert row_cases == {("Age", 0), ("BS", 1)}
+    assert valid == (200, {"predictions": tree.predict(data.iloc[[2]]).tolist()})
+    assert service.counts["rejected"] == 1
+
+# Test 4: Whole-number values of float features are accepted
+def test_integer_floats():
+    record = dict(records[0], BS=7, BodyTemp=98)
+    async def scenario(port):
+        return await send(port, "POST", "/predict", json.dumps(record).encode())
+    assert run_with_service(ScoringService(tree), scenario)[0] == 200
+
+# Test 5: Malformed requests get client errors
+def test_bad_requests():
+    async def scenario(port):
+        return [
+            (await send(port, "POST", "/predict", b"{not json"))[0],
+            (await send(port, "POST", "/predict", b"[]"))[0],
+            (await send(port, "GET", "/predict"))[0],
+            (await send(port, "GET", "/unknown"))[0],
+        ]
+    assert run_with_service(ScoringService(tree), scenario) == [400, 400, 405, 404]
+
+# Test 6: The metrics report the requests served and their latency percentiles
+def test_metrics():
+    async def scenario(port):
+        for record in records[:10]:
+            await send(port, "POST", "/predict", json.dumps(record).encode())
+        return await send(port, "GET", "/metrics")
+    status, metrics = run_with_service(ScoringService(tree), scenario)
+    assert status == 200
+    assert metrics["requests"] == 10
+    assert metrics["records"] == 10
+    assert 0 < metrics["latency_ms"]["p50"] <= metrics["latency_ms"]["p99"]
+    assert metrics["requests_per_second"] > 0
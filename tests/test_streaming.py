@@ -0,0 +1,55 @@
+import pytest
+import sys
+import os
+import numpy as np
+import pandas as pd
+from sklearn.naive_bayes import GaussianNB
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.streaming import streaming_cross_validate
+from src.hash_split import hash_folds
+
+rng = np.random.default_rng(0)
+n_rows = 600
+test_data = pd.DataFrame({
+    "Age": rng.integers(10, 70, n_rows),
+    "BS": rng.normal(8, 2, n_rows).round(1),
+})
+test_data["RiskLevel"] = np.where(test_data["BS"] + rng.normal(0, 1, n_rows) > 8, "high risk", "low risk")
+classes = ["high risk", "low risk"]
+
+def chunked(size):
+    return lambda: (test_data.iloc[start:start + size] for start in range(0, n_rows, size))
+
+# Test 1: Output has the format of cross_validate with train scores
+def test_output_format():
+    scores, final = streaming_cross_validate(chunked(100), {"nb": GaussianNB()}, classes, n_splits=5)
+    assert list(scores["nb"]) == ["fit_time", "score_time", "test_score", "train_score"]
+    assert all(len(values) == 5 for values in scores["nb"].values())
+    assert final["nb"].predict(test_data.drop(columns=["RiskLevel"])).shape == (n_rows,)
+
+# Test 2: Gaussian Bayes scores match fitting each fold in memory, whatever the chunk size
+@pytest.mark.parametrize("chunksize", [37, 600])
+def test_matches_in_memory(chunksize):
+    scores, _ = streaming_cross_validate(chunked(chunksize), {"nb": GaussianNB()}, classes, n_splits=5, seed=3)
+    folds = hash_folds(test_data, 5, seed=3)
+    X, y = test_data.drop(columns=["RiskLevel"]), test_data["RiskLevel"]
+    for fold in range(5):
+        train, test = folds != fold, folds == fold
+        pipe = make_pipeline(StandardScaler(), GaussianNB()).fit(X[train], y[train])
+        assert scores["nb"]["test_score"][fold] == pytest.approx(pipe.score(X[test], y[test]))
+        assert scores["nb"]["train_score"][fold] == pytest.approx(pipe.score(X[train], y[train]))
+
+# Test 3: The SGD logistic regression learns the signal
+def test_sgd_logistic_regression():
+    model = SGDClassifier(loss="log_loss", random_state=0)
+    scores, final = streaming_cross_validate(chunked(100), {"sgd": model}, classes, n_splits=5, epochs=5)
+    assert scores["sgd"]["test_score"].mean() > 0.7
+    assert final["sgd"].steps[-1][1] is not model
+
+# Test 4: Folds without rows are rejected
+def test_empty_fold():
+    with pytest.raises(ValueError):
+        streaming_cross_validate(lambda: [test_data.iloc[:3]], {"nb": GaussianNB()}, classes, n_splits=10)